@@ -0,0 +1,89 @@
+# Adaptive read timeouts for send_command, learned from earlier runs.
+#
+# The timing logs written by timing.py hold the response time of every command
+# per device type. A command gets a read timeout of its p99 times a safety
+# factor, kept between a floor and a ceiling, so a device that stops replying
+# fails within seconds instead of holding a worker for five minutes per command.
+# Commands without enough history get the default. The commands known to be slow
+# are only escalated where the history or the platform says so: their learned
+# timeout may go past the ceiling up to the escalated one, and on the chassis
+# listed for them they get the escalated timeout until there is history.
+
+import glob
+import logging
+from collections import defaultdict
+
+from timing import TimingRecorder, percentile
+
+
+# Commands that legitimately take minutes on some platforms -> (escalated
+# ceiling, chassis models in the hostname that get it without history)
+known_slow_commands = {
+    "admin show inventory chassis": (600, ("9906", "9910", "9912", "9922")),  # big ASR 9000 chassis
+}
+
+
+class AdaptiveTimeouts:
+    def __init__(self, default=60, floor=10, ceiling=300, factor=3, min_samples=5):
+        self.default = default
+        self.floor = floor
+        self.ceiling = ceiling
+        self.factor = factor
+        self.min_samples = min_samples
+        self.learned = {}
+
+    # Learns from the newest `runs` timing logs matching the pattern
+    def load_history(self, pattern="timings_*.jsonl", runs=10):
+        paths = sorted(glob.glob(pattern))[-runs:]
+        recorder = TimingRecorder()
+        recorder.load(paths)
+        self.learn(recorder.records)
+        return paths
+
+    def learn(self, records):
+        samples = defaultdict(list)
+        for record in records:
+            for command in record["commands"]:
+                # A command that timed out only says how long we waited
+                if not command["ok"]:
+                    continue
+                samples[(record.get("device_type"), command["command"])].append(command["seconds"])
+                samples[(None, command["command"])].append(command["seconds"])
+
+        for key, durations in samples.items():
+            if len(durations) >= self.min_samples:
+                ceiling = max(self.ceiling, known_slow_commands.get(key[1], (0, ()))[0])
+                self.learned[key] = min(ceiling, max(self.floor, percentile(durations, 0.99) * self.factor))
+
+    # hostname (or the prompt) is only used to find the chassis of a known slow command
+    def timeout_for(self, command, device_type=None, hostname=None):
+        learned = self.learned.get((device_type, command), self.learned.get((None, command)))
+        if learned is not None:
+            return learned
+        escalated, chassis_models = known_slow_commands.get(command, (None, ()))
+        if hostname and any(model in hostname for model in chassis_models):
+            return escalated
+        return self.default
+
+
+# Wraps a netmiko session and gives every send_command its adaptive read timeout
+class AdaptiveSession:
+    def __init__(self, ssh, timeouts):
+        self.ssh = ssh
+        self.timeouts = timeouts
+
+    def find_prompt(self, *args, **kwargs):
+        return self.ssh.find_prompt(*args, **kwargs)
+
+    def send_command(self, command, *args, **kwargs):
+        from netmiko import ReadTimeout  # loaded with the session already
+
+        kwargs["read_timeout"] = self.timeouts.timeout_for(command, getattr(self.ssh, "device_type", None), getattr(self.ssh, "base_prompt", None))
+        try:
+            return self.ssh.send_command(command, *args, **kwargs)
+        except ReadTimeout:
+            logging.error(f'{self.ssh.host}: "{command}" gave no prompt within its {kwargs["read_timeout"]:.0f}s read timeout')
+            raise
+
+    def __getattr__(self, name):
+        return getattr(self.ssh, name)
@@ -0,0 +1,366 @@
+# Optional asyncio collection backend (needs the asyncssh package).
+#
+# One event loop multiplexes the SSH sessions of the whole sweep instead of
+# holding an OS thread and a paramiko transport per device. The parsing is not
+# duplicated: each device is parsed by the same collect_device_data() used by
+# the netmiko backend, run against a RecordedSession. The device's planned
+# commands are fetched before the first parse; whenever the parsers still ask
+# for a command that has not been fetched yet, the parse stops, the command is
+# fetched over the async session and the parse is run again. With a
+# raw_store the fetched outputs are saved for offline replay as well. With a
+# parse_pool (parse_pool.py) the parse runs in a worker process instead of on
+# the event loop, so a huge output does not stall every other session.
+
+import asyncio
+import logging
+import re
+import time
+from collections import Counter
+
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+from command_batch import split_batched_output
+from command_planner import plan_commands
+from delta_probe import change_reason
+from inventory_logging import device_logging, hold_records, release_records, set_device_context
+from parser_registry import hostname_pattern
+from raw_store import CommandNeeded, RecordedSession
+from retry_policy import classify_failure
+from timing import DeviceTiming
+
+
+# Last line of the buffer looks like a CLI prompt, e.g. "KPE1#" or "RP/0/RSP0/CPU0:KPE1#"
+prompt_pattern = re.compile(r"(?:^|\n)([^\n]*\S[>#])[ \t]*$")
+
+
+# No prompt within a read timeout (at login or after a command), as opposed to
+# the device running out of its whole time budget
+class CommandTimeout(Exception):
+    pass
+
+
+# Seconds to get an SSH session up, like netmiko's conn_timeout and banner wait
+connect_timeout = 30
+
+
+# Minimal prompt-driven CLI over an asyncssh interactive shell
+class AsyncCliSession:
+    def __init__(self, process, read_timeout=300):
+        self.process = process
+        self.read_timeout = read_timeout
+        self.prompt = None
+
+    # Next chunk of output; a read timeout becomes CommandTimeout, so only the
+    # device budget ever surfaces as asyncio.TimeoutError
+    async def read_chunk(self, read_timeout, waiting_for):
+        try:
+            chunk = await asyncio.wait_for(self.process.stdout.read(65536), read_timeout)
+        except asyncio.TimeoutError:
+            raise CommandTimeout(f"No prompt within {read_timeout:.0f}s {waiting_for}") from None
+        if not chunk:
+            raise ConnectionError("Session closed while waiting for the prompt")
+        return chunk.replace("\r", "")
+
+    async def read_until_prompt(self, read_timeout=None, waiting_for="after login"):
+        buffer = ""
+        while True:
+            buffer += await self.read_chunk(read_timeout or self.read_timeout, waiting_for)
+            if self.prompt is None:
+                prompt_match = prompt_pattern.search(buffer)
+                if prompt_match:
+                    return buffer, prompt_match.group(1).strip()
+            elif buffer.rstrip().endswith(self.prompt):
+                return buffer, self.prompt
+
+    async def open(self):
+        await self.read_until_prompt()
+        # Nudge the device for a clean prompt line, the banner may end with anything
+        self.process.stdin.write("\n")
+        _, self.prompt = await self.read_until_prompt()
+        await self.send_command("terminal length 0")
+        await self.send_command("terminal width 511")
+
+    async def send_command(self, command, read_timeout=None):
+        self.process.stdin.write(command + "\n")
+        buffer, _ = await self.read_until_prompt(read_timeout, f'after "{command}"')
+        lines = buffer.rstrip().splitlines()
+        # Drop the echoed command and the trailing prompt, like netmiko does
+        if lines and command in lines[0]:
+            lines = lines[1:]
+        if lines and lines[-1].strip().endswith(self.prompt):
+            lines = lines[:-1]
+        return "\n".join(lines)
+
+    # Writes all commands at once and reads until the prompt came back for each,
+    # within read_timeout for the whole batch like command_batch.send_batch
+    async def send_batch(self, commands, read_timeout=None):
+        read_timeout = read_timeout or self.read_timeout
+        deadline = time.monotonic() + read_timeout
+        self.process.stdin.write("".join(command + "\n" for command in commands))
+        buffer = ""
+        while buffer.count(self.prompt) < len(commands):
+            try:
+                buffer += await self.read_chunk(max(0, deadline - time.monotonic()), "in the batch")
+            except CommandTimeout:
+                raise CommandTimeout(f"Prompt came back {buffer.count(self.prompt)} of {len(commands)} times within {read_timeout:.0f}s") from None
+        return split_batched_output(buffer, self.prompt, commands)
+
+
+# Sends one command with its learned read timeout into the session's outputs
+async def send_timed(cli, session, command, timing, timeouts, device, read_timeout):
+    started = time.perf_counter()
+    output = None
+    try:
+        command_timeout = timeouts.timeout_for(command, None, cli.prompt) if timeouts else None
+        output = session.outputs[command] = await cli.send_command(command, command_timeout)
+    except CommandTimeout:
+        logging.error(f'{device}: "{command}" gave no prompt within its {command_timeout or read_timeout:.0f}s read timeout')
+        raise
+    finally:
+        timing.record_command(command, time.perf_counter() - started, output, ok=output is not None)
+
+
+async def collect_device_async(device, username, password, commands, parse_device, port=22, read_timeout=300, raw_store=None, timing=None, timeouts=None, plan_batch=None,
+                               delta_max_age=None, previous=None, parse_pool=None, plan_commands_for=None):
+    timing = timing or DeviceTiming(device)
+    login_started = time.perf_counter()
+    try:
+        conn = await asyncssh.connect(device, port=port, username=username, password=password,
+                                      known_hosts=None, connect_timeout=connect_timeout)
+    except asyncio.TimeoutError:
+        timing.failed_phase = "login"
+        raise ConnectionError(f"No SSH session within {connect_timeout}s") from None
+    except asyncio.CancelledError:
+        # The device budget ran out while connecting
+        timing.failed_phase = "login"
+        raise
+    async with conn:
+        process = await conn.create_process(term_type="vt100", term_size=(511, 24))
+        cli = AsyncCliSession(process, read_timeout)
+        try:
+            await cli.open()
+        except (CommandTimeout, asyncio.CancelledError):
+            # Logged in, but no prompt showed up within the read timeout or the budget
+            timing.failed_phase = "detect"
+            raise
+        timing.phases["login"] = time.perf_counter() - login_started
+        hostname_match = hostname_pattern.search(cli.prompt)
+        set_device_context(hostname=hostname_match.group(1) if hostname_match else None)
+        logging.debug(f'Connected to {device}')
+
+        session = RecordedSession(cli.prompt)
+        if delta_max_age:
+            # Delta mode: an unchanged device keeps its last record
+            probe_started = time.perf_counter()
+            session.outputs["show version"] = await cli.send_command("show version", timeouts.timeout_for("show version", None, cli.prompt) if timeouts else None)
+            timing.phases["probe"] = time.perf_counter() - probe_started
+            timing.record_command("show version", timing.phases["probe"], session.outputs["show version"])
+            reason = change_reason(previous, hostname_match.group(1) if hostname_match else None, session.outputs["show version"], delta_max_age)
+            if reason is None:
+                logging.info(f"No change since {previous['Polled At']}, carrying its record forward")
+                timing.status = "unchanged"
+                return previous, []
+            logging.debug(f'Collecting {device} in full: {reason}')
+
+        if plan_batch:
+            plan = [command for command in plan_batch(device, None, cli.prompt, commands) if command not in session.outputs]
+            batch_timeout = sum(timeouts.timeout_for(command, None, cli.prompt) for command in plan) if timeouts else None
+            batch_started = time.perf_counter()
+            outputs = await cli.send_batch(plan, batch_timeout)
+            session.outputs.update(outputs)
+            timing.phases["batch"] = time.perf_counter() - batch_started
+            timing.record_command(f"<batch of {len(plan)}>", timing.phases["batch"], "".join(outputs.values()))
+        elif plan_commands_for:
+            # Without --batch the planned commands still go out before the first
+            # parse, one at a time, so the device is parsed once instead of once
+            # more for every command the parse finds missing
+            commands_started = time.perf_counter()
+            for command in plan_commands_for(device, None, cli.prompt, commands):
+                if command not in session.outputs:
+                    await send_timed(cli, session, command, timing, timeouts, device, read_timeout)
+            timing.phases["commands"] = time.perf_counter() - commands_started
+        while True:
+            extra_output = []
+            try:
+                # A pass that stops for a missing command is parsed again, so
+                # only the log of the pass that completes is kept
+                if parse_pool:
+                    parse_started = time.perf_counter()
+                    try:
+                        # In a thread, as the pool blocks while its queue is full
+                        device_data, extra_output, records = await asyncio.to_thread(parse_pool.parse, device, session.prompt, dict(session.outputs), commands)
+                    finally:
+                        timing.phases["parse"] = timing.phases.get("parse", 0) + time.perf_counter() - parse_started
+                    set_device_context(hostname=device_data.get('Hostname'))
+                else:
+                    with hold_records() as records:
+                        device_data = parse_device(session, device, commands, extra_output)
+            except CommandNeeded as needed:
+                await send_timed(cli, session, needed.command, timing, timeouts, device, read_timeout)
+                continue
+
+            if raw_store:
+                raw_store.save(device, session.prompt, session.outputs)
+            timing.platform = device_data.get('OS Family')
+            timing.planned_commands = len(plan_commands(device_data.get('OS Family'), device_data.get('Hostname'), device, commands))
+            release_records(records)
+            ports = sum(device_data.get(f'Total {label} Ports') or 0 for label in ('1G', '10G', '100G', '400G'))
+            logging.info(f"Collected {device_data.get('OS Family')} {device_data.get('Model')} {device_data.get('Version')}, serial {device_data.get('Serial Number')}, {ports} ports")
+            return device_data, extra_output
+
+
+# The limits of one scheduler.DeviceGroup on the event loop: a device waits for
+# a free session of its group and for the group's next login slot before it
+# takes one of the overall sessions, and its outcome feeds the group's backoff
+class GroupGate:
+    def __init__(self, group):
+        self.group = group
+        self.changed = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.changed:
+            while True:
+                now = time.monotonic()
+                if self.group.active < self.group.capacity() and now >= self.group.next_login:
+                    self.group.active += 1
+                    self.group.next_login = max(self.group.next_login, now) + self.group.login_interval * self.group.backoff
+                    return
+                wait = self.group.next_login - now if self.group.active < self.group.capacity() else None
+                try:
+                    await asyncio.wait_for(self.changed.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, status):
+        async with self.changed:
+            self.group.finish(status, time.monotonic())
+            self.changed.notify_all()
+
+
+# Retryable failures are tried again after the retry_policy's backoff, outside
+# the semaphore; a device given up on goes to the failure_manifest. With a
+# gate every attempt goes through the device's group first.
+async def collect_one(index, device, username, password, commands, parse_device, semaphore, device_timeout, on_finished, timing_recorder, retry_policy=None, failure_manifest=None,
+                      gate=None, **options):
+    attempt = 1
+    with device_logging(device):
+        while True:
+            timing = DeviceTiming(device)
+            if gate:
+                await gate.acquire()
+            try:
+                device_data, extra_output = await collect_with_budget(device, username, password, commands, parse_device, semaphore, device_timeout, timing_recorder, timing, **options)
+            finally:
+                if gate:
+                    await gate.release(timing.status)
+            if device_data is not None:
+                break
+            failure_class = classify_failure(timing.status, timing.error, timing.failed_phase)
+            delay = retry_policy.delay(failure_class, attempt) if retry_policy else None
+            if delay is None:
+                if failure_manifest:
+                    failure_manifest.add(device, failure_class, timing.failed_phase, attempt, timing.error)
+                break
+            logging.warning(f'Retrying {device} ({failure_class}) in {delay:.1f}s')
+            await asyncio.sleep(delay)
+            attempt += 1
+    if on_finished:
+        on_finished(index, device_data, extra_output)
+    return device_data, extra_output
+
+
+# options are the keyword arguments of collect_device_async (port, raw_store, ...)
+async def collect_with_budget(device, username, password, commands, parse_device, semaphore, device_timeout, timing_recorder=None, timing=None, **options):
+    async with semaphore:
+        # Started once the semaphore is held, so the time spent queueing is not counted
+        timing = timing or DeviceTiming(device)
+        timing.started_at = time.time()
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(
+                collect_device_async(device, username, password, commands, parse_device, timing=timing, **options),
+                device_timeout or None,
+            )
+            timing.finish(timing.status)
+            return result
+
+        except asyncssh.PermissionDenied as e:
+            logging.error(f'Authentication failure for {device}')
+            timing.failed_phase = "login"
+            timing.finish("auth", str(e))
+
+        except CommandTimeout as e:
+            logging.warning(f'{device} stopped answering within the read timeout, giving up on it: {str(e)}')
+            timing.finish("read_timeout", str(e))
+
+        # The session's own timeouts are CommandTimeout or ConnectionError, so
+        # this is the device budget (TimeoutError is an OSError on 3.11+, it
+        # has to come first)
+        except asyncio.TimeoutError:
+            if device_timeout and time.monotonic() - started >= device_timeout:
+                logging.error(f'Gave up on {device} after its {device_timeout}s time budget')
+                timing.finish("budget")
+            else:
+                logging.error(f'Timeout on {device}')
+                timing.failed_phase = timing.failed_phase or "login"
+                timing.finish("timeout", "Timeout")
+
+        except (OSError, asyncssh.ConnectionLost) as e:
+            logging.error(f'Timeout while connecting to {device}: {str(e)}')
+            timing.failed_phase = timing.failed_phase or "login"
+            timing.finish("timeout", str(e))
+
+        except Exception as e:
+            logging.error(f'An error occurred while connecting to {device}: {str(e)}')
+            timing.finish("error", str(e))
+
+        finally:
+            if timing_recorder:
+                timing_recorder.finish(timing)
+
+    return None, []
+
+
+# Collects all devices concurrently, at most `concurrency` sessions at a time.
+# Returns (device_data, extra_output) per device, in the order of ips.
+# on_finished(index, device_data, extra_output) is called as soon as each device
+# is done, device_data being None when it failed. With a timing_recorder every
+# device's timings are recorded as well, and with timeouts (AdaptiveTimeouts)
+# every command gets its learned read timeout. plan_batch(device, device_type,
+# prompt, commands) returns the commands to write in one go right after login;
+# without it plan_commands_for (same arguments) returns the commands sent one
+# by one before the first parse.
+# With a delta_max_age, devices unchanged since their previous_records entry
+# keep that record. With a retry_policy retryable failures are tried again and
+# the devices given up on are written to the failure_manifest. With a
+# parse_pool the outputs are parsed in its worker processes. With a scheduler
+# (scheduler.DeviceScheduler) every device also keeps to the concurrency, login
+# rate and backoff of its subnet or region group; regions maps an IP to its
+# region from an earlier run.
+async def collect_inventory_async(ips, username, password, commands, parse_device, concurrency=500, device_timeout=0, port=22, on_finished=None, raw_store=None, timing_recorder=None, timeouts=None, plan_batch=None,
+                                  delta_max_age=None, previous_records=None, retry_policy=None, failure_manifest=None, parse_pool=None, scheduler=None, regions=None,
+                                  plan_commands_for=None):
+    if asyncssh is None:
+        raise RuntimeError("The asyncio backend needs the asyncssh package (pip install asyncssh)")
+
+    previous_records = previous_records or {}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    # Device -> the gate of its scheduler group
+    gates = {}
+    if scheduler:
+        regions = regions or {}
+        group_gates = {}
+        for device in ips:
+            group = scheduler.group_for(device, regions.get(device))
+            gates[device] = group_gates.setdefault(group.name, GroupGate(group))
+        devices_per_group = Counter(gate.group.name for gate in gates.values())
+        logging.info("Scheduling " + ", ".join(f"{name}: {count}" for name, count in devices_per_group.items()))
+    tasks = [collect_one(index, device, username, password, commands, parse_device, semaphore, device_timeout, on_finished, timing_recorder, retry_policy, failure_manifest,
+                         gates.get(device),
+                         port=port, raw_store=raw_store, timeouts=timeouts, plan_batch=plan_batch,
+                         delta_max_age=delta_max_age, previous=previous_records.get(device), parse_pool=parse_pool, plan_commands_for=plan_commands_for)
+             for index, device in enumerate(ips)]
+    return await asyncio.gather(*tasks)
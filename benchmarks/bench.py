@@ -0,0 +1,298 @@
+# Benchmark harness for the parsers and the collection pipeline.
+#
+# Runs against the transcript corpus of corpus.py (every platform, small to
+# huge), optionally plus captures taken with --capture, and measures:
+#   parse     collect_device_data over a RecordedSession, per transcript
+#   parsers   the individual parsers (interface tally, platform, bundles, show version)
+#   memory    tracemalloc peak of one parse, per transcript
+#   records   bytes per device held as a checkpoint dict and as a DeviceRecord
+#   e2e       process_device against fake_ssh_server.py with a per-command delay
+#   startup   cold start of the subcommands that never open a session, against
+#             startup_target, and which heavy packages an import pulls in
+# Every run is written to benchmarks/results/<time>.json; compare two of them with
+#
+#   python benchmarks/bench.py run [--e2e] [--size small --size medium]
+#   python benchmarks/bench.py compare benchmarks/results/a.json benchmarks/results/b.json
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+benchmarks_directory = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(benchmarks_directory))
+
+from consolidatedlistv05 import collect_device_data, process_device  # noqa: E402
+from corpus import build_corpus, platforms, sizes  # noqa: E402
+from device_cache import DeviceTypeCache  # noqa: E402
+from device_record import DeviceRecord  # noqa: E402
+from interface_tally import tally_interfaces  # noqa: E402
+from parser_registry import parse_bundle_summary, parse_platform, parse_show_version, show_version_keywords  # noqa: E402
+from raw_store import RawOutputStore, RecordedSession  # noqa: E402
+
+
+default_results_directory = os.path.join(benchmarks_directory, "results")
+
+# Seconds a fresh interpreter may take for validate, --help or the bare import
+startup_target = 0.15
+
+# Packages only the commands that need them should load
+heavy_modules = ("netmiko", "paramiko", "asyncssh", "openpyxl", "pandas", "pyarrow")
+
+
+def parse_device(transcript):
+    session = RecordedSession(transcript["prompt"], transcript["commands"])
+    return collect_device_data(session, transcript["host"], ["show version"], [])
+
+
+# Best time of one call of function(), repeated for at least min_time seconds
+def best_time(function, min_time=0.2, max_runs=1000):
+    best = None
+    spent = 0.0
+    runs = 0
+    while runs < max_runs and (spent < min_time or runs < 3):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        spent += elapsed
+        runs += 1
+    return best
+
+
+def transcript_bytes(transcript):
+    return sum(len(output.encode("utf-8")) for output in transcript["commands"].values())
+
+
+def bench_parse(corpus, min_time):
+    results = {}
+    for name, transcript in corpus:
+        seconds = best_time(lambda: parse_device(transcript), min_time)
+        size = transcript_bytes(transcript)
+        results[name] = {"seconds": seconds, "bytes": size, "mb_per_second": size / seconds / 1e6}
+        print(f"parse   {name:24} {seconds * 1000:10.3f} ms {size / seconds / 1e6:8.1f} MB/s")
+    return results
+
+
+def bench_parsers(corpus, min_time):
+    results = {}
+    for name, transcript in corpus:
+        outputs = transcript["commands"]
+        cases = []
+        if "show ip interface brief" in outputs:
+            cases.append(("tally_interfaces", lambda: tally_interfaces(outputs["show ip interface brief"], "xe")))
+        if "show ipv4 interface brief" in outputs:
+            cases.append(("tally_interfaces", lambda: tally_interfaces(outputs["show ipv4 interface brief"], "xr")))
+        if "show platform" in outputs:
+            cases.append(("parse_platform", lambda: parse_platform(outputs["show platform"])))
+        for command in ("show etherchannel summary", "show port-channel summary"):
+            if command in outputs:
+                cases.append(("parse_bundle_summary", lambda command=command: parse_bundle_summary(outputs[command])))
+        for keyword, family in show_version_keywords:
+            if keyword in outputs["show version"]:
+                cases.append(("parse_show_version", lambda family=family: parse_show_version(family, outputs["show version"])))
+                break
+        for parser_name, function in cases:
+            seconds = best_time(function, min_time)
+            results[f"{name} {parser_name}"] = {"seconds": seconds}
+            print(f"parser  {name:24} {parser_name:22} {seconds * 1000:10.3f} ms")
+    return results
+
+
+def bench_memory(corpus):
+    results = {}
+    for name, transcript in corpus:
+        parse_device(transcript)  # compiled patterns and imports are not part of the peak
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        parse_device(transcript)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        tracemalloc.stop()
+        results[name] = {"peak_bytes": peak, "input_bytes": transcript_bytes(transcript)}
+        print(f"memory  {name:24} {peak / 1024:10.1f} KiB peak for {transcript_bytes(transcript) / 1024:.1f} KiB of output")
+    return results
+
+
+# Memory of count records as the checkpoint loads them (json.loads of the line)
+# and as DeviceRecords, per transcript, and whether the record flattens back to
+# exactly the same row
+def bench_records(corpus, count):
+    results = {}
+    for name, transcript in corpus:
+        line = json.dumps(dict(parse_device(transcript)), default=str)
+        sizes = {}
+        for kind, load in (("dict", json.loads), ("record", lambda line: DeviceRecord.from_row(json.loads(line)))):
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            held = [load(line) for _ in range(count)]
+            sizes[kind] = (tracemalloc.get_traced_memory()[0] - baseline) / count
+            tracemalloc.stop()
+            del held
+        row = json.loads(line)
+        lossless = DeviceRecord.from_row(row).to_row() == row
+        results[name] = {"dict_bytes": sizes["dict"], "record_bytes": sizes["record"], "lossless": lossless}
+        print(f"records {name:24} {sizes['dict']:8.0f} B as dict {sizes['record']:8.0f} B as record "
+              f"{1 - sizes['record'] / sizes['dict']:6.1%} less{'' if lossless else '  NOT LOSSLESS'}")
+    return results
+
+
+# The fake devices run on their own event loop thread for the whole benchmark
+def start_fake_server(transcripts, port):
+    from fake_ssh_server import start_fake_devices
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(start_fake_devices(transcripts, port), loop).result()
+    return loop
+
+
+# Login and every command against the fake devices. Without detect the device
+# types come from a pre-filled cache, as in a steady-state run.
+def bench_e2e(corpus, delay, port, batch, repeat, detect=False):
+    transcripts = [dict(transcript, delay=delay) for name, transcript in corpus]
+    loop = start_fake_server(transcripts, port)
+    device_cache = None
+    if not detect:
+        device_cache = DeviceTypeCache(os.path.join(tempfile.mkdtemp(), "device_type_cache.json"), ttl=0)
+        for name, transcript in corpus:
+            device_cache.put(transcript["host"], transcript["device_type"])
+    results = {}
+    try:
+        for name, transcript in corpus:
+            latencies = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                device_data = process_device(transcript["host"], "bench", "bench", ["show version"], port=port, device_cache=device_cache, batch=batch)
+                latencies.append(time.perf_counter() - started)
+            ok = device_data is not None
+            results[name] = {"seconds": min(latencies), "mean_seconds": sum(latencies) / len(latencies), "ok": ok}
+            print(f"e2e     {name:24} {min(latencies):10.3f} s  {'ok' if ok else 'FAILED'}")
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+    return results
+
+
+# Best wall time of a fresh interpreter per subcommand, as a user starting it sees it
+def bench_startup(runs):
+    package_directory = os.path.dirname(benchmarks_directory)
+    script = os.path.join(package_directory, "consolidatedlistv05.py")
+    devices = os.path.join(tempfile.mkdtemp(), "devices.txt")
+    with open(devices, "w") as devices_file:
+        devices_file.write("".join(f"10.{index // 65536}.{index // 256 % 256}.{index % 256}\n" for index in range(1000)))
+    check = f"import sys, consolidatedlistv05; print(' '.join(m for m in {heavy_modules!r} if m in sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, cwd=package_directory).stdout.split()
+    results = {"heavy_modules": loaded}
+    print(f"startup heavy modules on import: {', '.join(loaded) or 'none'}")
+    cases = {
+        "import": [sys.executable, "-c", "import consolidatedlistv05"],
+        "help": [sys.executable, script, "--help"],
+        "validate": [sys.executable, script, "validate", "--devices", devices],
+    }
+    for name, command in cases.items():
+        seconds = None
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run(command, capture_output=True, cwd=package_directory, check=True)
+            elapsed = time.perf_counter() - started
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+        results[name] = {"seconds": seconds, "target": startup_target}
+        print(f"startup {name:24} {seconds * 1000:10.1f} ms {'' if seconds <= startup_target else 'over the target of ' + str(startup_target) + 's'}")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=benchmarks_directory).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args):
+    corpus = build_corpus(args.platform, args.size)
+    if args.captures:
+        store = RawOutputStore(args.captures)
+        for device in store.devices():
+            capture = store.load(device)
+            corpus.append((f"capture-{device}", {"host": device, "prompt": capture["prompt"], "commands": capture["outputs"]}))
+
+    results = {
+        "meta": {
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "delay": args.delay if args.e2e else None,
+            "batch": args.batch if args.e2e else None,
+            "detect": args.detect if args.e2e else None,
+        },
+        "parse": bench_parse(corpus, args.min_time),
+        "parsers": bench_parsers(corpus, args.min_time),
+        "memory": bench_memory(corpus),
+        "records": bench_records(corpus, args.records),
+        "startup": bench_startup(args.startup_runs),
+    }
+    if args.e2e:
+        # Captures have no fake server behind them
+        results["e2e"] = bench_e2e([item for item in corpus if not item[0].startswith("capture-")], args.delay, args.port, args.batch, args.repeat, args.detect)
+
+    output = args.output or os.path.join(default_results_directory, time.strftime("%Y-%m-%d_%H-%M-%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as results_file:
+        json.dump(results, results_file, indent=1)
+    print(f"Results written to {output}")
+
+
+# Lower is better for every metric compared here
+compared_metrics = {"parse": "seconds", "parsers": "seconds", "memory": "peak_bytes", "records": "record_bytes", "e2e": "seconds", "startup": "seconds"}
+
+
+def compare(args):
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(args.candidate) as candidate_file:
+        candidate = json.load(candidate_file)
+    print(f"{args.baseline} ({baseline['meta'].get('commit')}) -> {args.candidate} ({candidate['meta'].get('commit')})")
+    for section, metric in compared_metrics.items():
+        for name, before in baseline.get(section, {}).items():
+            after = candidate.get(section, {}).get(name)
+            if not isinstance(before, dict) or not after or not before[metric]:
+                continue
+            change = (after[metric] - before[metric]) / before[metric]
+            flag = "  slower" if change > args.threshold else ("  faster" if change < -args.threshold else "")
+            print(f"{section:8} {name:48} {before[metric]:14.6g} -> {after[metric]:<14.6g} {change:+7.1%}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the parsers and the collection pipeline on recorded transcripts")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    run_parser = subparsers.add_parser("run", help="run the benchmarks and store the results")
+    run_parser.add_argument("--platform", action="append", choices=list(platforms), help="only these platforms (default: all)")
+    run_parser.add_argument("--size", action="append", choices=list(sizes), help="only these sizes (default: all)")
+    run_parser.add_argument("--captures", help="also parse the captures in this --raw-store directory")
+    run_parser.add_argument("--min-time", type=float, default=0.2, help="seconds each parse benchmark repeats for at least (default: 0.2)")
+    run_parser.add_argument("--records", type=int, default=2000, help="copies of each record held for the records benchmark (default: 2000)")
+    run_parser.add_argument("--e2e", action="store_true", help="also time process_device against a fake SSH server (needs asyncssh and netmiko)")
+    run_parser.add_argument("--delay", type=float, default=0.05, help="seconds the fake devices wait before every answer (default: 0.05)")
+    run_parser.add_argument("--port", type=int, default=8122, help="port of the fake devices (default: 8122)")
+    run_parser.add_argument("--batch", action="store_true", help="run the e2e benchmark with --batch")
+    run_parser.add_argument("--detect", action="store_true", help="run SSHDetect in the e2e benchmark instead of using the known device types")
+    run_parser.add_argument("--startup-runs", type=int, default=5, help="fresh interpreters per startup benchmark, the best is kept (default: 5)")
+    run_parser.add_argument("--repeat", type=int, default=1, help="e2e runs per device, the best is kept (default: 1)")
+    run_parser.add_argument("--output", help="results file (default: benchmarks/results/<time>.json)")
+    compare_parser = subparsers.add_parser("compare", help="compare two stored runs")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.05, help="relative change flagged as slower or faster (default: 0.05)")
+    args = parser.parse_args()
+
+    if args.action == "run":
+        run(args)
+    else:
+        compare(args)
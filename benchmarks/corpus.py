@@ -0,0 +1,227 @@
+# Transcript corpus for the benchmarks.
+#
+# One generator per platform family the collector handles (IOS, IOS-XE, IOS-XR
+# on ASR9K and NCS, NX-OS, 7600), each producing the prompt and the output of
+# every command the parsers send, in the shape real devices print them. Sizes go
+# from a small access box to a huge aggregation node with thousands of
+# interfaces and dozens of line cards. Generation is seeded, so the same corpus
+# comes out every time and runs stay comparable.
+#
+# The transcripts are the fake_ssh_server.py format; captures taken with
+# --capture can be added to the parse benchmark next to them.
+#
+#   python benchmarks/corpus.py --output benchmarks/transcripts
+
+import argparse
+import json
+import os
+import random
+
+
+# size -> (interfaces, line cards, satellites, port-channels)
+sizes = {
+    "small": (8, 2, 2, 1),
+    "medium": (200, 8, 10, 8),
+    "large": (2000, 24, 40, 64),
+    "huge": (10000, 64, 100, 256),
+}
+
+uptime = "uptime is 1 year, 2 weeks, 3 days, 4 hours, 5 minutes"
+
+xe_states = ["up                    up", "down                  down", "administratively down down"]
+xr_states = ["Up              Up", "Down            Down", "Shutdown        Down"]
+
+
+def interface_names(count, rng, kinds, slot_depth):
+    names = []
+    for index in range(count):
+        kind = rng.choice(kinds)
+        slots = "/".join(str(part) for part in ([index // 48 % 8] + [0] * (slot_depth - 2) + [index % 48]))
+        names.append(f"{kind}{slots}")
+    return names
+
+
+def ip_interface_brief(count, bundles, rng):
+    lines = ["Interface              IP-Address      OK? Method Status                Protocol"]
+    for name in interface_names(count, rng, ["GigabitEthernet", "TenGigabitEthernet", "HundredGigE"], 3):
+        lines.append(f"{name:<22} unassigned      YES NVRAM  {rng.choice(xe_states)}")
+        if rng.random() < 0.2:
+            lines.append(f"{name}.{rng.randint(2, 4000):<10} 10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.1 YES NVRAM  up                    up")
+    for bundle in range(1, bundles + 1):
+        lines.append(f"{f'Port-channel{bundle}':<22} unassigned      YES NVRAM  up                    up")
+    lines.append("Loopback0              10.255.0.1      YES NVRAM  up                    up")
+    return "\n".join(lines) + "\n"
+
+
+def ipv4_interface_brief(count, rng):
+    lines = ["Interface                      IP-Address      Status          Protocol Vrf-Name",
+             "Loopback0                      10.255.0.2      Up              Up       default"]
+    for name in interface_names(count, rng, ["GigabitEthernet", "TenGigE", "HundredGigE", "FourHundredGigE"], 4):
+        lines.append(f"{name:<30} unassigned      {rng.choice(xr_states)}     default")
+        if rng.random() < 0.2:
+            lines.append(f"{name + '.' + str(rng.randint(2, 4000)):<30} unassigned      Up              Up       default")
+        if rng.random() < 0.05:
+            lines.append(f"{'nVFabric-' + name:<30} unassigned      Up              Up       default")
+    return "\n".join(lines) + "\n"
+
+
+def bundle_summary(bundles, rng, member_name="Gi0/0/"):
+    lines = ["Flags:  D - down        P - bundled in port-channel",
+             "Group  Port-channel  Protocol    Ports",
+             "------+-------------+-----------+-----------------------------------------------"]
+    for bundle in range(1, bundles + 1):
+        members = " ".join(f"{member_name}{rng.randint(0, 47)}(P)" for _ in range(rng.randint(2, 8)))
+        lines.append(f"{bundle:<6} Po{bundle}({rng.choice(['SU', 'SU', 'SD'])})     LACP        {members}")
+    return "\n".join(lines) + "\n"
+
+
+def xr_platform(cards, rng, rsp="A9K-RSP880-SE", slot="RSP"):
+    lines = ["Node            Type                      State            Config State",
+             "-----------------------------------------------------------------------------",
+             f"0/{slot}0/CPU0     {rsp}(Active)     IOS XR RUN       PWR,NSHUT,MON",
+             f"0/{slot}1/CPU0     {rsp}(Standby)    IOS XR RUN       PWR,NSHUT,MON"]
+    for card in range(cards):
+        if rng.random() < 0.5:
+            lines.append(f"0/{card}/CPU0        A9K-MOD400-SE             IOS XR RUN       PWR,NSHUT,MON")
+            lines.append(f"0/{card}/0           A9K-MPA-20X1GE            OK               PWR,NSHUT,MON")
+            lines.append(f"0/{card}/1           A9K-MPA-2X100GE           OK               PWR,NSHUT,MON")
+        else:
+            lines.append(f"0/{card}/CPU0        A9K-24X10GE-SE            IOS XR RUN       PWR,NSHUT,MON")
+    return "\n".join(lines) + "\n"
+
+
+def satellites(count, rng):
+    lines = ["Sat  Device Name      Status"]
+    for sat in range(100, 100 + count):
+        lines.append(f"{sat}  SAT{sat}           {rng.choice(['Connected', 'Connected', 'Discovery Stalled'])}")
+    return "\n".join(lines) + "\n"
+
+
+def ios(size, rng):
+    interfaces, cards, sats, bundles = sizes[size]
+    return "KAS3750a#", {
+        "show version": ("Cisco IOS Software, C3750E Software (C3750E-UNIVERSALK9-M), Version 15.0(2)SE4, RELEASE SOFTWARE (fc1)\n"
+                         f"KAS3750a {uptime}\n"
+                         "cisco WS-C3750X-48P (PowerPC405) processor (revision A0) with 262144K bytes of memory.\n"
+                         "Processor board ID FDO1234X0YZ\n"),
+        "show ip interface brief": ip_interface_brief(interfaces, bundles, rng),
+        "show etherchannel summary": bundle_summary(bundles, rng),
+    }
+
+
+def xe(size, rng):
+    interfaces, cards, sats, bundles = sizes[size]
+    return "KPE1a#", {
+        "show version": ("Cisco IOS XE Software, Version 16.09.04\n"
+                         "Cisco IOS Software [Fuji], ASR1000 Software (X86_64_LINUX_IOSD-UNIVERSALK9-M), Version 16.9.4, RELEASE SOFTWARE (fc2)\n"
+                         f"KPE1a {uptime}\n"
+                         "cisco ASR1002-X (2RU-X) processor (revision 2KP) with 3755183K/6147K bytes of memory.\n"
+                         "Processor board ID FOX1234ABCD\n"),
+        "show ip interface brief": ip_interface_brief(interfaces, bundles, rng),
+        "show etherchannel summary": bundle_summary(bundles, rng),
+    }
+
+
+def xr_asr9k(size, rng):
+    interfaces, cards, sats, bundles = sizes[size]
+    return "RP/0/RSP0/CPU0:KPE9906m#", {
+        "show version": ("Cisco IOS XR Software, Version 6.5.3[Default]\n"
+                         f"KPE9906m {uptime}\n"
+                         "cisco ASR9K Series (Intel 686 F6M14S4) processor with 12582912K bytes of memory.\n"),
+        "show platform": xr_platform(cards, rng),
+        "show  nv satellite status brief": satellites(sats, rng),
+        "show inventory | include 9906": "NAME: \"chassis ASR-9906-AC\", DESCR: \"ASR 9906 AC Chassis\"\nPID: ASR-9906, VID: V01, SN: FOX9906XYZ\n",
+        "show ipv4 interface brief": ipv4_interface_brief(interfaces, rng),
+    }
+
+
+def xr_ncs(size, rng):
+    interfaces, cards, sats, bundles = sizes[size]
+    return "RP/0/RP0/CPU0:KPE5508p#", {
+        "show version": ("Cisco IOS XR Software, Version 7.3.2\n"
+                         f"KPE5508p {uptime}\n"
+                         "cisco NCS-5500 () processor\n"),
+        "show platform": xr_platform(cards, rng, rsp="NC55-RP-E", slot="RP"),
+        "show  nv satellite status brief": satellites(0, rng),
+        "admin show inventory chassis": "NAME: \"Rack 0\", DESCR: \"NCS5508 8 Slot Single Chassis\"\nPID: NCS-5508, VID: V02, SN: FGE5508ABC\n",
+        "show ipv4 interface brief": ipv4_interface_brief(interfaces, rng),
+    }
+
+
+def nxos(size, rng):
+    interfaces, cards, sats, bundles = sizes[size]
+    return "KDC93180a#", {
+        "show version": ("Cisco Nexus Operating System (NX-OS) Software\n"
+                         "  kickstart: version 7.0(3)I7(6)\n"
+                         "  cisco N3K-C3048TP-1GE Chassis (\"48x1GE + 4x10G Supervisor\")\n"
+                         "  Processor Board ID FOC1234NXOS\n"
+                         "Kernel uptime is 12 day(s), 3 hour(s), 4 minute(s), 5 second(s)\n"),
+        "show ip interface brief": ip_interface_brief(interfaces, bundles, rng),
+        "show port-channel summary": bundle_summary(bundles, rng, member_name="Eth1/"),
+        "show inventory": "NAME: \"Chassis\",  DESCR: \"Nexus 3048 Chassis\"\nPID: N3K-C3048TP-1GE  ,  VID: V01 ,  SN: FOC1234NXOS\nHw Serial#: FOC1234NXOS\n",
+    }
+
+
+def c7600(size, rng):
+    interfaces, cards, sats, bundles = sizes[size]
+    return "KPE7606b#", {
+        "show version": ("Cisco IOS Software, c7600rsp72043_rp Software (c7600rsp72043_rp-ADVIPSERVICESK9-M), Version 15.1(3)S4, RELEASE SOFTWARE (fc1)\n"
+                         f"KPE7606b {uptime}\n"
+                         "cisco CISCO7606-S (M8500) processor (revision 1.0) with 983008K/65536K bytes of memory.\n"
+                         "Processor board ID FOX7606ABC\n"),
+        "show ip interface brief": ip_interface_brief(interfaces, bundles, rng),
+        "show etherchannel summary": bundle_summary(bundles, rng),
+    }
+
+
+# netmiko device type of every platform, so the e2e benchmark can skip SSHDetect
+device_types = {
+    "ios": "cisco_ios",
+    "xe": "cisco_xe",
+    "xr-asr9k": "cisco_xr",
+    "xr-ncs": "cisco_xr",
+    "nxos": "cisco_nxos",
+    "7600": "cisco_ios",
+}
+
+platforms = {
+    "ios": ios,
+    "xe": xe,
+    "xr-asr9k": xr_asr9k,
+    "xr-ncs": xr_ncs,
+    "nxos": nxos,
+    "7600": c7600,
+}
+
+
+# [(name, transcript)] for every platform and size, hosts numbered from 127.0.1.1
+def build_corpus(platform_names=None, size_names=None, seed=2024):
+    corpus = []
+    for platform in platform_names or platforms:
+        for size in size_names or sizes:
+            prompt, commands = platforms[platform](size, random.Random(f"{seed}-{platform}-{size}"))
+            transcript = {"host": f"127.0.1.{len(corpus) + 1}", "prompt": prompt, "device_type": device_types[platform], "commands": commands}
+            corpus.append((f"{platform}-{size}", transcript))
+    return corpus
+
+
+def write_corpus(directory, corpus):
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, transcript in corpus:
+        path = os.path.join(directory, f"{name}.json")
+        with open(path, "w") as transcript_file:
+            json.dump(transcript, transcript_file, indent=1)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the benchmark transcripts for fake_ssh_server.py")
+    parser.add_argument("--output", default="benchmarks/transcripts", help="directory to write to (default: benchmarks/transcripts)")
+    parser.add_argument("--platform", action="append", choices=list(platforms), help="only these platforms (default: all)")
+    parser.add_argument("--size", action="append", choices=list(sizes), help="only these sizes (default: all)")
+    args = parser.parse_args()
+
+    paths = write_corpus(args.output, build_corpus(args.platform, args.size))
+    print(f"Wrote {len(paths)} transcripts to {args.output}")
@@ -0,0 +1,73 @@
+# Append-only checkpoint of collected device records.
+#
+# Every finished device_data record is written as one JSON line tagged with the
+# run window it belongs to, and flushed to disk straight away. A crashed or
+# interrupted sweep keeps everything collected so far, --resume skips the IPs
+# already in the window, and the final spreadsheet is built from this file.
+
+import json
+import logging
+import os
+import threading
+import time
+
+from device_record import DeviceRecord
+
+
+class InventoryCheckpoint:
+    def __init__(self, path="inventory_checkpoint.jsonl", run_window=None):
+        self.path = path
+        self.run_window = run_window
+        self.lock = threading.Lock()
+
+    def append(self, device_data):
+        record = {
+            "run_window": self.run_window,
+            "ip": device_data['IP Address'],
+            "completed_at": time.time(),
+            "device_data": dict(device_data),
+        }
+        line = json.dumps(record, default=str) + "\n"
+        with self.lock:
+            with open(self.path, "a") as checkpoint_file:
+                checkpoint_file.write(line)
+                checkpoint_file.flush()
+                os.fsync(checkpoint_file.fileno())
+
+    def read_records(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as checkpoint_file:
+            for line_number, line in enumerate(checkpoint_file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash, everything before it is intact
+                    logging.error(f'Skipping damaged line {line_number} of {self.path}')
+
+    # Window of the most recent record, used to pick up an interrupted run
+    def last_run_window(self):
+        last_window = None
+        for record in self.read_records():
+            last_window = record.get("run_window")
+        return last_window
+
+    # device_data per IP for the current window, the latest record of an IP wins
+    def load(self):
+        records = {}
+        for record in self.read_records():
+            if record.get("run_window") == self.run_window:
+                records[record["ip"]] = DeviceRecord.from_row(record["device_data"])
+        return records
+
+    # Latest device_data per IP over all run windows
+    def latest(self):
+        records = {}
+        for record in self.read_records():
+            records[record["ip"]] = DeviceRecord.from_row(record["device_data"])
+        return records
+
+    def collected_ips(self):
+        return set(self.load())
@@ -0,0 +1,60 @@
+# Batched command execution: one channel write for a platform's whole command plan.
+#
+# Instead of one blocking send_command (and one prompt detection round trip) per
+# command, the planned commands are written to the channel in one go and the
+# combined output is read back until the prompt has come back once per command.
+# It is then split on the prompt markers and every section is handed to the
+# parsers as if it came from its own send_command. A section whose echo does not
+# match its command is dropped, so that command simply goes out on its own.
+
+import re
+import time
+
+
+# {command: output} from the combined output of `commands` written in one go.
+# Every section starts with the echoed command and ends at the next prompt.
+def split_batched_output(output, prompt, commands):
+    sections = re.split(re.escape(prompt), output.replace("\r\n", "\n").replace("\r", "\n"))
+    outputs = {}
+    for command, section in zip(commands, sections):
+        lines = section.strip("\n").split("\n")
+        if not lines or lines[0].strip() != command.strip():
+            break
+        outputs[command] = "\n".join(lines[1:]).rstrip()
+    return outputs
+
+
+def send_batch(ssh, commands, read_timeout):
+    from netmiko import ReadTimeout  # loaded with the session already
+
+    prompt = ssh.find_prompt()
+    ssh.write_channel("".join(command + ssh.RETURN for command in commands))
+    output = ""
+    deadline = time.monotonic() + read_timeout
+    while output.count(prompt) < len(commands):
+        if time.monotonic() > deadline:
+            raise ReadTimeout(f"Prompt came back {output.count(prompt)} of {len(commands)} times within {read_timeout:.0f}s")
+        chunk = ssh.read_channel()
+        if chunk:
+            output += chunk
+        else:
+            time.sleep(0.02)
+    return split_batched_output(output, prompt, commands)
+
+
+# Answers send_command from the outputs of a batch, anything else goes to the device
+class BatchedSession:
+    def __init__(self, ssh, outputs):
+        self.ssh = ssh
+        self.outputs = outputs
+
+    def find_prompt(self, *args, **kwargs):
+        return self.ssh.find_prompt(*args, **kwargs)
+
+    def send_command(self, command, *args, **kwargs):
+        if command in self.outputs:
+            return self.outputs[command]
+        return self.ssh.send_command(command, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.ssh, name)
@@ -0,0 +1,74 @@
+# Declarative command planner.
+#
+# Which commands a device needs follows from three things: its OS family (from
+# show version, or the netmiko device type before that), its chassis model (read
+# off the hostname) and its role (from the management IP). The tables below say
+# so as data, and plan_commands() turns them into the minimal command list for
+# one device. The parsers take their role and model decisions from here too, and
+# the plan is compared with the commands actually sent in the timing report.
+#
+# Commands that depend on what an output says (bundle summaries when a
+# Port-channel shows up, admin show inventory chassis when the targeted show
+# inventory has no serial) are not planned; they show up as actual > planned.
+
+
+# Management ranges of the access layer. The .0 / .1 addresses in them are
+# terminated and only answer show version.
+access_prefixes = ('172.30.', '172.31.')
+terminated_suffixes = ('.0', '.1')
+
+# Chassis model in the XR hostname -> targeted show inventory; any other XR
+# chassis uses admin show inventory chassis
+chassis_inventory_commands = [
+    ('9904', "show inventory | include 9904"),
+    ('9906', "show inventory | include 9906"),
+    ('9903', "show inventory | include ASR-9903| exclude 3- "),
+]
+default_chassis_inventory_command = "admin show inventory chassis"
+
+# (OS families, roles or None for any role, commands) in the order the parsers
+# send them. None as a family is a show version none of the parsers recognised.
+command_rules = [
+    (("IOS-XR",), ("edge",), ["show platform", "show  nv satellite status brief", "<chassis inventory>", "show ipv4 interface brief"]),
+    (("IOS-XE",), ("access",), ["show isis neighbor", "show ip int brief | include Loopback"]),
+    (("IOS-XE",), ("access", "edge"), ["show ip interface brief"]),
+    (("7600/7300", "IOS", "NX-OS", None), None, ["show ip interface brief"]),
+    (("NX-OS", None), None, ["show inventory"]),
+]
+
+# netmiko device type -> OS family, for planning before show version is in
+family_by_device_type = {
+    "cisco_xr": "IOS-XR",
+    "cisco_xe": "IOS-XE",
+    "cisco_ios": "IOS",
+    "cisco_nxos": "NX-OS",
+}
+
+
+def device_role(ip):
+    if ip.startswith(access_prefixes):
+        return "terminated" if ip.endswith(terminated_suffixes) else "access"
+    return "edge"
+
+
+# (chassis model, show inventory command) for an XR hostname, model None for the default
+def chassis_inventory_command(hostname):
+    for chassis_model, inventory_command in chassis_inventory_commands:
+        if chassis_model in (hostname or ""):
+            return chassis_model, inventory_command
+    return None, default_chassis_inventory_command
+
+
+# commands.txt followed by what the rules add for this device
+def plan_commands(family, hostname, ip, commands):
+    role = device_role(ip)
+    plan = list(commands)
+    for families, roles, rule_commands in command_rules:
+        if family in families and (roles is None or role in roles):
+            for command in rule_commands:
+                if command == "<chassis inventory>":
+                    if not hostname:
+                        continue
+                    command = chassis_inventory_command(hostname)[1]
+                plan.append(command)
+    return list(dict.fromkeys(plan))
@@ -1,850 +1,1037 @@
-import logging
-from netmiko import ConnectHandler, SSHDetect, NetMikoTimeoutException, NetMikoAuthenticationException
-import getpass
-import pandas as pd
-import re
-import time
-from datetime import datetime
-import openpyxl
-import math 
-import configparser
-
-date = datetime.now().strftime("%Y-%m-%d_%H-%M")
-
-# Configure logging
-logging.basicConfig(filename=f'01 MAY Network Inventory Errors_{date}.txt', level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# Prompt for username and password
-user = getpass.getuser()
-print(f"Hello {user.upper()}")
-
-config = configparser.ConfigParser()
-config.read('config.ini')
-username = config.get('credentials', 'username')
-password = config.get('credentials', 'password')
-
-# Predefined interface statuses
-xe_up = "up"
-xr_up = "Up"
-xe_down = "down"
-xr_down = "Down"
-xe_down_down = "administratively"
-xr_down_down = "Shutdown"
-
-
-data = []  # List to store data for each device
-
-
-# Function for interface counting
-def count_interfaces(ssh, device_data):
-    gig_up = gig_down = gig_admin_down = 0
-    ten_gig_up = ten_gig_down = ten_gig_admin_down = 0
-    hundred_gig_up = hundred_gig_down = hundred_gig_admin_down = 0
-    etherport = ""
-    membercount = 1
-    interface_status = ssh.send_command("show ip interface brief", read_timeout=300)
-    interface_lines = interface_status.splitlines()
-
-    for lines in interface_lines:
-        columns = lines.split()
-        if "Giga" in lines and "." not in columns[0] and "/" in columns[0]:
-            if columns[4].lower() == xe_up.lower():
-                gig_up += 1
-            elif columns[4].lower() == xe_down.lower():
-                gig_down += 1
-            elif columns[4].lower() == xe_down_down.lower():
-                gig_admin_down += 1
-
-        elif "Te" in lines and "." not in columns[0]:
-            if columns[4].lower() == xe_up.lower():
-                ten_gig_up += 1
-            elif columns[4].lower() == xe_down.lower():
-                ten_gig_down += 1
-            elif columns[4].lower() == xe_down_down.lower():
-                ten_gig_admin_down += 1
-        
-        elif "Port-channel" in lines:
-            if columns[4].lower() == xe_up.lower():
-                etherport = ssh.send_command(f'show interface {columns[0]} | include Member')
-                print(etherport)
-                etherports = etherport.splitlines()
-                
-                for members in etherports:
-                    member_names = members.split()
-                    member = f"Member {membercount} : {member_names[3]}"
-                    membercount += 1
-                    
-                    print(member)
-                    
-                
-                
-   
-    print("Gig interfaces:")
-    print(f"Gig Up: {gig_up}, Gig Down: {gig_down},  Gig Admin Down: {gig_admin_down}")
-
-    print("10G interfaces:")
-    print(f"TenG Up: {ten_gig_up}, TenG Down: {ten_gig_down},  TenG Admin Down: {ten_gig_admin_down}")
-
-
-    device_data['Gig_up'] = gig_up
-    device_data['Gig_down'] = gig_down
-    device_data['Gig_admin_down'] = gig_admin_down
-
-    device_data['TenG_up'] = ten_gig_up
-    device_data['TenG_down'] = ten_gig_down
-    device_data['TenG_admin_down'] = ten_gig_admin_down
-    
-    device_data['Total 1G Ports'] =  device_data['Gig_up'] + device_data['Gig_down'] + device_data['Gig_admin_down'] 
-    print(f"Total 1G Ports : {device_data['Total 1G Ports']}")
-    
-    device_data['Total 10G Ports'] = device_data['TenG_up'] + device_data['TenG_down'] + device_data['TenG_admin_down']
-    print(f"Total 10G Ports : {device_data['Total 10G Ports']}")
-    
-    if device_data['Total 1G Ports']  == 0:
-       device_data['1G Utilization (%)'] = None
-    else:
-        device_data['1G Utilization (%)'] = device_data['Gig_up'] / device_data['Total 1G Ports']
-        print(f"1G Utilization {device_data['1G Utilization (%)']}")
-        
-    if device_data['Total 10G Ports'] == 0:
-       device_data['10G Utilization (%)'] = None
-    else:
-        device_data['10G Utilization (%)'] = device_data['TenG_up'] / device_data['Total 10G Ports']
-        print(f"10G Utilization {device_data['10G Utilization (%)']}")
-
-
-
-def extract_and_format_platform_info(ssh, device_data):
-
-    getPlatformInfo = ssh.send_command("show platform", read_timeout=300)
-    
-    platformLines = getPlatformInfo.splitlines()
-    
-    
-    for rsp in platformLines:
-        
-        rsp0_match = re.search(r"0/RSP0/CPU0\s+(\S+)", rsp)
-        if rsp0_match:
-            device_data['RSP0'] = rsp0_match.group(1)
-        
-        elif "0/RSP1/CPU0" in rsp:
-            rsp1_match = re.search(r"0/RSP1/CPU0\s+(\S+)", rsp)
-            if rsp1_match:
-                device_data['RSP1'] = rsp1_match.group(1)
-                
-        elif "0/RP0/CPU0" in rsp:
-            rp0_match = re.search(r"0/RP0/CPU0\s+(\S+)", rsp)
-            if rp0_match:
-                device_data['RP0'] = rp0_match.group(1)
-                
-        elif "0/RP1/CPU0" in rsp:
-            rp1_match = re.search(r"0/RP1/CPU0\s+(\S+)", rsp)
-            if rp1_match:
-                device_data['RP1'] = rp1_match.group(1)
-    
-    print(f"RSP0: {device_data['RSP0']}")
-    print(f"RSP1: {device_data['RSP1']}")
-    print(f"RP0: {device_data['RP0']}")
-    print(f"RP1: {device_data['RP1']}")
-   
-    print("Done Extracting RSP Cards")
-    
-    
-    # Identify MOD and MPA cards
-    mod_cards = [line for line in platformLines if 'MOD' in line]
-    mpa_cards = [line for line in platformLines if any(keyword in line for keyword in ['X10GE', 'X1GE', 'FLEX', 'X100GE', 'x10GE']) or 'LC' in line]
-
-    
-    mod_counter = mpa_counter = 1
-    
-    for mod_card_line in mod_cards:
-        mod_card_type_match = re.search(r"(\S+-MOD\S+)", mod_card_line)
-        if mod_card_type_match:
-            mod_card_type = f"MOD CARD0{mod_counter}"
-            device_data[mod_card_type] = mod_card_type_match.group(1)
-            print(f"MOD CARD0{mod_counter}: {device_data[mod_card_type]}")
-            mod_counter +=1
-            
-    
-    for mpa_card_line in mpa_cards:
-        mpa_card_type_match = re.search(r"(?i)(\s\S+\s*(X10GE|X1GE|FLEX|X100GE|LC))", mpa_card_line)
-        if mpa_card_type_match:
-            mpa_card_type = f"MPA CARD0{mpa_counter}"
-            device_data[mpa_card_type] = mpa_card_type_match.group(1)
-            print(f"MPA CARD0{mpa_counter}: {device_data[mpa_card_type]}")
-            mpa_counter += 1
-    
-    print("Done categorizing cards")    
-
-def nv_sat_count(ssh, device_data):
-
-    sat_count = 0
-    conflit = 0
-    
-    nv_satelite = ssh.send_command("show  nv satellite status brief")
-    
-    satlines = nv_satelite.splitlines()
-    
-    for nv in satlines:
-        
-        if "Connected" in nv:
-            sat_count += 1
-            print(sat_count)
-            
-        elif "Discovery Stalled" in nv:
-            conflit += 1
-            print(conflit)
-        
-    
-    device_data['Connected NV_SATs'] = sat_count
-    device_data['Disconnected NV_SATs'] = conflit
-    
-    print(f"Connected NV_SATs: {device_data['Connected NV_SATs']}")
-    print(f"Disconnected NV_SATs: {device_data['Disconnected NV_SATs']}")
-
-        
- 
-def process_device(device, username, password, commands):
-    with open("other commands1.txt", "a") as output_file:
-        try:
-        
-            hostname_pattern = re.compile(r"([\w\d_-]+)#$")
-            pop_match = re.compile(r"(?i)place\s*:\s*(\S.*)", re.IGNORECASE)
-            pop_match2 = re.compile(r"(?i)place\s*:\s*(\S.*)", re.IGNORECASE)
-         
-            logging_in = {
-                    "device_type": "autodetect",  # Use 'autodetect' for automatic detection
-                    "host": device,
-                    "username": username,
-                    "password": password,
-                    "read_timeout_override" : 300,
-                }
-
-            # Use SSHDetect to determine the device type
-            guesser = SSHDetect(**logging_in)
-            device_type = guesser.autodetect()
-
-            # Use the detected device type for connection
-            logging_in["device_type"] = device_type
-
-            with ConnectHandler(**logging_in) as ssh:
-                print(f'Connecting to {device}')
-
-                device_data = {
-                    'IP Address': device,
-                    'Hostname': None,
-                    'Region': None,
-                    'Site Name': None,
-                    'Function' : None,
-                    'Serial Number': None,
-                    'Version' : None,
-                    'Model' : None,
-                    'Gig_up' : 0,
-                    'Gig_down' : 0,
-                    'Gig_admin_down' : 0,
-                    'TenG_up' : 0,
-                    'TenG_down' : 0,
-                    'TenG_admin_down' : 0,
-                    'HunG_up' : 0,
-                    'HunG_down' : 0,
-                    'HunG_admin_down' : 0,
-                    'Total 1G Ports' : 0,
-                    'Total 10G Ports': 0,
-                    'Total 100G Ports' : 0,
-                    '1G Utilization (%)': 0,
-                    '10G Utilization (%)' : 0,
-                    '100G Utilization (%)' : 0,
-                    'Connected NV_SATs' : 0,
-                    'Disconnected NV_SATs' : 0,
-                    'RSP0' : 'Not Present',
-                    'RSP1' : 'Not Present',
-                    'RP0' : 'Not Present',
-                    'RP1' : 'Not Present',
-                   
-                }
-              
-                 # Use the compiled patterns with find_prompt
-                prompt = ssh.find_prompt()
-                
-                # Search for the compiled hostname pattern
-                hostname_match = hostname_pattern.search(prompt)
-                if hostname_match:
-                    device_data['Hostname'] = hostname_match.group(1)
-                    
-                
-                # Search for the compiled POP name pattern
-                pop_name_match = pop_match.search(prompt)
-                pop_name_match2 = pop_match2.search(prompt)
-                
-                if pop_name_match:
-                   device_data['Site Name'] = pop_name_match.group(1)
-                   print(f"POPNAME {device_data['Site Name']}")
-                
-                elif pop_name_match2:
-                   device_data['Site Name'] = pop_name_match2.group(1)
-                   print(f"POPNAME {device_data['Site Name']}")
-
-                # Extract region and fuction based on the hostname
-                if device_data['Hostname']:
-                    first_letter = device_data['Hostname'][0].upper() # Region
-                    last_letter = device_data['Hostname'][-1].lower() # Function
-                    
-                    region_mapping = { 'C': 'Central',
-                                       'M': 'MP',
-                                       'F': 'FS', 
-                                       'G': 'GP',
-                                       'K': 'KZN',
-                                       'N': 'NC',
-                                       'W': 'WC',
-                                       }
-                    function_mapping = {'a': 'APE',
-                                        'b': 'BS',
-                                        'm': 'MPE', 
-                                        't': 'TPE',
-                                        'i': 'IGW',
-                                        's': 'SPE', 
-                                        'r': 'RR',
-                                        'l': 'LLP',
-                                        }
-                    
-                    device_data['Region'] = region_mapping.get(first_letter, 'Unknown')
-                    device_data['Function'] = function_mapping.get(last_letter, 'Unknown')
-                    
-                    if device_data['Hostname'].endswith('P1'):
-                        device_data['Function'] = 'CORE NODE'
-                    
-                    elif device_data['Hostname'].endswith('PE1') or device_data['Hostname'].endswith('PE2') or device_data['Hostname'].endswith('PE02') or device_data['Hostname'].endswith('PE01') or device_data['Hostname'].endswith('PE3') or device_data['Hostname'].endswith('PE03'):
-                        device_data['Function'] = 'APE'
-                    
-                    elif device_data['Hostname'].endswith('P1'):
-                        device_data['Function'] = 'CORE NODE'
-                    
-                    if device_data['Hostname'].startswith('LZA'):
-                    
-                        if "NSB" in device_data['Hostname'] or "MWP" in device_data['Hostname'] or "NSP" in device_data['Hostname'] or "TIS" in device_data['Hostname'] or "PRY" in device_data['Hostname']:
-                            device_data['Region'] = 'GP'
-                        
-                        elif "CPT" in device_data['Hostname'] or "BEL" in device_data['Hostname'] or "DIE" in device_data['Hostname']:
-                            device_data['Region'] = 'WC'
-                            
-                        elif "DUR" in device_data['Hostname'] or "TDB" in device_data['Hostname'] or "PMB" in device_data['Hostname']:
-                            device_data['Region'] = 'KZN'
-                            
-                        elif "BFN" in device_data['Hostname'] or "KIM" in device_data['Hostname']:
-                            device_data['Region'] = 'FS'
-                        
-                        
-                    if device_data['Hostname'].startswith('l'):
-                        print(f"Debug: Hostname: {device_data['Hostname']}")
-                        device_data['Region'] = 'LP'
-                        
-                    if device_data['Hostname'].startswith('e') or 'ecg' in device_data['Hostname'] or device_data['Hostname'].startswith('E'):
-                        device_data['Region'] = 'EC'
-                    
-                    
-                    if "JIDC" in device_data['Hostname'] or "CIDC" in device_data['Hostname']:
-                        device_data['Function'] = "AGG"
-                    
-                    if "JIDC" in device_data['Hostname']:
-                        device_data['Region'] = 'GP'
-                        device_data['Site Name'] = "JHB ADC"
-                        
-                    if "CIDC" in device_data['Hostname']:
-                        device_data['Region'] = 'WC'
-                        device_data['Site Name'] = "CPT ADC"
-                    
-                    if "SR1" in device_data['Hostname']:
-                        device_data['Function'] = "BNG"
-                    
-                print(f"Hostname: {device_data['Hostname']}")
-                print(f"Region: {device_data['Region']}")
-                print(f"Node Function: {device_data['Function']}")
-              
-                
-                for cmd in commands:
-                    print(f"Executing command: {cmd}")
-                    cmd_output = ssh.send_command(cmd, read_timeout=300)
-                    #print(f"Output: {cmd_output}")
-                    
-                     # Extract additional information based on the command
-                    if "show version" in cmd:
-                        # Extract version
-                        version_match = re.search(r"Cisco IOS \s*(\S+) Software, Version (.+?)(\[|\n)", cmd_output)
-                        
-                        if version_match:
-                            device_data['Version'] = version_match.group(2)
-                            print(f"Version: {device_data['Version']}")
-                            
-                            if version_match.group(1) == 'XR':
-                                
-                                if device_data['IP Address'].startswith('172.30.') or device_data['IP Address'].startswith('172.31.'):
-                                    if device_data['IP Address'].endswith('.0') or device_data['IP Address'].endswith('.1'):
-                                        print("TERMINATED")
-                                        break
-                                
-                                else:
-                                
-                                    #execute_show_run_hostname(ssh, device_data) #Node function, Hostname and Region
-                                    extract_and_format_platform_info(ssh, device_data) #Line Card Count
-                                    nv_sat_count(ssh, device_data) #Counting SAT Panels
-                                    
-                                    if device_data['Hostname']:
-                                    
-                                        if '9904' in device_data['Hostname'] or '9906' in device_data['Hostname'] or '9903' in device_data['Hostname']:
-                                            if '9904' in device_data['Hostname']:
-                                            
-                                                print("DATA FOR 9904")
-                                                inventory = ssh.send_command("show inventory | include 9904", read_timeout=300)
-                                                
-                                                serial_match = re.search(r"SN: (\S+)[\n\r]", inventory)  # Standard pattern
-                                                if not serial_match:
-                                                    serial_match = re.search(r"SN:\s*(\S+)", inventory)  # Alternative pattern 1
-                                                if not serial_match:
-                                                    serial_match = re.search(r"PID: .+?SN: (\S+)[\n\r]", inventory)  # Alternative pattern 2
-                                                if not serial_match:
-                                                    serial_match = re.search(r"PID: .+?SN:\s*(\S+)", inventory)  # Alternative pattern 3
-
-                                                if serial_match:
-                                                    device_data['Serial Number'] = serial_match.group(1)
-                                                    
-                                                model_match = re.search(r"PID: \s*(\S+)", inventory)
-                                                if model_match:
-                                                    device_data['Model'] = model_match.group(1).rstrip(",")
-                                                    
-                                                if not serial_match:
-                                                    print("Executing command: admin show inventory chassis")
-                                                    serial_cmd_output = ssh.send_command("admin show inventory chassis", read_timeout=300)
-                                                    print(f"Output: {serial_cmd_output}")
-
-                                                    # Updated serial number extraction to handle variations in format
-                                                    serial_match = re.search(r"SN: (\S+)[\n\r]", serial_cmd_output)  # Standard pattern
-                                                    if not serial_match:
-                                                        serial_match = re.search(r"SN:\s*(\S+)", serial_cmd_output)  # Alternative pattern 1
-                                                    if not serial_match:
-                                                        serial_match = re.search(r"PID: .+?SN: (\S+)[\n\r]", serial_cmd_output)  # Alternative pattern 2
-                                                    if not serial_match:
-                                                        serial_match = re.search(r"PID: .+?SN:\s*(\S+)", serial_cmd_output)  # Alternative pattern 3
-
-                                                    if serial_match:
-                                                        device_data['Serial Number'] = serial_match.group(1)
-                                                        
-                                                    model_match = re.search(r"PID: \s*(\S+)", serial_cmd_output)
-                                                    if model_match:
-                                                        device_data['Model'] = model_match.group(1).rstrip(",")
-                                            
-                                            elif '9906' in device_data['Hostname']:
-                                                print("DATA FOR 9906")
-                                                inventory = ssh.send_command("show inventory | include 9906",read_timeout=300)
-                                               
-                                                serial_match = re.search(r"SN: (\S+)[\n\r]", inventory)  # Standard pattern
-                                                if not serial_match:
-                                                    serial_match = re.search(r"SN:\s*(\S+)", inventory)  # Alternative pattern 1
-                                                if not serial_match:
-                                                    serial_match = re.search(r"PID: .+?SN: (\S+)[\n\r]", inventory)  # Alternative pattern 2
-                                                if not serial_match:
-                                                    serial_match = re.search(r"PID: .+?SN:\s*(\S+)", inventory)  # Alternative pattern 3
-
-                                                if serial_match:
-                                                    device_data['Serial Number'] = serial_match.group(1)
-                                                    
-                                                model_match = re.search(r"PID: \s*(\S+)", inventory)
-                                                if model_match:
-                                                    device_data['Model'] = model_match.group(1).rstrip(",")
-                                                    
-                                                if not serial_match:
-                                                    print("Executing command: admin show inventory chassis")
-                                                    serial_cmd_output = ssh.send_command("admin show inventory chassis",read_timeout=300)
-                                                    print(f"Output: {serial_cmd_output}")
-
-                                                    # Updated serial number extraction to handle variations in format
-                                                    serial_match = re.search(r"SN: (\S+)[\n\r]", serial_cmd_output)  # Standard pattern
-                                                    if not serial_match:
-                                                        serial_match = re.search(r"SN:\s*(\S+)", serial_cmd_output)  # Alternative pattern 1
-                                                    if not serial_match:
-                                                        serial_match = re.search(r"PID: .+?SN: (\S+)[\n\r]", serial_cmd_output)  # Alternative pattern 2
-                                                    if not serial_match:
-                                                        serial_match = re.search(r"PID: .+?SN:\s*(\S+)", serial_cmd_output)  # Alternative pattern 3
-
-                                                    if serial_match:
-                                                        device_data['Serial Number'] = serial_match.group(1)
-                                                        
-                                                    model_match = re.search(r"PID: \s*(\S+)", serial_cmd_output)
-                                                    if model_match:
-                                                        device_data['Model'] = model_match.group(1).rstrip(",")
-                                                    
-                                                    
-                                             
-                                                print(f"Serial Number: {device_data['Serial Number']}")
-                                                print(f"Model: {device_data['Model']}")
-                                          
-                                            
-                                            elif '9903' in device_data['Hostname']:
-                                                print("DATA FOR 9903")
-                                                inventory = ssh.send_command("show inventory | include ASR-9903| exclude 3- ",read_timeout=300)
-                                               
-                                                serial_match = re.search(r"SN: (\S+)[\n\r]", inventory)  # Standard pattern
-                                                if not serial_match:
-                                                    serial_match = re.search(r"SN:\s*(\S+)", inventory)  # Alternative pattern 1
-                                                if not serial_match:
-                                                    serial_match = re.search(r"PID: .+?SN: (\S+)[\n\r]", inventory)  # Alternative pattern 2
-                                                if not serial_match:
-                                                    serial_match = re.search(r"PID: .+?SN:\s*(\S+)", inventory)  # Alternative pattern 3
-
-                                                if serial_match:
-                                                    device_data['Serial Number'] = serial_match.group(1)
-                                                    
-                                                model_match = re.search(r"PID: \s*(\S+)", inventory)
-                                                if model_match:
-                                                    device_data['Model'] = model_match.group(1).rstrip(",")
-                                                    
-                                                if not serial_match:
-                                                    print("Executing command: admin show inventory chassis")
-                                                    serial_cmd_output = ssh.send_command("admin show inventory chassis",read_timeout=300)
-                                                    print(f"Output: {serial_cmd_output}")
-
-                                                    # Updated serial number extraction to handle variations in format
-                                                    serial_match = re.search(r"SN: (\S+)[\n\r]", serial_cmd_output)  # Standard pattern
-                                                    if not serial_match:
-                                                        serial_match = re.search(r"SN:\s*(\S+)", serial_cmd_output)  # Alternative pattern 1
-                                                    if not serial_match:
-                                                        serial_match = re.search(r"PID: .+?SN: (\S+)[\n\r]", serial_cmd_output)  # Alternative pattern 2
-                                                    if not serial_match:
-                                                        serial_match = re.search(r"PID: .+?SN:\s*(\S+)", serial_cmd_output)  # Alternative pattern 3
-
-                                                    if serial_match:
-                                                        device_data['Serial Number'] = serial_match.group(1)
-                                                        
-                                                    model_match = re.search(r"PID: \s*(\S+)", serial_cmd_output)
-                                                    if model_match:
-                                                        device_data['Model'] = model_match.group(1).rstrip(",")
-                                                    
-                                                    
-                                             
-                                                print(f"Serial Number: {device_data['Serial Number']}")
-                                                print(f"Model: {device_data['Model']}")
-                                            
-                                            
-                                            
-                                        elif '9904' not in device_data['Hostname'] or '9906' not in device_data['Hostname']:
-                                            print("DEBUGGING")
-                                            # For XR devices, retrieve serial number using "admin show inventory chassis"
-                                            print("Executing command: admin show inventory chassis")
-                                            serial_cmd_output = ssh.send_command("admin show inventory chassis",read_timeout=300)
-                                            print(f"Output: {serial_cmd_output}")
-
-                                            # Updated serial number extraction to handle variations in format
-                                            serial_match = re.search(r"SN: (\S+)[\n\r]", serial_cmd_output)  # Standard pattern
-                                            if not serial_match:
-                                                serial_match = re.search(r"SN:\s*(\S+)", serial_cmd_output)  # Alternative pattern 1
-                                            if not serial_match:
-                                                serial_match = re.search(r"PID: .+?SN: (\S+)[\n\r]", serial_cmd_output)  # Alternative pattern 2
-                                            if not serial_match:
-                                                serial_match = re.search(r"PID: .+?SN:\s*(\S+)", serial_cmd_output)  # Alternative pattern 3
-
-                                            if serial_match:
-                                                device_data['Serial Number'] = serial_match.group(1)
-                                                
-                                            model_match = re.search(r"PID: \s*(\S+)", serial_cmd_output)
-                                            if model_match:
-                                                device_data['Model'] = model_match.group(1).rstrip(",")
-                                         
-                                            print(f"Serial Number: {device_data['Serial Number']}")
-                                            print(f"Model: {device_data['Model']}")
-                                            
-                              
-                                    interface_status = ssh.send_command("show ipv4 interface brief",read_timeout=300)
-                                    gig_up = gig_down = gig_admin_down = 0
-                                    ten_gig_up = ten_gig_down = ten_gig_admin_down = 0
-                                    hundred_gig_up = hundred_gig_down = hundred_gig_admin_down = 0
-                                    
-                                    interface_lines = interface_status.splitlines()
-                                    
-                                    for lines in interface_lines:
-                                        columns = lines.split()
-                                        if "GigabitEthernet" in lines and "." not in columns[0]:
-                                            if columns[2] == xr_up:
-                                                gig_up += 1
-                                            elif columns[2] == xr_down:
-                                                gig_down += 1
-                                            elif columns[2] == xr_down_down:
-                                                gig_admin_down += 1
-                                                
-                                        elif "TenGigE" in lines and "." not in columns[0] and "nVFabric" not in columns[0]:
-                                            if columns[2] == xr_up:
-                                                ten_gig_up+= 1
-                                            elif columns[2] == xr_down:
-                                                ten_gig_down += 1
-                                            elif columns[2] == xr_down_down:
-                                                ten_gig_admin_down += 1
-                                                
-                                        elif "Hun" in lines and "." not in columns[0]:
-                                            if columns[2] == xr_up:
-                                                hundred_gig_up += 1
-                                            elif columns[2] == xr_down:
-                                                hundred_gig_down += 1
-                                            elif columns[2] == xr_down_down:
-                                                hundred_gig_admin_down += 1
-                                    
-                            
-                            
-                                    print("Gig interfaces:")
-                                    print(f"Gig Up: {gig_up}, Gig Down: {gig_down},  Gig Admin Down: {gig_admin_down}")
-                                    
-                                    print("10G interfaces:")
-                                    print(f"TenG Up: {ten_gig_up}, TenG Down: {ten_gig_down},  TenG Admin Down: {ten_gig_admin_down}")
-                            
-                                    print("100G interfaces:")
-                                    print(f"100G Up: {hundred_gig_up}, 100G Down: {hundred_gig_down},  100G Admin Down: {hundred_gig_admin_down}")
-                            
-                            
-                                    device_data['Gig_up'] = gig_up
-                                    device_data['Gig_down'] = gig_down
-                                    device_data['Gig_admin_down'] = gig_admin_down
-                                    
-                                    device_data['TenG_up'] = ten_gig_up
-                                    device_data['TenG_down'] = ten_gig_down
-                                    device_data['TenG_admin_down'] = ten_gig_admin_down
-                                    
-                                    device_data['HunG_up'] = hundred_gig_up
-                                    device_data['HunG_down'] = hundred_gig_down
-                                    device_data['HunG_admin_down'] = hundred_gig_admin_down
-                                    
-                                    device_data['Total 1G Ports'] =  device_data['Gig_up'] + device_data['Gig_down'] + device_data['Gig_admin_down'] 
-                                    print(f"Total 1G Ports : {device_data['Total 1G Ports']}")
-                                    
-                                    device_data['Total 10G Ports'] = device_data['TenG_up'] + device_data['TenG_down'] + device_data['TenG_admin_down']
-                                    print(f"Total 10G Ports : {device_data['Total 10G Ports']}")
-                                    
-                                    device_data['Total 100G Ports'] = device_data['HunG_up'] + device_data['HunG_down'] + device_data['HunG_admin_down']
-                                    print(f"Total 100G Ports : {device_data['Total 100G Ports']}")
-                                    
-                                    
-                                    if device_data['Total 1G Ports']  == 0:
-                                       device_data['1G Utilization (%)'] = 0
-                                    else:
-                                        device_data['1G Utilization (%)'] = device_data['Gig_up'] / device_data['Total 1G Ports']
-                                        print(f"1G Utilization {device_data['1G Utilization (%)']}")
-                                        
-                                    if device_data['Total 10G Ports'] == 0:
-                                       device_data['10G Utilization (%)'] = 0
-                                    else:
-                                        device_data['10G Utilization (%)'] = device_data['TenG_up'] / device_data['Total 10G Ports']
-                                        print(f"10G Utilization {device_data['10G Utilization (%)']}")
-                                        
-                                    if device_data['Total 100G Ports'] == 0:
-                                       device_data['100G Utilization (%)'] = 0
-                                       
-                                    else:
-                                        device_data['100G Utilization (%)'] = device_data['HunG_up'] / device_data['Total 100G Ports']
-                                        print(f"100G Utilization {device_data['100G Utilization (%)']}")
-                                  
-                                        
-                            elif version_match.group(1) == 'XE':
-                            
-                                if device_data['IP Address'].startswith('172.30.') or device_data['IP Address'].startswith('172.31.'):
-                                    if device_data['IP Address'].endswith('.0') or device_data['IP Address'].endswith('.1'):
-                                        print("TERMINATE")
-                                        break
-                                    isis = ssh.send_command('show isis neighbor')
-                                    loopback = ssh.send_command('show ip int brief | include Loopback', read_timeout=300)
-                                    
-                                    if "System Id" in isis and 'Loopback' in loopback:
-                                        print(f"Skipping device {device_data['IP Address']} as it has neighbors in ISIS.")
-                                        print('*******************************')
-                                        break
-                                        
-                                    else:    
-                                        count_interfaces(ssh, device_data)
-                                        device_data['Function'] = "AS"
-                                        
-                                        serial_match = re.search(r"Processor board ID (\S+)", cmd_output)
-                                        if serial_match:
-                                            device_data['Serial Number'] = serial_match.group(1)
-                                        
-                                        model_match = re.search(r"cisco (.+?) processor", cmd_output)
-                                        if model_match:
-                                            device_data['Model'] =re.sub(r"\s*\(.*", "", model_match.group(1))
-                                        
-                                        print(f"Function: {device_data['Function']}")
-                                        print(f"SN: {device_data['Serial Number']}")
-                                        
-                                        print(f"Model: {device_data['Model']}")
-                                        
-                                else:
-                                    count_interfaces(ssh, device_data)
-                                    device_data['Function'] = "APE"
-                                    
-                                    serial_match = re.search(r"Processor board ID (\S+)", cmd_output)
-                                    if serial_match:
-                                        device_data['Serial Number'] = serial_match.group(1)
-                                    
-                                    model_match = re.search(r"cisco (.+?) processor", cmd_output)
-                                    if model_match:
-                                        device_data['Model'] =re.sub(r"\s*\(.*", "", model_match.group(1))
-                                    
-                                    print(f"Function: {device_data['Function']}")
-                                    print(f"SN: {device_data['Serial Number']}")
-                                    
-                                    print(f"Model: {device_data['Model']}")
-                             
-                    
-                        elif 'c7600rsp72043_rp' in cmd_output or 'c7600s72033_rp' in cmd_output or '7300 Software' in cmd_output:
-                            # Process for c7600rsp72043_rp and c7600s72033_rp
-                            
-                            
-                            count_interfaces(ssh, device_data) #Interface Function
-                            
-                            version_match_c7600rsp = re.search(r"Version (.+?),", cmd_output)
-                            if version_match_c7600rsp:
-                                device_data['Version'] = version_match_c7600rsp.group(1)
-                                
-                            serial_match = re.search(r"Processor board ID (\S+)", cmd_output)
-                            if serial_match:
-                                device_data['Serial Number'] = serial_match.group(1)
-                                
-                            model_match = re.search(r"Cisco (.+?) processor", cmd_output)
-                            if not model_match:
-                                model_match = re.search(r"cisco (.+?) processor", cmd_output)
-                            
-                            if model_match:
-                                device_data['Model'] = re.sub(r"\s*\(.*", "", model_match.group(1))
-                                
-                            if '7300 Software' in cmd_output:
-                            
-                                gig_up = gig_down = gig_admin_down = 0
-                                ten_gig_up = ten_gig_down = ten_gig_admin_down = 0
-    
-                                
-                                portcount = ssh.send_command("show ip interface brief")
-                                
-                                portlines = portcount.splitlines()
-                                
-                                for interface in portlines:
-                                    portcolumn = interface.split()
-                                    if 'Giga' in portcolumn[0] and "." not in portcolumn[0]:
-                                        
-                                        if portcolumn[4].lower() == xe_up.lower():
-                                            gig_up += 1
-                                           
-                                        elif portcolumn[4].lower() == xe_down.lower():
-                                            gig_down += 1
-                                        elif portcolumn[4].lower() == xe_down_down.lower():
-                                            gig_admin_down += 1
-                                
-                                device_data['Gig_up'] = gig_up
-                                device_data['Gig_down'] = gig_down
-                                device_data['Gig_admin_down'] = gig_admin_down
-                                    
-                            print(f"SN: {device_data['Serial Number']}")
-                            print(f"Version: {device_data['Version']}")
-                            print(f"Model: {device_data['Model']}")
-                        
-                        else:
-                            print("WE ARE HERE NOW")
-                            count_interfaces(ssh, device_data) #interface Function
-                           
-                            
-                            # Define a mapping between keywords and corresponding regex patterns
-                            device_mapping = {
-                                
-                                "Nexus" : (r"kickstart: version\s*(\S+)", r"Processor Board ID (\S+)", r"(?i)cisco\s+(\S+)\s+(?:Chassis\s+)?(?:\(\".*\"\)|supervisor|Slot)"),
-                                "Cisco IOS-XE software" : (r"Version (.+?),", r"Processor board ID (\S+)", r"(?i)cisco (.+?) with"),
-                                "Cisco IOS Software" : (r"Version (.+?),", r"Processor board ID (\S+)", r"(?i)cisco (.+?) with"),
-                                "Cisco Internetwork" : (r"Version (.+?),", r"Processor board ID (\S+)", r"cisco\s+(\d+/\S+)"),
-                            }   
-                       
-                            for keyword, (version_pattern, serial_pattern, model_pattern) in device_mapping.items():
-                                if keyword in cmd_output:
-                                    # Extract version
-                                    version_match = re.search(version_pattern, cmd_output)
-                                    if version_match:
-                                        device_data['Version'] = version_match.group(1)
-
-                                    # Extract serial number
-                                    serial_match = re.search(serial_pattern, cmd_output)
-                                    if serial_match:
-                                        device_data['Serial Number'] = serial_match.group(1)
-                                        
-                                    model_match = re.search(model_pattern, cmd_output)
-                                    if model_match:
-                                        device_data['Model'] = re.sub(r"\s*\(.*", "", model_match.group(1))
-                                        if "3400" in device_data['Model']:
-                                            if device_data['Hostname'][-1].lower() == "a":
-                                                device_data['Function'] = "AS"
-                                            elif device_data['Hostname'][-1].lower() == "b":
-                                                device_data['Function'] = "BS"
-                                                
-                                elif keyword not in cmd_output:
-                                    serial = ssh.send_command('show inventory',read_timeout=300)
-                                    serial_cmd_output = re.search(r"Hw Serial#: (\S+)", serial)
-                                    if serial_cmd_output:
-                                        device_data['Serial Number'] = serial_cmd_output.group(1)
-                                        
-                            print(f"SN: {device_data['Serial Number']}")
-                            print(f"Version: {device_data['Version']}")
-                            print(f"Model: {device_data['Model']}")
-                            
-                               
-                    else:
-                        print("EXTRA COMMANDS")
-                        # Extract everything after the word "show" in the command to use as the column name
-                        command_column_name = cmd.split("show", 1)[1].strip()
-                        # Replace spaces with underscores in the column name
-                        command_column_name = command_column_name.replace(" ", "_")
-                        
-                        # If the column name doesn't exist in the device_data dictionary, create it
-                        #if command_column_name not in device_data:
-                            #device_data[command_column_name] = []
-
-                        # Store the output of the command in the device_data dictionary
-                        #device_data[command_column_name].append(cmd_output)
-                        #print(f"Output of {cmd}: {cmd_output}")
-                        
-                        output_file.write(f"IP Address: {device}\n")
-                        output_file.write(f"Command: {cmd}\n")
-                        output_file.write(f"{cmd_output}\n\n")
-                        
-                        
-        
-                # Append the data to the list
-                data.append(device_data)
-                print(f'Closing connection to {device}')
-                print('*******************************')
-             
-
-        #Error Handling    
-        except NetMikoTimeoutException:
-            logging.error(f'Timeout while connecting to {device}')
-            print(f'Timeout while connecting to {device}')
-            
-        except NetMikoAuthenticationException:
-            logging.error(f'Authentication failure for {device}')
-            print(f"Wrong Password for {device}")
-            
-        except Exception as e:
-            logging.error(f'An error occurred while connecting to {device}: {str(e)}')
-            print(f'An error occurred while connecting to {device}: {str(e)}')    
-            
-
-# Reading devices and commands from files
-with open('autodevices2.txt') as router:
-    ips = router.read().splitlines()
-
-with open('commands.txt') as command:
-    commands = command.read().splitlines()
-
-# Processing each device
-for device in ips:
-    
-    with open("Interface Descriptions.txt", "w") as output_file:
-        process_device(device, username, password, commands)
-        
-# Create a DataFrame from the collected data
-df = pd.DataFrame(data)
-
-# Write the DataFrame to an Excel file (without header)
-excel_file = f"01 MAY Network Inventory.xlsx"
-df.to_excel(excel_file, index=False)
-
-print(f'Data has been saved to {excel_file}')
-
+import logging
+import getpass
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+import math 
+import configparser
+import argparse
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from device_cache import DeviceTypeCache
+from checkpoint import InventoryCheckpoint
+from inventory_writer import open_inventory_writer
+from inventory_store import InventoryStore, export_run
+from raw_store import CaptureSession, CommandNeeded, RawOutputStore, RecordedSession
+from interface_tally import apply_interface_tally, tally_interfaces
+from timing import DeviceTiming, TimedSession, TimingRecorder
+from scheduler import DeviceScheduler, Retry
+from retry_policy import FailureManifest, RetryPolicy, classify_failure
+from prescan import device_entries, entry_problem, load_devices, prescan
+from inventory_logging import device_logging, release_records, set_device_context, setup_logging
+from adaptive_timeouts import AdaptiveSession, AdaptiveTimeouts
+from command_batch import BatchedSession, send_batch
+from hostname_classifier import load_classifier
+from device_record import DeviceRecord, device_data_template
+from delta_probe import boot_time, change_reason, time_format
+from command_planner import chassis_inventory_command, default_chassis_inventory_command, device_role, family_by_device_type, plan_commands
+from parser_registry import (hostname_pattern, ios_version_pattern, nexus_inventory_serial_pattern, parse_bundle_summary,
+                             parse_chassis_inventory, parse_platform, parse_show_version, show_version_keywords)
+
+# Credentials are only read when a sweep actually starts, so the parsers can be
+# imported by the other collection backends without a config.ini present
+def load_credentials(path='config.ini'):
+    config = configparser.ConfigParser()
+    config.read(path)
+    return config.get('credentials', 'username'), config.get('credentials', 'password')
+
+pop_name_pattern = re.compile(r"(?i)place\s*:\s*(\S.*)")
+
+# --workers when not given: an OS thread per device is costly, while one event
+# loop multiplexes hundreds of sessions
+default_workers = {"threads": 1, "asyncio": 500}
+
+output_lock = threading.Lock()  # Serialises writes to the shared output files between workers
+extra_output_path = "other commands1.txt"  # collect writes each run window to its own file
+
+
+# Drops the SSH session of a device once its time budget is spent, so one hung
+# read_timeout cannot hold a worker (and the whole sweep) forever
+class DeviceWatchdog:
+    def __init__(self, device, budget):
+        self.device = device
+        self.budget = budget
+        self.connection = None
+        self.expired = False
+        self.lock = threading.Lock()
+        self.timer = None
+        if budget:
+            self.timer = threading.Timer(budget, self.expire)
+            self.timer.daemon = True
+
+    def start(self):
+        if self.timer:
+            self.timer.start()
+
+    def cancel(self):
+        if self.timer:
+            self.timer.cancel()
+
+    def watch(self, connection):
+        with self.lock:
+            self.connection = connection
+            expired = self.expired
+        if expired:
+            self.drop(connection)
+
+    def expire(self):
+        with self.lock:
+            self.expired = True
+            connection = self.connection
+        logging.error(f'Time budget of {self.budget}s exceeded for {self.device}, dropping the session')
+        if connection is not None:
+            self.drop(connection)
+
+    def drop(self, connection):
+        try:
+            connection.disconnect()
+        except Exception:
+            pass
+
+
+# Function for interface counting
+def count_interfaces(ssh, device_data):
+    interface_status = ssh.send_command("show ip interface brief")
+
+    apply_interface_tally(device_data, tally_interfaces(interface_status, "xe"))
+    log_interface_tally(device_data)
+
+    if "Port-channel" in interface_status:
+        collect_bundle_members(ssh, device_data)
+
+
+# Members of every port-channel that is in use, from one bulk summary command
+# instead of a show interface per port-channel
+def collect_bundle_members(ssh, device_data):
+    if device_data['OS Family'] == "NX-OS":
+        summary = ssh.send_command("show port-channel summary")
+    else:
+        summary = ssh.send_command("show etherchannel summary")
+
+    bundles = parse_bundle_summary(summary)
+    members = []
+    for port_channel, bundle in bundles.items():
+        if 'U' in bundle['flags']:
+            members.append(f"{port_channel}: {' '.join(bundle['members'])}")
+
+    device_data['Bundle Members'] = "; ".join(members) or None
+    logging.debug(f"{len(members)} port-channels in use", extra={"fields": {"bundles": members}})
+
+
+# Detail log of the interface counters, one record with all of them
+def log_interface_tally(device_data):
+    counters = {key: device_data[key] for key in device_data_template if key.endswith(('_up', '_down', 'Ports', '(%)'))}
+    ports = ", ".join(f"{label} {device_data[f'Total {label} Ports']}" for label in ('1G', '10G', '100G', '400G'))
+    logging.debug(f"Interface ports: {ports}", extra={"fields": counters})
+
+
+
+def extract_and_format_platform_info(ssh, device_data):
+
+    getPlatformInfo = ssh.send_command("show platform")
+    
+    slots, mod_cards, mpa_cards = parse_platform(getPlatformInfo)
+    device_data.update(slots)
+    
+    # Identify MOD and MPA cards
+    for mod_counter, mod_card in enumerate(mod_cards, 1):
+        mod_card_type = f"MOD CARD0{mod_counter}"
+        device_data[mod_card_type] = mod_card
+    
+    for mpa_counter, mpa_card in enumerate(mpa_cards, 1):
+        mpa_card_type = f"MPA CARD0{mpa_counter}"
+        device_data[mpa_card_type] = mpa_card
+    
+    logging.debug(f"Platform: {len(slots)} RSP/RP, {len(mod_cards)} MOD and {len(mpa_cards)} MPA cards",
+                  extra={"fields": {"slots": slots, "mod_cards": mod_cards, "mpa_cards": mpa_cards}})
+
+
+# Copies chassis serial and model from show inventory style output into
+# device_data, returns whether a serial number was found
+def update_chassis_info(device_data, inventory):
+    chassis = parse_chassis_inventory(inventory)
+    if 'Serial Number' in chassis:
+        device_data['Serial Number'] = chassis['Serial Number']
+    if 'Model' in chassis:
+        device_data['Model'] = chassis['Model']
+    return 'Serial Number' in chassis
+
+
+# Serial and model of an XR chassis: the hostname picks a targeted show inventory
+# for the ASR 990x boxes, anything else (or no serial in it) uses admin show inventory chassis
+def collect_xr_chassis_info(ssh, device_data):
+    chassis_model, inventory_command = chassis_inventory_command(device_data['Hostname'])
+    if chassis_model:
+        inventory = ssh.send_command(inventory_command)
+        if update_chassis_info(device_data, inventory):
+            inventory_command = None
+        else:
+            inventory_command = default_chassis_inventory_command
+
+    if inventory_command:
+        # For XR devices, retrieve serial number using "admin show inventory chassis"
+        serial_cmd_output = ssh.send_command(inventory_command)
+        update_chassis_info(device_data, serial_cmd_output)
+
+    logging.debug(f"Chassis {device_data['Model']}, serial {device_data['Serial Number']}", extra={"fields": {"chassis_model": chassis_model}})
+
+
+# Version, serial and model from show version, using the rules of one OS family
+def update_version_info(device_data, family, show_version):
+    device_data.update(parse_show_version(family, show_version))
+
+
+def nv_sat_count(ssh, device_data):
+
+    sat_count = 0
+    conflit = 0
+    
+    nv_satelite = ssh.send_command("show  nv satellite status brief")
+    
+    satlines = nv_satelite.splitlines()
+    
+    for nv in satlines:
+        
+        if "Connected" in nv:
+            sat_count += 1
+            
+        elif "Discovery Stalled" in nv:
+            conflit += 1
+        
+    
+    device_data['Connected NV_SATs'] = sat_count
+    device_data['Disconnected NV_SATs'] = conflit
+    
+    logging.debug(f"NV satellites: {sat_count} connected, {conflit} disconnected")
+
+        
+ 
+# Broad OS family from show version output, remembered in the device type cache
+def detect_os_family(show_version):
+    if "Cisco IOS XR Software" in show_version:
+        return "IOS-XR"
+    if 'c7600rsp72043_rp' in show_version or 'c7600s72033_rp' in show_version or '7300 Software' in show_version:
+        return "7600/7300"
+    if "Cisco IOS XE Software" in show_version or "Cisco IOS-XE software" in show_version:
+        return "IOS-XE"
+    if "Nexus" in show_version or "NX-OS" in show_version:
+        return "NX-OS"
+    if "Cisco IOS Software" in show_version or "Cisco Internetwork" in show_version:
+        return "IOS"
+    return None
+
+
+# Parses one device over an open session. ssh can be a netmiko connection or
+# anything else with find_prompt() and send_command(), which is what lets the
+# asyncio backend reuse the same parsing.
+def collect_device_data(ssh, device, commands, extra_output):
+    device_data = dict(device_data_template)
+    device_data['IP Address'] = device
+    device_data['Polled At'] = datetime.now().strftime(time_format)
+  
+     # Use the compiled patterns with find_prompt
+    prompt = ssh.find_prompt()
+    
+    # Search for the compiled hostname pattern
+    hostname_match = hostname_pattern.search(prompt)
+    if hostname_match:
+        device_data['Hostname'] = hostname_match.group(1)
+        
+    
+    # Search for the compiled POP name pattern
+    pop_name_match = pop_name_pattern.search(prompt)
+    
+    if pop_name_match:
+       device_data['Site Name'] = pop_name_match.group(1)
+
+    # Region, function and the ADC site names come from the rules in hostname_rules.ini
+    if device_data['Hostname']:
+        device_data.update(load_classifier().classify(device_data['Hostname']))
+
+    set_device_context(hostname=device_data['Hostname'])
+    logging.debug(f"Region {device_data['Region']}, function {device_data['Function']}, site {device_data['Site Name']}")
+  
+    
+    for cmd in commands:
+        logging.debug(f"Executing command: {cmd}")
+        cmd_output = ssh.send_command(cmd)
+        #print(f"Output: {cmd_output}")
+        
+         # Extract additional information based on the command
+        if "show version" in cmd:
+            device_data['OS Family'] = detect_os_family(cmd_output)
+            device_data['Boot Time'] = boot_time(cmd_output)
+            # Extract version
+            version_match = ios_version_pattern.search(cmd_output)
+            
+            if version_match:
+                device_data['Version'] = version_match.group(2)
+                
+                if version_match.group(1) == 'XR':
+                    role = device_role(device_data['IP Address'])
+                    if role == "terminated":
+                        logging.debug("Terminated IOS XR device, show version only")
+                        break
+                    
+                    elif role == "edge":
+                    
+                        #execute_show_run_hostname(ssh, device_data) #Node function, Hostname and Region
+                        extract_and_format_platform_info(ssh, device_data) #Line Card Count
+                        nv_sat_count(ssh, device_data) #Counting SAT Panels
+                        
+                        if device_data['Hostname']:
+                            collect_xr_chassis_info(ssh, device_data)
+                                
+                  
+                        interface_status = ssh.send_command("show ipv4 interface brief")
+                        apply_interface_tally(device_data, tally_interfaces(interface_status, "xr"), empty_utilization=0)
+                        log_interface_tally(device_data)
+                            
+                elif version_match.group(1) == 'XE':
+                    role = device_role(device_data['IP Address'])
+                    if role == "terminated":
+                        logging.debug("Terminated IOS XE device, show version only")
+                        break
+
+                    if role == "access":
+                        isis = ssh.send_command('show isis neighbor')
+                        loopback = ssh.send_command('show ip int brief | include Loopback')
+                        
+                        if "System Id" in isis and 'Loopback' in loopback:
+                            logging.info(f"Skipping device {device_data['IP Address']} as it has neighbors in ISIS.")
+                            break
+                            
+                        else:    
+                            count_interfaces(ssh, device_data)
+                            device_data['Function'] = "AS"
+                            
+                            update_version_info(device_data, "IOS-XE", cmd_output)
+                            
+                    else:
+                        count_interfaces(ssh, device_data)
+                        device_data['Function'] = "APE"
+                        
+                        update_version_info(device_data, "IOS-XE", cmd_output)
+                 
+        
+            elif 'c7600rsp72043_rp' in cmd_output or 'c7600s72033_rp' in cmd_output or '7300 Software' in cmd_output:
+                # Process for c7600rsp72043_rp and c7600s72033_rp
+                
+                
+                count_interfaces(ssh, device_data) #Interface Function
+                
+                update_version_info(device_data, "7600/7300", cmd_output)
+            
+            else:
+                count_interfaces(ssh, device_data) #interface Function
+               
+                
+                for keyword, family in show_version_keywords:
+                    if keyword in cmd_output:
+                        fields = parse_show_version(family, cmd_output)
+                        device_data.update(fields)
+                        if "3400" in fields.get('Model', ''):
+                            if device_data['Hostname'][-1].lower() == "a":
+                                device_data['Function'] = "AS"
+                            elif device_data['Hostname'][-1].lower() == "b":
+                                device_data['Function'] = "BS"
+
+                # Only the NX-OS inventory carries the Hw Serial#, and it is sent once
+                if device_data['OS Family'] in ("NX-OS", None):
+                    serial = ssh.send_command('show inventory')
+                    serial_cmd_output = nexus_inventory_serial_pattern.search(serial)
+                    if serial_cmd_output:
+                        device_data['Serial Number'] = serial_cmd_output.group(1)
+                
+                   
+        else:
+            # Extract everything after the word "show" in the command to use as the column name
+            command_column_name = cmd.split("show", 1)[1].strip()
+            # Replace spaces with underscores in the column name
+            command_column_name = command_column_name.replace(" ", "_")
+            
+            # If the column name doesn't exist in the device_data dictionary, create it
+            #if command_column_name not in device_data:
+                #device_data[command_column_name] = []
+
+            # Store the output of the command in the device_data dictionary
+            #device_data[command_column_name].append(cmd_output)
+            #print(f"Output of {cmd}: {cmd_output}")
+            
+            extra_output.append(f"IP Address: {device}\n")
+            extra_output.append(f"Command: {cmd}\n")
+            extra_output.append(f"{cmd_output}\n\n")
+
+    return DeviceRecord.from_row(device_data)
+
+
+# Whole command plan of a device for --batch and the parse pool (and on the
+# asyncio backend for every device), before show version is in. Without
+# a device type (asyncio backend) the prompt decides between IOS XR and IOS.
+def batch_plan(device, device_type, prompt, commands):
+    if device_type is None:
+        device_type = "cisco_xr" if prompt.startswith("RP/") else "cisco_ios"
+    hostname_match = hostname_pattern.search(prompt)
+    hostname = hostname_match.group(1) if hostname_match else None
+    return plan_commands(family_by_device_type.get(device_type), hostname, device, commands)
+
+
+# Pipelined collection (parse_pool.py): the session only sends the planned
+# commands and a worker process parses the outputs. The session is kept until
+# the parse is through, so a command the plan missed is sent on it and the
+# capture parsed again.
+def collect_in_parse_pool(session, device, device_type, commands, extra_output, parse_pool, timing):
+    prompt = session.find_prompt()
+    outputs = {}
+    pending = batch_plan(device, device_type, prompt, commands)
+    while True:
+        with timing.phase("commands"):
+            for command in pending:
+                outputs[command] = session.send_command(command)
+        with timing.phase("parse"):
+            try:
+                device_data, parsed_output, records = parse_pool.parse(device, prompt, outputs, commands)
+            except CommandNeeded as needed:
+                pending = [needed.command]
+                continue
+            set_device_context(hostname=device_data['Hostname'])
+            release_records(records)
+        extra_output.extend(parsed_output)
+        return device_data
+
+
+# Opens the netmiko session for a device. A fresh entry in the device type cache
+# skips SSHDetect; if the cached type cannot connect or the prompt shows another
+# hostname the entry is dropped and the device is detected again.
+def connect_device(logging_in, watchdog, device_cache=None, timing=None):
+    # netmiko pulls in paramiko and takes longer to import than the rest of the
+    # script together, so only the commands that open sessions load it
+    from netmiko import ConnectHandler, NetMikoAuthenticationException, NetMikoTimeoutException, SSHDetect
+
+    device = logging_in["host"]
+    cached = device_cache.get(device) if device_cache else None
+    timing = timing or DeviceTiming(device)
+
+    if cached:
+        logging_in["device_type"] = cached["device_type"]
+        try:
+            with timing.phase("login"):
+                ssh = ConnectHandler(**logging_in)
+        except (NetMikoTimeoutException, NetMikoAuthenticationException):
+            raise
+        except Exception as e:
+            logging.error(f'Cached device type {cached["device_type"]} failed for {device}: {str(e)}')
+        else:
+            watchdog.watch(ssh)
+            hostname_match = hostname_pattern.search(ssh.find_prompt())
+            if not cached.get("hostname") or (hostname_match and hostname_match.group(1) == cached["hostname"]):
+                return ssh
+            logging.warning(f"Prompt of {device} no longer matches {cached['hostname']}, detecting again")
+            ssh.disconnect()
+        device_cache.invalidate(device)
+        timing.attempts += 1
+
+    # Use SSHDetect to determine the device type
+    logging_in["device_type"] = "autodetect"
+    with timing.phase("detect"):
+        guesser = SSHDetect(**logging_in)
+        watchdog.watch(guesser.connection)
+        device_type = guesser.autodetect()
+
+    # Use the detected device type for connection
+    logging_in["device_type"] = device_type
+    if device_cache:
+        device_cache.put(device, device_type)
+
+    with timing.phase("login"):
+        ssh = ConnectHandler(**logging_in)
+    watchdog.watch(ssh)
+    return ssh
+
+
+def process_device(device, username, password, commands, device_timeout=0, port=22, device_cache=None, raw_store=None, timing_recorder=None, timeouts=None, batch=False,
+                   delta_max_age=None, previous=None, timing=None, parse_pool=None):
+    from netmiko import NetMikoAuthenticationException, NetMikoTimeoutException, ReadTimeout
+
+    watchdog = DeviceWatchdog(device, device_timeout)
+    watchdog.start()
+    timing = timing or DeviceTiming(device)
+    extra_output = []
+    try:
+        try:
+            logging_in = {
+                    "device_type": "autodetect",  # Use 'autodetect' for automatic detection
+                    "host": device,
+                    "port": port,
+                    "username": username,
+                    "password": password,
+                }
+
+            with connect_device(logging_in, watchdog, device_cache, timing) as ssh:
+                logging.debug(f'Connected to {device} as {ssh.device_type}')
+
+                # Read timeouts come from the timing history instead of a flat 300s
+                timing.device_type = ssh.device_type
+                timeouts = timeouts or AdaptiveTimeouts()
+                session = TimedSession(AdaptiveSession(ssh, timeouts), timing)
+                outputs = {}
+                if delta_max_age:
+                    # Delta mode: an unchanged device keeps its last record
+                    with timing.phase("probe"):
+                        outputs["show version"] = session.send_command("show version")
+                    hostname_match = hostname_pattern.search(ssh.find_prompt())
+                    reason = change_reason(previous, hostname_match.group(1) if hostname_match else None, outputs["show version"], delta_max_age)
+                    if reason is None:
+                        logging.info(f"No change since {previous['Polled At']}, carrying its record forward")
+                        timing.status = "unchanged"
+                        return previous
+                    logging.debug(f'Collecting {device} in full: {reason}')
+                if batch:
+                    plan = [command for command in batch_plan(device, ssh.device_type, ssh.find_prompt(), commands) if command not in outputs]
+                    started = time.perf_counter()
+                    with timing.phase("batch"):
+                        batch_outputs = send_batch(ssh, plan, sum(timeouts.timeout_for(command, ssh.device_type, ssh.base_prompt) for command in plan))
+                    timing.record_command(f"<batch of {len(plan)}>", time.perf_counter() - started, "".join(batch_outputs.values()))
+                    outputs.update(batch_outputs)
+                if outputs:
+                    session = BatchedSession(session, outputs)
+                session = CaptureSession(session) if raw_store else session
+                try:
+                    if parse_pool:
+                        device_data = collect_in_parse_pool(session, device, ssh.device_type, commands, extra_output, parse_pool, timing)
+                    else:
+                        with timing.phase("commands"):
+                            device_data = collect_device_data(session, device, commands, extra_output)
+                    timing.platform = device_data['OS Family']
+                    timing.planned_commands = len(plan_commands(device_data['OS Family'], device_data['Hostname'], device, commands))
+                finally:
+                    # Kept even when parsing blew up, that output is the one worth replaying
+                    if raw_store and session.outputs:
+                        raw_store.save(device, session.prompt, session.outputs)
+                if device_cache:
+                    device_cache.update(device, device_data['Hostname'], device_data['OS Family'])
+
+                log_collected(device_data)
+                return device_data
+             
+
+        #Error Handling    
+        except NetMikoTimeoutException as e:
+            logging.error(f'Timeout while connecting to {device}')
+            timing.status = "timeout"
+            timing.error = str(e)
+            
+        except NetMikoAuthenticationException as e:
+            logging.error(f'Authentication failure for {device}')
+            timing.status = "auth"
+            timing.error = str(e)
+
+        except ReadTimeout as e:
+            # Already logged with the command and its timeout by AdaptiveSession
+            logging.warning(f'{device} stopped answering within the read timeout, giving up on it')
+            timing.status = "read_timeout"
+            timing.error = str(e)
+            
+        except Exception as e:
+            if watchdog.expired:
+                logging.error(f'Gave up on {device} after its {device_timeout}s time budget: {str(e)}')
+                timing.status = "budget"
+            else:
+                logging.error(f'An error occurred while connecting to {device}: {str(e)}')
+                timing.status = "error"
+            timing.error = str(e)
+
+    finally:
+        watchdog.cancel()
+        write_extra_output(extra_output)
+        if timing_recorder:
+            timing.finish(timing.status, timing.error)
+            timing_recorder.finish(timing)
+
+    return None
+
+
+# The one console line of a collected device
+def log_collected(device_data):
+    ports = sum(device_data.get(f'Total {label} Ports') or 0 for label in ('1G', '10G', '100G', '400G'))
+    logging.info(f"Collected {device_data['OS Family']} {device_data['Model']} {device_data['Version']}, serial {device_data['Serial Number']}, {ports} ports")
+
+
+# Seconds to wait before retrying a failed attempt under the retry policy, or
+# None when the device is given up on and goes to the failure manifest
+def retry_delay(device, timing, attempt, retry_policy=None, failure_manifest=None):
+    failure_class = classify_failure(timing.status, timing.error, timing.failed_phase)
+    delay = retry_policy.delay(failure_class, attempt) if retry_policy else None
+    if delay is None:
+        if failure_manifest:
+            failure_manifest.add(device, failure_class, timing.failed_phase, attempt, timing.error)
+        return None
+    logging.warning(f'Retrying {device} ({failure_class}) in {delay:.1f}s')
+    return delay
+
+
+# process_device under the retry policy: retryable failures are tried again
+# after a jittered backoff, and a device given up on goes to the failure manifest
+def process_device_with_retries(device, username, password, commands, device_timeout=0, port=22, device_cache=None, raw_store=None, timing_recorder=None, timeouts=None,
+                                batch=False, delta_max_age=None, previous=None, timing=None, retry_policy=None, failure_manifest=None, parse_pool=None):
+    attempt = 1
+    timing = timing or DeviceTiming(device)
+    with device_logging(device):
+        while True:
+            device_data = process_device(device, username, password, commands, device_timeout, port, device_cache, raw_store, timing_recorder, timeouts, batch,
+                                         delta_max_age, previous, timing, parse_pool)
+            if device_data is not None:
+                return device_data
+            delay = retry_delay(device, timing, attempt, retry_policy, failure_manifest)
+            if delay is None:
+                return None
+            time.sleep(delay)
+            attempt += 1
+            timing = DeviceTiming(device)
+
+
+# Output of the extra commands is written in one go so parallel workers don't interleave
+def write_extra_output(extra_output):
+    if extra_output:
+        with output_lock:
+            with open(extra_output_path, "a") as output_file:
+                output_file.write("".join(extra_output))
+
+
+# Runs process_device over all IPs with a bounded pool of workers and yields
+# (index in ips, device_data or None) as each device finishes. With a scheduler
+# the devices are started per region or subnet within its limits instead.
+def collect_inventory(ips, username, password, commands, workers=1, device_timeout=0, port=22, device_cache=None, raw_store=None, timing_recorder=None, timeouts=None, batch=False,
+                      delta_max_age=None, previous_records=None, scheduler=None, regions=None, retry_policy=None, failure_manifest=None, parse_pool=None):
+    previous_records = previous_records or {}
+    if scheduler:
+        # One attempt per call, a retry goes back through the scheduler
+        def work(device, timing, attempt):
+            with device_logging(device):
+                device_data = process_device(device, username, password, commands, device_timeout, port, device_cache, raw_store, timing_recorder, timeouts, batch,
+                                             delta_max_age, previous_records.get(device), timing, parse_pool)
+                if device_data is None:
+                    delay = retry_delay(device, timing, attempt, retry_policy, failure_manifest)
+                    if delay is not None:
+                        return Retry(delay)
+                return device_data
+        yield from scheduler.run(ips, work, workers, regions)
+        return
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {}
+        for index, device in enumerate(ips):
+            future = executor.submit(process_device_with_retries, device, username, password, commands, device_timeout, port, device_cache, raw_store, timing_recorder, timeouts,
+                                     batch, delta_max_age, previous_records.get(device), None, retry_policy, failure_manifest, parse_pool)
+            futures[future] = index
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+# Same sweep on the asyncio backend: one event loop, in its own thread,
+# multiplexes all sessions and workers caps how many are open at once; with a
+# scheduler every device also keeps to the limits of its group
+def collect_inventory_asyncio(ips, username, password, commands, workers=1, device_timeout=0, port=22, raw_store=None, timing_recorder=None, timeouts=None, batch=False,
+                              delta_max_age=None, previous_records=None, retry_policy=None, failure_manifest=None, parse_pool=None, scheduler=None, regions=None):
+    import asyncio
+
+    from async_collector import collect_inventory_async
+
+    finished = queue.Queue()
+    failure = []
+
+    def report(index, device_data, extra_output):
+        write_extra_output(extra_output)
+        finished.put((index, device_data))
+
+    def run_loop():
+        try:
+            asyncio.run(collect_inventory_async(ips, username, password, commands, collect_device_data, workers, device_timeout, port, report, raw_store, timing_recorder, timeouts,
+                                                batch_plan if batch else None, delta_max_age, previous_records, retry_policy, failure_manifest, parse_pool,
+                                                scheduler, regions, batch_plan))
+        except Exception as e:
+            failure.append(e)
+        finally:
+            finished.put(None)
+
+    threading.Thread(target=run_loop, daemon=True).start()
+    while True:
+        item = finished.get()
+        if item is None:
+            break
+        yield item
+    if failure:
+        raise failure[0]
+
+
+# Puts finished devices back into device list order, so the rows stay
+# deterministic however the sessions finish. on_complete still sees every
+# successful device the moment it is done, e.g. to checkpoint it.
+def in_device_order(finished, on_complete=None):
+    waiting = {}
+    next_index = 0
+    for index, device_data in finished:
+        if device_data is not None and on_complete:
+            on_complete(device_data)
+        waiting[index] = device_data
+        while next_index in waiting:
+            yield waiting.pop(next_index)
+            next_index += 1
+
+
+# Re-runs the parsers over captured output, no SSH involved. Devices without a
+# capture are skipped, as are those whose parse needs a command that was not captured.
+def replay_inventory(ips, commands, raw_store):
+    for device in ips:
+        capture = raw_store.load(device)
+        if capture is None:
+            logging.warning(f'No capture for {device}, skipping')
+            continue
+        session = RecordedSession(capture["prompt"], capture["outputs"])
+        extra_output = []
+        with device_logging(device):
+            try:
+                device_data = collect_device_data(session, device, commands, extra_output)
+            except CommandNeeded as needed:
+                logging.error(f'Capture of {device} has no output for "{needed.command}", capture it again')
+                continue
+            except Exception as e:
+                logging.error(f'An error occurred while replaying {device}: {str(e)}')
+                continue
+        yield device_data
+
+
+# Jobs of the service mode (inventory_service.py), run on pooled warm sessions
+def inventory_job(ssh, device, commands):
+    extra_output = []
+    try:
+        return dict(collect_device_data(ssh, device, commands, extra_output))
+    finally:
+        write_extra_output(extra_output)
+
+
+def interfaces_job(ssh, device, commands):
+    device_data = {'IP Address': device, 'OS Family': family_by_device_type.get(ssh.device_type)}
+    if ssh.device_type == "cisco_xr":
+        interface_status = ssh.send_command("show ipv4 interface brief")
+        apply_interface_tally(device_data, tally_interfaces(interface_status, "xr"), empty_utilization=0)
+    else:
+        interface_status = ssh.send_command("show ip interface brief")
+        apply_interface_tally(device_data, tally_interfaces(interface_status, "xe"))
+        if "Port-channel" in interface_status:
+            collect_bundle_members(ssh, device_data)
+    return device_data
+
+
+def commands_job(ssh, device, commands):
+    return {cmd: ssh.send_command(cmd) for cmd in commands}
+
+
+service_jobs = {"inventory": inventory_job, "interfaces": interfaces_job, "commands": commands_job}
+
+
+# Opens the long-lived session of a device for the service's pool: no time
+# budget, transport keepalives on, and the same device type cache and learned
+# read timeouts as a sweep
+def pooled_connect(username, password, port, device_cache, timeouts, keepalive):
+    def connect(device):
+        logging_in = {
+                "device_type": "autodetect",
+                "host": device,
+                "port": port,
+                "username": username,
+                "password": password,
+                "keepalive": keepalive,
+            }
+        ssh = connect_device(logging_in, DeviceWatchdog(device, 0), device_cache)
+        logging.info(f'Pooled a session to {device}')
+        return AdaptiveSession(ssh, timeouts)
+    return connect
+
+
+# Subcommands; a bare invocation is a collect run, as before they existed
+subcommands = ("collect", "serve", "replay", "export", "validate")
+
+
+# Maps the old --replay and --serve flags onto their subcommands
+def legacy_arguments(argv):
+    if argv and (argv[0] in subcommands or argv[0] in ("-h", "--help")):
+        return argv
+    if "--replay" in argv:
+        return ["replay"] + [argument for argument in argv if argument != "--replay"]
+    for position, argument in enumerate(argv):
+        if argument == "--serve" or argument.startswith("--serve="):
+            return ["serve"] + argv[:position] + [argument.replace("--serve", "--http-port", 1)] + argv[position + 1:]
+    return ["collect"] + argv
+
+
+def build_parser():
+    logging_options = argparse.ArgumentParser(add_help=False)
+    logging_options.add_argument("--log-file", help="JSON-lines log with every detail of every device (default: inventory_log_<date>.jsonl)")
+    logging_options.add_argument("--verbose", action="store_true", help="show the detail log on the console too, not just the progress")
+    device_options = argparse.ArgumentParser(add_help=False)
+    device_options.add_argument("--devices", default="autodevices2.txt", help="device list (IPs, host names, CIDR ranges and further lists, one per line), the failure manifest of an earlier run, or a single CIDR range (default: autodevices2.txt)")
+    prescan_options = argparse.ArgumentParser(add_help=False)
+    prescan_options.add_argument("--prescan-timeout", type=float, default=3, help="seconds the pre-scan waits for the SSH port of a device (default: 3)")
+    prescan_options.add_argument("--prescan-concurrency", type=int, default=512, help="devices the pre-scan probes at once (default: 512)")
+    output_options = argparse.ArgumentParser(add_help=False)
+    output_options.add_argument("--output", default="01 MAY Network Inventory.xlsx", help="inventory file, .xlsx, .csv or .parquet (default: 01 MAY Network Inventory.xlsx)")
+    output_options.add_argument("--max-cards", type=int, default=64, help="MOD CARD and MPA CARD columns laid out up front, devices with more cards add theirs (default: 64)")
+    session_options = argparse.ArgumentParser(add_help=False)
+    session_options.add_argument("--workers", type=int, help="number of devices processed in parallel (default: 1 on the threads backend and in serve, 500 sessions on the asyncio backend)")
+    session_options.add_argument("--port", type=int, default=22, help="SSH port of the devices (default: 22)")
+    session_options.add_argument("--cache-ttl", type=float, default=168, help="hours a cached device type stays valid before SSHDetect runs again (default: 168)")
+    session_options.add_argument("--no-device-cache", action="store_true", help="always run SSHDetect and leave device_type_cache.json alone")
+    session_options.add_argument("--timing-history", default="timings_*.jsonl", help="timing logs of earlier runs the read timeouts are learned from (default: timings_*.jsonl)")
+    session_options.add_argument("--read-timeout", type=float, default=60, help="read timeout in seconds of commands without enough timing history (default: 60)")
+
+    parser = argparse.ArgumentParser(description="Network inventory of the devices listed in autodevices2.txt (or --devices); without a subcommand it runs collect")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    collect_parser = subparsers.add_parser("collect", parents=[logging_options, device_options, output_options, session_options, prescan_options],
+                                           help="log in to every device and write the inventory")
+    collect_parser.add_argument("--device-timeout", type=int, default=1800, help="time budget in seconds for a single device, 0 disables it (default: 1800)")
+    collect_parser.add_argument("--backend", choices=["threads", "asyncio"], default="threads", help="collection backend; asyncio needs the asyncssh package (default: threads)")
+    collect_parser.add_argument("--checkpoint", default="inventory_checkpoint.jsonl", help="append-only store of finished devices (default: inventory_checkpoint.jsonl)")
+    collect_parser.add_argument("--resume", action="store_true", help="continue the last run window and skip the devices already checkpointed in it")
+    collect_parser.add_argument("--capture", action="store_true", help="save the raw output of every command per device under --raw-store")
+    collect_parser.add_argument("--raw-store", default="raw_captures", help="directory of captured command output (default: raw_captures)")
+    collect_parser.add_argument("--run-window", help="name of the run window to write to or resume (default: a new window per run, or the last one with --resume)")
+    collect_parser.add_argument("--store", default="inventory_history.db", help="SQLite history every run's records are added to (default: inventory_history.db)")
+    collect_parser.add_argument("--timing-log", help="JSON-lines file of per-device and per-command timings (default: timings_<date>.jsonl)")
+    collect_parser.add_argument("--batch", action="store_true", help="write each device's whole command plan in one go and split the output on the prompt")
+    collect_parser.add_argument("--delta", action="store_true", help="probe show version first and carry the last checkpointed record forward for devices not reloaded or upgraded since")
+    collect_parser.add_argument("--delta-max-age", type=float, default=30, help="days after which --delta collects a device in full anyway (default: 30)")
+    collect_parser.add_argument("--retries", type=int, default=3, help="attempts per device for unreachable, prompt-detect and mid-command timeout failures (default: 3)")
+    collect_parser.add_argument("--retry-budget", type=float, default=1800, help="seconds after the start of the run in which failed devices may still be retried (default: 1800)")
+    collect_parser.add_argument("--parse-processes", type=int, default=0, help="parse the outputs in this many worker processes while the sessions only send commands, 0 parses in the sessions' own workers (default: 0)")
+    collect_parser.add_argument("--parse-queue", type=int, help="captures that may wait for a parse process before the sessions are held back (default: twice --parse-processes)")
+    collect_parser.add_argument("--no-prescan", action="store_true", help="open SSH to every device without probing its port first")
+    collect_parser.add_argument("--failures", help="CSV manifest of the devices given up on, usable as --devices of the next run (default: failed_devices_<date>.csv)")
+
+    serve_parser = subparsers.add_parser("serve", parents=[logging_options, session_options], help="run posted jobs on pooled SSH sessions")
+    serve_parser.add_argument("--http-port", type=int, default=8765, help="local port the service listens on (default: 8765)")
+    serve_parser.add_argument("--idle-timeout", type=float, default=600, help="seconds a pooled session may sit idle before it is closed (default: 600)")
+    serve_parser.add_argument("--keepalive", type=int, default=60, help="seconds between keepalives of pooled sessions (default: 60)")
+
+    replay_parser = subparsers.add_parser("replay", parents=[logging_options, device_options, output_options],
+                                          help="rebuild the inventory from the outputs saved with collect --capture, without connecting to anything")
+    replay_parser.add_argument("--raw-store", default="raw_captures", help="directory of captured command output (default: raw_captures)")
+
+    export_parser = subparsers.add_parser("export", parents=[output_options], help="write a run from the history to the inventory file")
+    export_parser.add_argument("--store", default="inventory_history.db", help="SQLite history to export from (default: inventory_history.db)")
+    export_parser.add_argument("--run", help="run window to export (default: the latest)")
+
+    validate_parser = subparsers.add_parser("validate", parents=[device_options, prescan_options], help="check the device list for bad and duplicate entries")
+    validate_parser.add_argument("--probe", action="store_true", help="also list the devices that do not answer on --port")
+    validate_parser.add_argument("--port", type=int, default=22, help="SSH port probed with --probe (default: 22)")
+    return parser
+
+
+def read_commands():
+    with open('commands.txt') as command:
+        return command.read().splitlines()
+
+
+def replay(args, date):
+    setup_logging(args.log_file or f"inventory_log_{date}.jsonl", f'01 MAY Network Inventory Errors_{date}.txt', args.verbose)
+    raw_store = RawOutputStore(args.raw_store)
+    with open_inventory_writer(args.output, device_data_template, args.max_cards) as writer:
+        for device_data in replay_inventory(load_devices(args.devices), read_commands(), raw_store):
+            writer.write(device_data)
+    logging.info(f'Data has been saved to {args.output}')
+
+
+def export(args):
+    store = InventoryStore(args.store)
+    try:
+        run_window = args.run or store.latest_run()
+        if run_window is None:
+            print(f"{args.store} holds no runs yet")
+            return 1
+        rows = export_run(store, run_window, args.output, device_data_template, args.max_cards)
+    finally:
+        store.close()
+    print(f"Run {run_window}: {rows} devices written to {args.output}")
+    return 0
+
+
+def validate(args):
+    seen = set()
+    devices = []
+    problems = 0
+    try:
+        ips = list(device_entries(args.devices))
+    except (ValueError, OSError) as e:
+        print(e)
+        return 1
+    for ip in ips:
+        problem = entry_problem(ip)
+        if problem:
+            print(f"{problem}: {ip}")
+            problems += 1
+            continue
+        if ip in seen:
+            print(f"Listed more than once: {ip}")
+            problems += 1
+            continue
+        seen.add(ip)
+        devices.append(ip)
+    print(f"{args.devices}: {len(ips)} entries, {len(devices)} devices, {problems} problems")
+    if args.probe:
+        live, unreachable, seconds = prescan(devices, args.port, args.prescan_timeout, args.prescan_concurrency)
+        for ip, error in unreachable.items():
+            print(f"Unreachable: {ip} ({error})")
+        print(f"{len(live)} of {len(devices)} devices answer on port {args.port} ({seconds:.1f}s)")
+    return 1 if problems else 0
+
+
+def serve_jobs(args, date):
+    from inventory_service import JobRunner, SessionPool, load_token, serve
+
+    setup_logging(args.log_file or f"inventory_log_{date}.jsonl", f'01 MAY Network Inventory Errors_{date}.txt', args.verbose)
+    logging.info(f"Hello {getpass.getuser().upper()}")
+    commands = read_commands()
+    username, password = load_credentials()
+    timeouts = AdaptiveTimeouts(default=args.read_timeout)
+    timeouts.load_history(args.timing_history)
+    device_cache = None if args.no_device_cache else DeviceTypeCache("device_type_cache.json", args.cache_ttl * 3600)
+    pool = SessionPool(pooled_connect(username, password, args.port, device_cache, timeouts, args.keepalive), args.idle_timeout, args.keepalive)
+    try:
+        serve(JobRunner(pool, service_jobs, commands, args.workers or default_workers["threads"]), port=args.http_port, token=load_token())
+    finally:
+        if device_cache:
+            device_cache.save()
+
+
+def collect(args, date):
+    # Workers only queue their records; the console gets a compact view and the
+    # JSON-lines file everything, per device
+    setup_logging(args.log_file or f"inventory_log_{date}.jsonl", f'01 MAY Network Inventory Errors_{date}.txt', args.verbose)
+    logging.info(f"Hello {getpass.getuser().upper()}")
+
+    # Reading devices and commands from files
+    ips = load_devices(args.devices)
+    commands = read_commands()
+    raw_store = RawOutputStore(args.raw_store) if args.capture else None
+    username, password = load_credentials()
+
+    # Every finished device goes straight to the checkpoint, so an interrupted
+    # sweep can be resumed and nothing collected is lost
+    checkpoint = InventoryCheckpoint(args.checkpoint)
+    checkpoint.run_window = args.run_window
+    if args.resume and not checkpoint.run_window:
+        checkpoint.run_window = checkpoint.last_run_window()
+    if not checkpoint.run_window:
+        checkpoint.run_window = date
+
+    resumed = {}
+    if args.resume:
+        resumed = checkpoint.load()
+        logging.info(f"Resuming run window {checkpoint.run_window}: {len(resumed)} devices already collected")
+    pending = [ip for ip in ips if ip not in resumed]
+
+    # The history keeps every run's records and the extra command output of a
+    # run window goes to its own file, which --resume appends to
+    global extra_output_path
+    store = InventoryStore(args.store)
+    extra_output_path = f"other commands_{checkpoint.run_window}.txt"
+
+    def record_device(device_data):
+        checkpoint.append(device_data)
+        store.add(checkpoint.run_window, device_data)
+
+    timing_recorder = TimingRecorder(args.timing_log or f"timings_{date}.jsonl")
+    timeouts = AdaptiveTimeouts(default=args.read_timeout)
+    history = timeouts.load_history(args.timing_history)
+    logging.info(f"Read timeouts learned for {len(timeouts.learned)} commands from {len(history)} earlier runs")
+
+    # Delta mode compares against the latest record of every device, whatever its run window
+    delta_max_age = timedelta(days=args.delta_max_age) if args.delta else None
+    previous_records = checkpoint.latest() if args.delta else None
+
+    # Per region / subnet limits from the [scheduler] sections of config.ini, if any
+    scheduler = DeviceScheduler.load()
+    regions = {ip: record.get('Region') for ip, record in checkpoint.latest().items()} if scheduler else None
+
+    retry_policy = RetryPolicy(max_attempts=args.retries, budget=args.retry_budget)
+    failure_manifest = FailureManifest(args.failures or f"failed_devices_{date}.csv")
+
+    # Devices that do not answer on the SSH port go to the manifest without a session
+    unreachable = {}
+    if pending and not args.no_prescan:
+        pending, unreachable, seconds = prescan(pending, args.port, args.prescan_timeout, args.prescan_concurrency)
+        for ip, error in unreachable.items():
+            with device_logging(ip):
+                logging.error(f'Unreachable before SSH: {error}')
+            failure_manifest.add(ip, "unreachable", "prescan", 1, error)
+            # Counted as a failed device in the run summary like any other
+            timing = DeviceTiming(ip)
+            timing.failed_phase = "prescan"
+            timing.finish("unreachable", error)
+            timing_recorder.finish(timing)
+        logging.info(f"Pre-scan: {len(pending)} of {len(pending) + len(unreachable)} devices answer on port {args.port} ({seconds:.1f}s)")
+
+    # Two-stage pipeline: sessions send commands, worker processes parse
+    parse_pool = None
+    if args.parse_processes > 0:
+        from parse_pool import ParsePool
+
+        parse_pool = ParsePool(args.parse_processes, args.parse_queue)
+        logging.info(f"Parsing in {parse_pool.processes} processes, at most {parse_pool.max_pending} captures queued")
+
+    device_cache = None
+    workers = args.workers or default_workers[args.backend]
+    if args.backend == "asyncio":
+        finished = collect_inventory_asyncio(pending, username, password, commands, workers, args.device_timeout, args.port, raw_store, timing_recorder, timeouts, args.batch,
+                                             delta_max_age, previous_records, retry_policy, failure_manifest, parse_pool, scheduler, regions)
+    else:
+        if not args.no_device_cache:
+            device_cache = DeviceTypeCache("device_type_cache.json", args.cache_ttl * 3600)
+        finished = collect_inventory(pending, username, password, commands, workers, args.device_timeout, args.port, device_cache, raw_store, timing_recorder, timeouts, args.batch,
+                                     delta_max_age, previous_records, scheduler, regions, retry_policy, failure_manifest, parse_pool)
+    collected = in_device_order(finished, record_device)
+
+    # Rows are streamed to the output as devices complete, in the order of the
+    # device list, with the resumed devices taken from the checkpoint
+    try:
+        with open("Interface Descriptions.txt", "w") as output_file:
+            with open_inventory_writer(args.output, device_data_template, args.max_cards) as writer:
+                for device in ips:
+                    if device in unreachable:
+                        continue
+                    device_data = resumed[device] if device in resumed else next(collected)
+                    if device_data is not None:
+                        writer.write(device_data)
+    finally:
+        if device_cache:
+            device_cache.save()
+        if parse_pool:
+            parse_pool.close()
+        store.close()
+
+    logging.info(f'Data has been saved to {args.output}')
+    if failure_manifest.failures:
+        logging.warning(f'{failure_manifest.failures} devices failed, see {failure_manifest.path} (run again with --devices {failure_manifest.path})')
+    logging.info(timing_recorder.report())
+
+
+def main(argv=None):
+    args = build_parser().parse_args(legacy_arguments(sys.argv[1:] if argv is None else argv))
+    date = datetime.now().strftime("%Y-%m-%d_%H-%M")
+    if args.action == "collect":
+        collect(args, date)
+    elif args.action == "serve":
+        serve_jobs(args, date)
+    elif args.action == "replay":
+        replay(args, date)
+    elif args.action == "export":
+        return export(args)
+    elif args.action == "validate":
+        return validate(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+# Delta collection: a cheap show version probe decides whether a device needs
+# the full collection again.
+#
+# A device whose boot time (now minus its uptime), hostname and software version
+# all match its last stored record has not been reloaded or upgraded since, so
+# its previous device_data is carried forward instead of pulling show platform,
+# the inventory and the interface tables again. Records older than max_age are
+# always collected in full, so interface counts never get too stale.
+
+from datetime import datetime, timedelta
+
+from parser_registry import parse_uptime
+
+
+time_format = "%Y-%m-%d %H:%M"
+
+
+def boot_time(show_version, now=None):
+    uptime = parse_uptime(show_version)
+    if uptime is None:
+        return None
+    return ((now or datetime.now()) - timedelta(seconds=uptime)).strftime(time_format)
+
+
+# Why the previous record cannot be carried forward, or None when it can
+def change_reason(previous, hostname, show_version, max_age, tolerance=timedelta(minutes=15), now=None):
+    now = now or datetime.now()
+    if not previous:
+        return "no previous record"
+    if not previous.get('Polled At') or now - datetime.strptime(previous['Polled At'], time_format) > max_age:
+        return "previous record too old"
+    if previous.get('Hostname') != hostname:
+        return "hostname changed"
+    if not previous.get('Version') or previous['Version'] not in show_version:
+        return "version changed"
+
+    booted = boot_time(show_version, now)
+    if not booted or not previous.get('Boot Time'):
+        return "no uptime to compare"
+    if abs(datetime.strptime(booted, time_format) - datetime.strptime(previous['Boot Time'], time_format)) > tolerance:
+        return "reloaded"
+    return None
@@ -0,0 +1,74 @@
+# On-disk cache of detected netmiko device types, keyed by IP.
+#
+# SSHDetect.autodetect() opens an extra SSH session per device just to guess the
+# platform. With the cache, steady-state runs reuse the device type found last
+# time and connect once per device. Entries also remember the last-seen hostname
+# and OS family, expire after a TTL and are dropped (and re-detected) when the
+# cached type cannot connect or the prompt no longer matches.
+
+import json
+import logging
+import os
+import threading
+import time
+
+
+class DeviceTypeCache:
+    def __init__(self, path="device_type_cache.json", ttl=7 * 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as cache_file:
+                self.entries = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            logging.error(f'Ignoring unreadable device type cache {self.path}: {str(e)}')
+            self.entries = {}
+
+    def save(self):
+        with self.lock:
+            snapshot = dict(self.entries)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as cache_file:
+            json.dump(snapshot, cache_file, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    # Returns the cached entry for ip, or None when missing or older than the TTL
+    def get(self, ip):
+        with self.lock:
+            entry = self.entries.get(ip)
+        if entry is None:
+            return None
+        if self.ttl and time.time() - entry.get("detected_at", 0) > self.ttl:
+            return None
+        return entry
+
+    def put(self, ip, device_type, hostname=None, os_family=None):
+        with self.lock:
+            self.entries[ip] = {
+                "device_type": device_type,
+                "hostname": hostname,
+                "os_family": os_family,
+                "detected_at": time.time(),
+            }
+
+    # Refreshes the last-seen details without restarting the TTL of the detection
+    def update(self, ip, hostname=None, os_family=None):
+        with self.lock:
+            entry = self.entries.get(ip)
+            if entry is None:
+                return
+            if hostname:
+                entry["hostname"] = hostname
+            if os_family:
+                entry["os_family"] = os_family
+
+    def invalidate(self, ip):
+        with self.lock:
+            self.entries.pop(ip, None)
@@ -0,0 +1,252 @@
+# Compact record of one device.
+#
+# While a device is parsed its data is a plain dict in spreadsheet columns
+# (device_data_template plus numbered MOD CARD0n / MPA CARD0n keys), which is
+# easy for the parsers to fill in. Records kept for longer, e.g. the latest
+# record of every device from the checkpoint for --delta and the scheduler,
+# are DeviceRecords instead: __slots__ instead of a dict of some 40 keys, the
+# twelve interface counters in one typed array, port totals and utilisation
+# derived from the counters, and the RSP/RP slots and line cards as tuples.
+#
+# A DeviceRecord is a read-only Mapping of the same columns, so the writers,
+# the checkpoint and the delta probe read it like the dict it came from, and
+# DeviceRecord.from_row(row) == row for every row with the template columns:
+# any value the model cannot derive, or any column it does not know, is kept
+# as it was in `extra`. json.dumps() needs dict(record) or record.to_row().
+#
+#   python device_record.py   round-trips check_row and reports any difference
+
+import sys
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+from interface_tally import speed_labels
+
+
+# Columns of one device record, in spreadsheet order, with their starting values
+device_data_template = {
+    'IP Address': None,
+    'Hostname': None,
+    'Region': None,
+    'Site Name': None,
+    'Function' : None,
+    'Serial Number': None,
+    'Version' : None,
+    'Model' : None,
+    'OS Family' : None,
+    'Boot Time' : None,
+    'Polled At' : None,
+    'Gig_up' : 0,
+    'Gig_down' : 0,
+    'Gig_admin_down' : 0,
+    'TenG_up' : 0,
+    'TenG_down' : 0,
+    'TenG_admin_down' : 0,
+    'HunG_up' : 0,
+    'HunG_down' : 0,
+    'HunG_admin_down' : 0,
+    'FourHunG_up' : 0,
+    'FourHunG_down' : 0,
+    'FourHunG_admin_down' : 0,
+    'Total 1G Ports' : 0,
+    'Total 10G Ports': 0,
+    'Total 100G Ports' : 0,
+    'Total 400G Ports' : 0,
+    '1G Utilization (%)': 0,
+    '10G Utilization (%)' : 0,
+    '100G Utilization (%)' : 0,
+    '400G Utilization (%)' : 0,
+    'Connected NV_SATs' : 0,
+    'Disconnected NV_SATs' : 0,
+    'Bundle Members' : None,
+    'RSP0' : 'Not Present',
+    'RSP1' : 'Not Present',
+    'RP0' : 'Not Present',
+    'RP1' : 'Not Present',
+}
+
+# Text column -> attribute
+text_columns = {
+    'IP Address': 'ip',
+    'Hostname': 'hostname',
+    'Region': 'region',
+    'Site Name': 'site_name',
+    'Function': 'function',
+    'Serial Number': 'serial_number',
+    'Version': 'version',
+    'Model': 'model',
+    'OS Family': 'os_family',
+    'Boot Time': 'boot_time',
+    'Polled At': 'polled_at',
+}
+
+counter_columns = [f"{speed}_{state}" for speed in speed_labels for state in ("up", "down", "admin_down")]
+counter_index = {column: index for index, column in enumerate(counter_columns)}
+slot_columns = ('RSP0', 'RSP1', 'RP0', 'RP1')
+card_kinds = ("MOD", "MPA")
+not_present = 'Not Present'
+missing = object()
+
+
+def card_column(kind, number):
+    return f"{kind} CARD0{number}"
+
+
+@dataclass(slots=True, eq=False)
+class DeviceRecord(Mapping):
+    ip: str = None
+    hostname: str = None
+    region: str = None
+    site_name: str = None
+    function: str = None
+    serial_number: str = None
+    version: str = None
+    model: str = None
+    os_family: str = None
+    boot_time: str = None
+    polled_at: str = None
+    # counter_columns order: Gig up/down/admin down, then 10G, 100G and 400G
+    counters: array = None
+    # Speeds without ports whose utilisation is None rather than 0 (the speeds
+    # the IOS / IOS-XE tally counts), one bit per speed in speed_labels order
+    none_when_empty: int = 0
+    connected_sats: int = 0
+    disconnected_sats: int = 0
+    bundle_members: str = None
+    slots: tuple = (not_present,) * len(slot_columns)
+    mod_cards: tuple = ()
+    mpa_cards: tuple = ()
+    # Columns the model does not derive, as they were
+    extra: dict = None
+
+    @classmethod
+    def from_row(cls, row):
+        counters = array('I', (row.get(column) or 0 for column in counter_columns))
+        record = cls(**{attribute: row.get(column) for column, attribute in text_columns.items()}, counters=counters)
+        record.none_when_empty = sum(1 << index for index, label in enumerate(speed_labels.values())
+                                     if row.get(f"Total {label} Ports") == 0 and row.get(f"{label} Utilization (%)") is None)
+        record.connected_sats = row.get('Connected NV_SATs', 0)
+        record.disconnected_sats = row.get('Disconnected NV_SATs', 0)
+        record.bundle_members = row.get('Bundle Members')
+        record.slots = tuple(row.get(column, not_present) for column in slot_columns)
+        record.mod_cards = cards_of(row, "MOD")
+        record.mpa_cards = cards_of(row, "MPA")
+        # Everything the model does not reproduce: unknown columns, cards after
+        # a gap in the numbering and values that differ from the derived ones
+        extra = {}
+        for column, value in row.items():
+            derived = record.derived(column)
+            if derived is missing or derived != value:
+                extra[column] = value
+        record.extra = extra or None
+        return record
+
+    # Value of a column as the model derives it, ignoring extra; missing for a
+    # column it does not know or a card it does not hold
+    def derived(self, column, default=missing):
+        attribute = text_columns.get(column)
+        if attribute:
+            return getattr(self, attribute)
+        if column in counter_index:
+            return self.counters[counter_index[column]] if self.counters else 0
+        if column.startswith("Total ") and column.endswith(" Ports"):
+            speed = speed_by_label.get(column[len("Total "):-len(" Ports")])
+            return self.ports(speed) if speed else default
+        if column.endswith(" Utilization (%)"):
+            speed = speed_by_label.get(column[:-len(" Utilization (%)")])
+            return self.utilization(speed) if speed else default
+        if column == 'Connected NV_SATs':
+            return self.connected_sats
+        if column == 'Disconnected NV_SATs':
+            return self.disconnected_sats
+        if column == 'Bundle Members':
+            return self.bundle_members
+        if column in slot_columns:
+            return self.slots[slot_columns.index(column)]
+        kind, _, number = column.partition(" CARD0")
+        if kind in card_kinds and number.isdigit():
+            cards = self.mod_cards if kind == "MOD" else self.mpa_cards
+            if 1 <= int(number) <= len(cards):
+                return cards[int(number) - 1]
+        return default
+
+    def ports(self, speed):
+        if not self.counters:
+            return 0
+        start = counter_index[f"{speed}_up"]
+        return sum(self.counters[start:start + 3])
+
+    def utilization(self, speed):
+        total = self.ports(speed)
+        if total == 0:
+            return None if self.none_when_empty >> speed_index[speed] & 1 else 0
+        return self.counters[counter_index[f"{speed}_up"]] / total
+
+    def columns(self):
+        columns = list(device_data_template)
+        columns += [card_column("MOD", number) for number in range(1, len(self.mod_cards) + 1)]
+        columns += [card_column("MPA", number) for number in range(1, len(self.mpa_cards) + 1)]
+        if self.extra:
+            listed = set(columns)
+            columns += [column for column in self.extra if column not in listed]
+        return columns
+
+    # Flattened to the spreadsheet columns, as the parsers produced it
+    def to_row(self):
+        return {column: self[column] for column in self.columns()}
+
+    def __getitem__(self, column):
+        if self.extra and column in self.extra:
+            return self.extra[column]
+        value = self.derived(column, missing)
+        if value is missing:
+            raise KeyError(column)
+        return value
+
+    def __iter__(self):
+        return iter(self.columns())
+
+    def __len__(self):
+        return len(self.columns())
+
+
+speed_by_label = {label: speed for speed, label in speed_labels.items()}
+speed_index = {speed: index for index, speed in enumerate(speed_labels)}
+
+
+def is_card_column(column):
+    kind, _, number = column.partition(" CARD0")
+    return kind in card_kinds and number.isdigit()
+
+
+# MOD CARD01, MOD CARD02, ... of a row as a tuple, up to the first gap
+def cards_of(row, kind):
+    cards = []
+    while card_column(kind, len(cards) + 1) in row:
+        cards.append(row[card_column(kind, len(cards) + 1)])
+    return tuple(cards)
+
+
+# Template row plus what only extra can hold: a column the model does not know,
+# a card after a gap in the numbering and a counter that is not a number
+check_row = {
+    **device_data_template,
+    'IP Address': '10.0.0.1',
+    'Hostname': 'KPE9906m',
+    'Gig_up': 3,
+    'TenG_down': None,
+    'MOD CARD01': 'A9K-MOD400-SE',
+    'MOD CARD03': 'A9K-MOD200-SE',
+    'MPA CARD01': 'A9K-MPA-20X1GE',
+    'Foo': 'x',
+}
+
+
+if __name__ == "__main__":
+    record = DeviceRecord.from_row(check_row)
+    for name, row in (("to_row()", record.to_row()), ("dict(record)", dict(record))):
+        if row != check_row:
+            differences = sorted(set(row.items()) ^ set(check_row.items()), key=str)
+            sys.exit(f"{name} does not round-trip: {differences}")
+    print("DeviceRecord round-trips every column")
@@ -0,0 +1,112 @@
+# Local fake SSH server that plays back recorded CLI output, so the collection
+# backends can be exercised without real devices (needs the asyncssh package).
+#
+# Each transcript is a JSON file describing one device:
+#
+#   {
+#       "host": "127.0.0.2",          # loopback address to listen on (default 127.0.0.1)
+#       "prompt": "KPE1#",
+#       "delay": 0.5,                 # optional seconds to wait before every answer
+#       "delays": {"show platform": 20},  # optional per-command delay, e.g. a hung command
+#       "commands": {"show version": "Cisco IOS XE Software, Version ...", ...}
+#   }
+#
+# Usage: python fake_ssh_server.py transcripts/*.json --port 8022
+# then point the collector at the hosts, e.g. --backend asyncio --port 8022.
+# Any username and password are accepted.
+
+import argparse
+import asyncio
+import json
+
+import asyncssh
+
+
+invalid_input = "% Invalid input detected at '^' marker."
+
+
+class FakeDeviceServer(asyncssh.SSHServer):
+    def begin_auth(self, username):
+        return True
+
+    def password_auth_supported(self):
+        return True
+
+    def validate_password(self, username, password):
+        return True
+
+
+async def play_transcript(process, transcript):
+    prompt = transcript["prompt"]
+    outputs = transcript.get("commands", {})
+    delay = transcript.get("delay", 0)
+    delays = transcript.get("delays", {})
+
+    process.stdout.write(f"\r\n{prompt}")
+    try:
+        while True:
+            line = await process.stdin.readline()
+            if not line:
+                break
+            command = line.strip()
+            if command in ("exit", "quit", "logout"):
+                break
+
+            if not command or command.startswith("terminal "):
+                output = ""
+            else:
+                output = outputs.get(command, invalid_input)
+                command_delay = delays.get(command, delay)
+                if command_delay:
+                    await asyncio.sleep(command_delay)
+
+            answer = f"{command}\n{output}\n" if output else f"{command}\n"
+            process.stdout.write(answer.replace("\n", "\r\n") + prompt)
+    except (asyncssh.BreakReceived, asyncssh.TerminalSizeChanged, asyncssh.ConnectionLost):
+        pass
+    process.exit(0)
+
+
+# Starts one listener per transcript and returns the servers
+async def start_fake_devices(transcripts, port, host_key=None):
+    host_key = host_key or asyncssh.generate_private_key("ssh-ed25519")
+    servers = []
+    for transcript in transcripts:
+        server = await asyncssh.create_server(
+            FakeDeviceServer,
+            transcript.get("host", "127.0.0.1"),
+            port,
+            server_host_keys=[host_key],
+            process_factory=lambda process, transcript=transcript: play_transcript(process, transcript),
+            line_editor=False,
+        )
+        servers.append(server)
+    return servers
+
+
+def load_transcripts(paths):
+    transcripts = []
+    for path in paths:
+        with open(path) as transcript_file:
+            transcripts.append(json.load(transcript_file))
+    return transcripts
+
+
+async def serve(paths, port):
+    transcripts = load_transcripts(paths)
+    await start_fake_devices(transcripts, port)
+    for transcript in transcripts:
+        print(f"Serving {transcript['prompt']} on {transcript.get('host', '127.0.0.1')}:{port}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake SSH server that plays back recorded CLI output")
+    parser.add_argument("transcripts", nargs="+", help="transcript JSON files, one per fake device")
+    parser.add_argument("--port", type=int, default=8022, help="port to listen on (default: 8022)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.transcripts, args.port))
+    except KeyboardInterrupt:
+        pass
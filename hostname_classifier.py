@@ -0,0 +1,127 @@
+# Hostname -> Region / Function / Site Name classification.
+#
+# The site and role rules live in hostname_rules.ini instead of a chain of
+# startswith / endswith / in checks. They are read once and every field's rules
+# are compiled into one regex: an alternation of zero-width lookaheads anchored
+# at the start of the hostname, in priority order, so a single match() finds the
+# winning rule and its named group says which one it was.
+#
+# Bulk use, e.g. on an IPAM export:
+#   python hostname_classifier.py ipam.csv --column Hostname --output classified.csv
+
+import argparse
+import configparser
+import csv
+import functools
+import os
+import re
+
+
+# Shipped next to this module, so it is found whatever the working directory
+default_rules_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hostname_rules.ini")
+
+
+def rule_pattern(match, patterns):
+    if match == "regex":
+        return f"(?=.*?(?:{patterns}))"
+    alternatives = "|".join(re.escape(pattern) for pattern in patterns.split())
+    if match in ("prefix", "iprefix"):
+        pattern = f"(?=(?:{alternatives}))"
+    elif match in ("suffix", "isuffix"):
+        pattern = f"(?=.*(?:{alternatives})\\Z)"
+    elif match == "contains":
+        pattern = f"(?=.*?(?:{alternatives}))"
+    else:
+        raise ValueError(f'Unknown hostname rule "{match} {patterns}"')
+    return f"(?i:{pattern})" if match.startswith("i") else pattern
+
+
+class FieldRules:
+    def __init__(self, field, rules, default=None):
+        self.field = field
+        self.values = [value for match, patterns, value in rules]
+        parts = [f"(?P<rule{index}>{rule_pattern(match, patterns)})" for index, (match, patterns, value) in enumerate(rules)]
+        self.pattern = re.compile("|".join(parts), re.DOTALL) if parts else None
+        self.default = default
+
+    def classify(self, hostname):
+        match = self.pattern.match(hostname) if self.pattern else None
+        if match:
+            return self.values[int(match.lastgroup[len("rule"):])]
+        return self.default
+
+
+class HostnameClassifier:
+    def __init__(self, fields):
+        self.fields = fields
+
+    @classmethod
+    def load(cls, path=default_rules_path):
+        config = configparser.ConfigParser(delimiters=("=",), interpolation=None)
+        config.optionxform = str
+        with open(path) as rules_file:
+            config.read_file(rules_file)
+
+        fields = []
+        for field in config.sections():
+            rules = []
+            default = None
+            for key, value in config.items(field):
+                if key == "default":
+                    default = value
+                    continue
+                match, _, patterns = key.partition(" ")
+                rules.append((match, patterns.strip(), value))
+            fields.append(FieldRules(field, rules, default))
+        return cls(fields)
+
+    # {field: value} for every field with a matching rule or a default
+    def classify(self, hostname):
+        result = {}
+        for rules in self.fields:
+            value = rules.classify(hostname)
+            if value is not None:
+                result[rules.field] = value
+        return result
+
+
+# The rules are read once per process, whoever asks first
+@functools.lru_cache(maxsize=None)
+def load_classifier(path=default_rules_path):
+    return HostnameClassifier.load(path)
+
+
+# Adds the classified fields to every row of a CSV (or a plain list of hostnames)
+def classify_file(input_path, output_path, column, classifier):
+    with open(input_path, newline="", encoding="utf-8") as input_file:
+        sample = input_file.readline()
+        input_file.seek(0)
+        if "," in sample or sample.strip() == column:
+            rows = csv.DictReader(input_file)
+        else:
+            rows = ({column: line.strip()} for line in input_file if line.strip())
+
+        field_names = [rules.field for rules in classifier.fields]
+        writer = None
+        count = 0
+        with open(output_path, "w", newline="", encoding="utf-8") as output_file:
+            for row in rows:
+                if writer is None:
+                    writer = csv.DictWriter(output_file, list(row) + [name for name in field_names if name not in row])
+                    writer.writeheader()
+                row.update(classifier.classify(row[column] or ""))
+                writer.writerow(row)
+                count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify hostnames into region, function and site with hostname_rules.ini")
+    parser.add_argument("input", help="CSV file with a hostname column, or a text file with one hostname per line")
+    parser.add_argument("--column", default="Hostname", help="hostname column of the CSV (default: Hostname)")
+    parser.add_argument("--output", default="classified_hostnames.csv", help="CSV written with the classified columns (default: classified_hostnames.csv)")
+    parser.add_argument("--rules", default=default_rules_path, help="rules file (default: hostname_rules.ini next to this script)")
+    args = parser.parse_args()
+
+    count = classify_file(args.input, args.output, args.column, HostnameClassifier.load(args.rules))
+    print(f"Classified {count} hostnames into {args.output}")
@@ -0,0 +1,160 @@
+# Single-pass interface status tally for show ip interface brief (IOS / IOS-XE)
+# and show ipv4 interface brief (IOS-XR).
+#
+# One compiled regex per layout walks the whole output and only yields physical
+# ports; subinterfaces, headers and short lines never match, so nothing is split
+# per line and nothing can raise IndexError. Both layouts classify a port by its
+# speed, 1G, 10G, 100G or 400G, from the interface name:
+#   IOS / IOS-XE  GigabitEthernet ports with a slot (not the GigabitEthernet0
+#                 management port), TenGigabitEthernet (or Te), HundredGigE and
+#                 FourHundredGigE ports
+#   IOS-XR        GigabitEthernet, TenGigE, HundredGigE and FourHundredGigE ports
+# The nVFabric- ports count too, except the 10G ones. Ports of any other speed
+# (TwoGigabitEthernet, FiveGigabitEthernet, TwentyFiveGigE,
+# FortyGigabitEthernet) and AppGigabitEthernet are not counted.
+#
+# Compared with the per-line checks ('Giga' / 'Te' anywhere in the line) this
+# changes some counts on IOS-XE: TenGigabitEthernet is 10G, not 1G;
+# HundredGigE and FourHundredGigE are tallied as 100G and 400G instead of
+# keeping their template values; TwoGigabitEthernet, FiveGigabitEthernet,
+# AppGigabitEthernet and FortyGigabitEthernet no longer count as 1G; and
+# Virtual-Template interfaces no longer count as 10G. On IOS-XR,
+# FourHundredGigE is 400G (it used to count as 100G).
+#
+#   python interface_tally.py --layout xe brief.txt
+#   python interface_tally.py --check
+
+import argparse
+import re
+import sys
+from collections import Counter
+
+
+# Interface name prefix -> counter prefix per layout, longest names first
+layout_classes = {
+    "xe": {
+        "FourHundredGigE": "FourHunG",
+        "TenGigabitEthernet": "TenG",
+        "GigabitEthernet": "Gig",
+        "HundredGigE": "HunG",
+        "Te": "TenG",
+    },
+    "xr": {
+        "FourHundredGigE": "FourHunG",
+        "HundredGigE": "HunG",
+        "TenGigE": "TenG",
+        "GigabitEthernet": "Gig",
+    },
+}
+
+# Counter prefix -> spreadsheet label of the port speed
+speed_labels = {
+    "Gig": "1G",
+    "TenG": "10G",
+    "HunG": "100G",
+    "FourHunG": "400G",
+}
+
+# Status column value -> counter suffix ("administratively down" splits into two columns on IOS)
+states = {
+    "up": "up",
+    "down": "down",
+    "administratively": "admin_down",
+    "shutdown": "admin_down",
+}
+
+
+def interface_name(layout):
+    return r"^(?P<fabric>nVFabric-)?(?P<kind>" + "|".join(layout_classes[layout]) + r")(?P<port>[^\s.]*\d[^\s.]*)[ \t]+"
+
+
+# Status is the 5th column on IOS / IOS-XE and the 3rd column on IOS-XR
+brief_layouts = {
+    "xe": re.compile(interface_name("xe") + r"\S+[ \t]+\S+[ \t]+\S+[ \t]+(?P<status>\S+)", re.MULTILINE),
+    "xr": re.compile(interface_name("xr") + r"\S+[ \t]+(?P<status>\S+)", re.MULTILINE),
+}
+
+
+# Counters of the speeds the layout tallies (Gig_*, TenG_*, ...) of one interface brief output
+def tally_interfaces(output, layout="xe"):
+    classes = layout_classes[layout]
+    tally = Counter()
+    for match in brief_layouts[layout].finditer(output):
+        speed = classes[match.group("kind")]
+        if match.group("fabric") and speed == "TenG":
+            continue
+        if layout == "xe" and speed == "Gig" and "/" not in match.group("port"):
+            continue
+        state = states.get(match.group("status").lower())
+        if state:
+            tally[(speed, state)] += 1
+
+    counters = {}
+    for speed in speed_labels:
+        if speed in classes.values():
+            for state in ("up", "down", "admin_down"):
+                counters[f"{speed}_{state}"] = tally[(speed, state)]
+    return counters
+
+
+# Writes the counters plus port totals and utilisation of the tallied speeds
+# into device_data. empty_utilization is what a speed without any ports reports.
+def apply_interface_tally(device_data, counters, empty_utilization=None):
+    device_data.update(counters)
+    for speed, label in speed_labels.items():
+        if f"{speed}_up" not in counters:
+            continue
+        total = counters[f"{speed}_up"] + counters[f"{speed}_down"] + counters[f"{speed}_admin_down"]
+        device_data[f'Total {label} Ports'] = total
+        if total == 0:
+            device_data[f'{label} Utilization (%)'] = empty_utilization
+        else:
+            device_data[f'{label} Utilization (%)'] = counters[f"{speed}_up"] / total
+
+
+# IOS-XE brief mixing the counted port names with the ones of other speeds and
+# the management, virtual and sub-interfaces, and its counters; --check
+# compares the two
+check_brief = """Interface              IP-Address      OK? Method Status                Protocol
+GigabitEthernet0       10.0.0.1        YES NVRAM  up                    up
+GigabitEthernet1/0/1   unassigned      YES unset  up                    up
+GigabitEthernet1/0/2   unassigned      YES unset  down                  down
+TwoGigabitEthernet1/0/3 unassigned     YES unset  up                    up
+FiveGigabitEthernet1/0/4 unassigned    YES unset  down                  down
+AppGigabitEthernet1/0/1 unassigned     YES unset  up                    up
+FortyGigabitEthernet1/1/1 unassigned   YES unset  administratively down down
+TenGigabitEthernet1/1/2 unassigned     YES unset  up                    up
+TenGigabitEthernet1/1/2.10 10.0.1.1    YES NVRAM  up                    up
+Te1/1/3                unassigned      YES unset  down                  down
+HundredGigE1/0/49      unassigned      YES unset  up                    up
+HundredGigE1/0/50      unassigned      YES unset  administratively down down
+FourHundredGigE1/0/51  unassigned      YES unset  up                    up
+Virtual-Template1      unassigned      YES unset  up                    up
+Port-channel1          unassigned      YES unset  up                    up
+"""
+check_counters = {
+    "Gig_up": 1, "Gig_down": 1, "Gig_admin_down": 0,
+    "TenG_up": 1, "TenG_down": 1, "TenG_admin_down": 0,
+    "HunG_up": 1, "HunG_down": 0, "HunG_admin_down": 1,
+    "FourHunG_up": 1, "FourHunG_down": 0, "FourHunG_admin_down": 0,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tally the port status of a saved interface brief output")
+    parser.add_argument("output", nargs="?", help="file with the output of show ip interface brief (xe) or show ipv4 interface brief (xr)")
+    parser.add_argument("--layout", choices=sorted(layout_classes), default="xe", help="output layout (default: xe)")
+    parser.add_argument("--check", action="store_true", help="tally a built-in brief of every port kind and compare the counters")
+    args = parser.parse_args()
+
+    if args.check:
+        counters = tally_interfaces(check_brief, "xe")
+        if counters != check_counters:
+            sys.exit(f"Interface tally changed: expected {check_counters}, got {counters}")
+        print("Interface tally matches the expected counts")
+        sys.exit(0)
+    if not args.output:
+        parser.error("the output file is required without --check")
+    with open(args.output) as output_file:
+        for counter, count in tally_interfaces(output_file.read(), args.layout).items():
+            print(f"{counter:<16} {count}")
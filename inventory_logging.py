@@ -0,0 +1,170 @@
+# Queue-backed structured logging for the collectors.
+#
+# Workers only put records on a queue; a QueueListener thread does the console
+# and file I/O, so a chatty device never blocks the others on stdout. Every
+# record carries the device it was logged for (IP, hostname, phase) from a
+# context variable, which follows worker threads and asyncio tasks alike.
+# Three outputs:
+#   console      compact progress view, INFO and up (DEBUG with --verbose)
+#   detail file  JSON lines with everything, DEBUG and up
+#   error file   the plain ERROR log the sweep has always written
+# Structured values go in extra={"fields": {...}} and end up in the JSON line.
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from contextlib import contextmanager
+
+
+device_context = contextvars.ContextVar("device_context", default=None)
+held_records = contextvars.ContextVar("held_records", default=None)
+
+# Libraries that log every packet at DEBUG
+quiet_loggers = ("netmiko", "paramiko", "asyncssh")
+
+
+# Everything logged inside is tagged with this device
+@contextmanager
+def device_logging(ip):
+    token = device_context.set({"ip": ip, "hostname": None, "phase": None})
+    try:
+        yield
+    finally:
+        device_context.reset(token)
+
+
+# Updates the hostname or phase of the current device, if there is one
+def set_device_context(**fields):
+    context = device_context.get()
+    if context is not None:
+        context.update(fields)
+
+
+def current_phase():
+    context = device_context.get()
+    return context["phase"] if context else None
+
+
+# Records logged inside are kept back instead of emitted, e.g. for a parse pass
+# that may be thrown away; release_records() emits the ones worth keeping
+@contextmanager
+def hold_records():
+    records = []
+    token = held_records.set(records)
+    try:
+        yield records
+    finally:
+        held_records.reset(token)
+
+
+def release_records(records):
+    for record in records:
+        logging.getLogger(record.name).handle(record)
+
+
+# Keeps every record as a plain dict, e.g. in a parse worker process whose
+# records are sent back to the parent
+class RecordList(logging.Handler):
+    def __init__(self, entries):
+        super().__init__()
+        self.entries = entries
+
+    def emit(self, record):
+        entry = dict(record.__dict__)
+        entry.update(msg=record.getMessage(), args=None, exc_info=None)
+        self.entries.append(entry)
+
+
+@contextmanager
+def collect_records():
+    entries = []
+    handler = RecordList(entries)
+    root = logging.getLogger()
+    level = root.level
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG)
+    try:
+        yield entries
+    finally:
+        root.removeHandler(handler)
+        root.setLevel(level)
+
+
+# Records collected in another process, ready for release_records() here, where
+# they pick up the device context of the thread or task releasing them
+def restore_records(entries):
+    return [logging.makeLogRecord(entry) for entry in entries]
+
+
+class DeviceContextFilter(logging.Filter):
+    def filter(self, record):
+        context = device_context.get() or {}
+        record.ip = context.get("ip")
+        record.hostname = context.get("hostname")
+        record.phase = context.get("phase")
+        held = held_records.get()
+        if held is not None:
+            held.append(record)
+            return False
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": f"{self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}.{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "ip": getattr(record, "ip", None),
+            "hostname": getattr(record, "hostname", None),
+            "phase": getattr(record, "phase", None),
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry["fields"] = fields
+        return json.dumps(entry, default=str)
+
+
+# "12:00:01 10.0.0.1        KPE1a            message", levels shown from WARNING up
+class ConsoleFormatter(logging.Formatter):
+    def format(self, record):
+        device = f"{getattr(record, 'ip', None) or '-':15} {getattr(record, 'hostname', None) or '':16} "
+        level = f"{record.levelname} " if record.levelno >= logging.WARNING else ""
+        return f"{self.formatTime(record, '%H:%M:%S')} {device}{level}{record.getMessage()}"
+
+
+# Sends all logging through one queue; returns the listener, stopped at exit
+def setup_logging(detail_path, error_path=None, verbose=False):
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(DeviceContextFilter())
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(logging.DEBUG)
+    for name in quiet_loggers:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(logging.DEBUG if verbose else logging.INFO)
+    console.setFormatter(ConsoleFormatter())
+    detail = logging.FileHandler(detail_path, encoding="utf-8", delay=True)
+    detail.setLevel(logging.DEBUG)
+    detail.setFormatter(JsonLinesFormatter())
+    handlers = [console, detail]
+    if error_path:
+        errors = logging.FileHandler(error_path, delay=True)
+        errors.setLevel(logging.ERROR)
+        errors.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handlers.append(errors)
+
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,239 @@
+# Long-running service mode with a pool of warm SSH sessions.
+#
+# Instead of one sweep that logs into every device and exits, the service keeps
+# an authenticated session per device and runs jobs (inventory, interface counts,
+# arbitrary commands) against it. Sessions idle for longer than idle_timeout are
+# closed, the others are probed every keepalive_interval so dead ones are
+# dropped before a job trips over them. Jobs are posted as JSON over HTTP:
+#
+#   curl -s localhost:8765/jobs -d '{"job": "commands", "devices": ["10.0.0.1"], "commands": ["show clock"]}'
+#   curl -s localhost:8765/sessions
+#
+# A job only ever runs commands of commands.txt; "commands" picks some of them.
+# With a token in the [service] section of config.ini every request needs it:
+#
+#   [service]
+#   token = 5f2b...
+#
+#   curl -s -H "Authorization: Bearer 5f2b..." localhost:8765/sessions
+#
+# Start it with python consolidatedlistv05.py serve --http-port 8765 (works against
+# fake_ssh_server.py as well, with --port).
+
+import configparser
+import hmac
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from inventory_logging import device_logging
+
+
+class PooledSession:
+    def __init__(self):
+        self.ssh = None
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.jobs = 0
+
+
+# One session per device, used by one job at a time. connect(device) opens a
+# new authenticated session; entries are never removed, only their session.
+class SessionPool:
+    def __init__(self, connect, idle_timeout=600, keepalive_interval=60):
+        self.connect = connect
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.opened = 0
+        self.reused = 0
+        self.housekeeper = threading.Thread(target=self.housekeep, daemon=True)
+
+    def start(self):
+        self.housekeeper.start()
+
+    @contextmanager
+    def session(self, device):
+        with self.lock:
+            pooled = self.sessions.setdefault(device, PooledSession())
+        with pooled.lock:
+            if pooled.ssh is not None and not self.alive(pooled.ssh):
+                self.drop(device, pooled, "found dead")
+            if pooled.ssh is None:
+                pooled.ssh = self.connect(device)
+                self.opened += 1
+            else:
+                self.reused += 1
+            try:
+                yield pooled.ssh
+            except Exception:
+                # Whatever state the failed job left the CLI in is not worth keeping
+                self.drop(device, pooled, "job failed")
+                raise
+            finally:
+                pooled.last_used = time.monotonic()
+                pooled.jobs += 1
+
+    @staticmethod
+    def alive(ssh):
+        try:
+            return ssh.is_alive()
+        except Exception:
+            return False
+
+    def drop(self, device, pooled, reason):
+        logging.error(f'Closing pooled session of {device}: {reason}')
+        try:
+            pooled.ssh.disconnect()
+        except Exception:
+            pass
+        pooled.ssh = None
+
+    # Idle eviction and keepalive; sessions in use by a job are left alone
+    def housekeep(self):
+        while not self.stopped.wait(self.keepalive_interval):
+            with self.lock:
+                sessions = list(self.sessions.items())
+            for device, pooled in sessions:
+                if not pooled.lock.acquire(blocking=False):
+                    continue
+                try:
+                    if pooled.ssh is None:
+                        continue
+                    if time.monotonic() - pooled.last_used > self.idle_timeout:
+                        self.drop(device, pooled, f"idle for more than {self.idle_timeout}s")
+                    elif not self.alive(pooled.ssh):
+                        self.drop(device, pooled, "keepalive failed")
+                finally:
+                    pooled.lock.release()
+
+    def status(self):
+        now = time.monotonic()
+        with self.lock:
+            sessions = list(self.sessions.items())
+        return {
+            "opened": self.opened,
+            "reused": self.reused,
+            "sessions": [{"device": device, "connected": pooled.ssh is not None, "jobs": pooled.jobs,
+                          "idle_seconds": round(now - pooled.last_used, 1)} for device, pooled in sessions],
+        }
+
+    def close(self):
+        self.stopped.set()
+        with self.lock:
+            sessions = list(self.sessions.items())
+        for device, pooled in sessions:
+            with pooled.lock:
+                if pooled.ssh is not None:
+                    self.drop(device, pooled, "service stopping")
+
+
+# Runs a job on every device over pooled sessions. jobs maps a job name to
+# job(ssh, device, commands) returning something JSON serialisable.
+class JobRunner:
+    def __init__(self, pool, jobs, commands, workers=10):
+        self.pool = pool
+        self.jobs = jobs
+        self.commands = commands
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers))
+
+    def run_one(self, job, device, commands):
+        started = time.perf_counter()
+        try:
+            with device_logging(device), self.pool.session(device) as ssh:
+                result = job(ssh, device, commands)
+            return {"device": device, "ok": True, "result": result, "seconds": round(time.perf_counter() - started, 3)}
+        except Exception as e:
+            logging.error(f'Job on {device} failed: {str(e)}')
+            return {"device": device, "ok": False, "error": str(e), "seconds": round(time.perf_counter() - started, 3)}
+
+    def run(self, request):
+        if not isinstance(request, dict):
+            raise ValueError("The request must be a JSON object")
+        job = self.jobs.get(request.get("job"))
+        if job is None:
+            raise ValueError(f'Unknown job {request.get("job")!r}, use one of {", ".join(self.jobs)}')
+        devices = request.get("devices", [])
+        if not isinstance(devices, list) or not all(isinstance(device, str) for device in devices):
+            raise ValueError('"devices" must be a list of IPs or host names')
+        commands = request.get("commands") or self.commands
+        if not isinstance(commands, list) or not all(isinstance(command, str) for command in commands):
+            raise ValueError('"commands" must be a list of commands')
+        unknown = [command for command in commands if command not in self.commands]
+        if unknown:
+            raise ValueError(f'Not in commands.txt: {", ".join(unknown)}')
+        futures = [self.executor.submit(self.run_one, job, device, commands) for device in devices]
+        return {"job": request["job"], "results": [future.result() for future in futures]}
+
+
+# Token every request must bring, from the [service] section of config.ini
+def load_token(path="config.ini"):
+    config = configparser.ConfigParser()
+    config.read(path)
+    return config.get("service", "token", fallback=None) or None
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    runner = None
+    token = None
+
+    def send_json(self, status, body):
+        payload = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def authorized(self):
+        if self.token is None:
+            return True
+        if hmac.compare_digest(self.headers.get("Authorization", "").encode(), f"Bearer {self.token}".encode()):
+            return True
+        self.send_json(401, {"error": "missing or wrong token"})
+        return False
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        if self.path == "/sessions":
+            self.send_json(200, self.runner.pool.status())
+        else:
+            self.send_json(404, {"error": "use GET /sessions or POST /jobs"})
+
+    def do_POST(self):
+        if not self.authorized():
+            return
+        if self.path != "/jobs":
+            self.send_json(404, {"error": "use GET /sessions or POST /jobs"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            self.send_json(200, self.runner.run(request))
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        logging.info(format % args)
+
+
+def serve(runner, host="127.0.0.1", port=8765, token=None):
+    handler = type("BoundServiceHandler", (ServiceHandler,), {"runner": runner, "token": token})
+    server = ThreadingHTTPServer((host, port), handler)
+    runner.pool.start()
+    logging.info(f"Serving jobs on http://{host}:{port} (POST /jobs, GET /sessions), Ctrl-C to stop")
+    if token is None:
+        logging.warning("No token in the [service] section of config.ini, anyone who can reach the port can run jobs")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        runner.pool.close()
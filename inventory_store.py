@@ -0,0 +1,189 @@
+# Historical inventory store (SQLite, no extra packages).
+#
+# Every device_data record of every run is kept, tagged with its run window and
+# collection time. The columns the queries filter on (IP, hostname, serial,
+# site, model, version) are real indexed columns; the whole record is kept as
+# JSON next to them. The spreadsheet becomes one export of a run.
+#
+# Usage:
+#   python inventory_store.py export --run 2024-05-01_08-00 --output inventory.xlsx
+#   python inventory_store.py utilization --speed 10G [--site "JHB ADC"]
+#   python inventory_store.py serial-moves
+#   python inventory_store.py version-drift
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+
+from interface_tally import speed_labels
+
+
+schema = """
+CREATE TABLE IF NOT EXISTS device_records (
+    id INTEGER PRIMARY KEY,
+    run_window TEXT NOT NULL,
+    collected_at REAL NOT NULL,
+    ip TEXT NOT NULL,
+    hostname TEXT,
+    serial TEXT,
+    site TEXT,
+    region TEXT,
+    model TEXT,
+    version TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS device_records_ip ON device_records (ip, collected_at);
+CREATE INDEX IF NOT EXISTS device_records_hostname ON device_records (hostname, collected_at);
+CREATE INDEX IF NOT EXISTS device_records_serial ON device_records (serial, collected_at);
+CREATE INDEX IF NOT EXISTS device_records_run ON device_records (run_window, collected_at);
+"""
+
+
+class InventoryStore:
+    def __init__(self, path="inventory_history.db"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(schema)
+
+    def close(self):
+        self.connection.close()
+
+    def add(self, run_window, device_data):
+        row = (
+            run_window,
+            time.time(),
+            device_data['IP Address'],
+            device_data.get('Hostname'),
+            device_data.get('Serial Number'),
+            device_data.get('Site Name'),
+            device_data.get('Region'),
+            device_data.get('Model'),
+            device_data.get('Version'),
+            json.dumps(dict(device_data), default=str),
+        )
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO device_records (run_window, collected_at, ip, hostname, serial, site, region, model, version, data)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            self.connection.commit()
+
+    def runs(self):
+        query = "SELECT run_window, MIN(collected_at), COUNT(*) FROM device_records GROUP BY run_window ORDER BY MIN(collected_at)"
+        return self.connection.execute(query).fetchall()
+
+    def latest_run(self):
+        runs = self.runs()
+        return runs[-1][0] if runs else None
+
+    # device_data of a run, the latest record of an IP wins, in IP order of collection
+    def records(self, run_window):
+        query = ("SELECT data FROM device_records WHERE id IN"
+                 " (SELECT MAX(id) FROM device_records WHERE run_window = ? GROUP BY ip) ORDER BY id")
+        for (data,) in self.connection.execute(query, (run_window,)):
+            yield json.loads(data)
+
+    # (run window, site, ports up, ports in total, utilisation) per run and site
+    def utilization_trend(self, speed="10G", site=None):
+        prefix = {label: name for name, label in speed_labels.items()}[speed]
+        up = f"json_extract(data, '$.\"{prefix}_up\"')"
+        total = f"json_extract(data, '$.\"Total {speed} Ports\"')"
+        query = (f"SELECT run_window, COALESCE(site, region), SUM({up}), SUM({total}) FROM device_records"
+                 " WHERE id IN (SELECT MAX(id) FROM device_records GROUP BY run_window, ip)")
+        parameters = ()
+        if site:
+            query += " AND site = ?"
+            parameters = (site,)
+        query += " GROUP BY run_window, COALESCE(site, region) ORDER BY MIN(collected_at), 2"
+        for run_window, site_name, ports_up, ports in self.connection.execute(query, parameters):
+            yield run_window, site_name, ports_up or 0, ports or 0, (ports_up / ports) if ports else None
+
+    # (serial, ip, hostname, first seen, last seen) for serials seen on more than one device
+    def serial_moves(self):
+        query = ("SELECT serial, ip, hostname, MIN(collected_at), MAX(collected_at) FROM device_records"
+                 " WHERE serial IN (SELECT serial FROM device_records WHERE serial IS NOT NULL"
+                 " GROUP BY serial HAVING COUNT(DISTINCT ip || '/' || COALESCE(hostname, '')) > 1)"
+                 " GROUP BY serial, ip, hostname ORDER BY serial, MIN(collected_at)")
+        return self.connection.execute(query).fetchall()
+
+    # (ip, hostname, old version, new version, changed at) for every version change
+    def version_changes(self):
+        query = ("SELECT ip, hostname, previous, version, collected_at FROM"
+                 " (SELECT ip, hostname, version, collected_at,"
+                 "  LAG(version) OVER (PARTITION BY ip ORDER BY collected_at) AS previous FROM device_records"
+                 "  WHERE version IS NOT NULL)"
+                 " WHERE previous IS NOT NULL AND previous != version ORDER BY collected_at")
+        return self.connection.execute(query).fetchall()
+
+    # (model, version, devices) in a run, for models running more than one version
+    def version_spread(self, run_window):
+        query = ("SELECT model, version, COUNT(*) FROM device_records"
+                 " WHERE id IN (SELECT MAX(id) FROM device_records WHERE run_window = ? GROUP BY ip)"
+                 " AND model IN (SELECT model FROM device_records WHERE run_window = ? AND version IS NOT NULL"
+                 " GROUP BY model HAVING COUNT(DISTINCT version) > 1)"
+                 " GROUP BY model, version ORDER BY model, COUNT(*) DESC")
+        return self.connection.execute(query, (run_window, run_window)).fetchall()
+
+
+# Writes one run to an inventory file, the format follows the extension
+def export_run(store, run_window, output, template, max_cards=64):
+    from inventory_writer import open_inventory_writer
+
+    with open_inventory_writer(output, template, max_cards) as writer:
+        for device_data in store.records(run_window):
+            writer.write(device_data)
+    return writer.rows
+
+
+def format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query and export the inventory history")
+    parser.add_argument("--store", default="inventory_history.db", help="history database (default: inventory_history.db)")
+    subparsers = parser.add_subparsers(dest="query", required=True)
+    export_parser = subparsers.add_parser("export", help="write one run to .xlsx, .csv or .parquet")
+    export_parser.add_argument("--run", help="run window to export (default: the latest)")
+    export_parser.add_argument("--output", required=True, help="output file, the format follows the extension")
+    export_parser.add_argument("--max-cards", type=int, default=64, help="MOD CARD and MPA CARD columns laid out up front, devices with more cards add theirs (default: 64)")
+    utilization_parser = subparsers.add_parser("utilization", help="port utilisation per run and site")
+    utilization_parser.add_argument("--speed", choices=list(speed_labels.values()), default="10G", help="port speed (default: 10G)")
+    utilization_parser.add_argument("--site", help="only this site")
+    subparsers.add_parser("serial-moves", help="serial numbers seen on more than one device")
+    drift_parser = subparsers.add_parser("version-drift", help="version changes per device and models on mixed versions")
+    drift_parser.add_argument("--run", help="run window for the per-model spread (default: the latest)")
+    subparsers.add_parser("runs", help="list the stored runs")
+    args = parser.parse_args()
+
+    store = InventoryStore(args.store)
+    if args.query == "export":
+        from device_record import device_data_template
+
+        run_window = args.run or store.latest_run()
+        rows = export_run(store, run_window, args.output, device_data_template, args.max_cards)
+        print(f"Run {run_window}: {rows} devices written to {args.output}")
+
+    elif args.query == "utilization":
+        for run_window, site_name, ports_up, ports, utilization in store.utilization_trend(args.speed, args.site):
+            shown = f"{utilization:.1%}" if utilization is not None else "-"
+            print(f"{run_window:20} {str(site_name):20} {ports_up:6} / {ports:<6} {shown}")
+
+    elif args.query == "serial-moves":
+        for serial, ip, hostname, first_seen, last_seen in store.serial_moves():
+            print(f"{serial:20} {ip:16} {str(hostname):24} {format_time(first_seen)} .. {format_time(last_seen)}")
+
+    elif args.query == "version-drift":
+        print("Version changes:")
+        for ip, hostname, previous, version, changed_at in store.version_changes():
+            print(f"  {format_time(changed_at)} {ip:16} {str(hostname):24} {previous} -> {version}")
+        run_window = args.run or store.latest_run()
+        print(f"Models on more than one version in {run_window}:")
+        for model, version, devices in store.version_spread(run_window):
+            print(f"  {str(model):24} {version:24} {devices}")
+
+    elif args.query == "runs":
+        for run_window, started_at, devices in store.runs():
+            print(f"{run_window:20} {format_time(started_at)} {devices} records")
@@ -0,0 +1,241 @@
+# Streaming output stage for the inventory.
+#
+# Rows are written as devices complete instead of piling up as dicts, then a
+# DataFrame, then a workbook at the end of the run. The column order is fixed up
+# front from the device_data template, so every format gets the same layout:
+#   .xlsx    openpyxl write-only workbook
+#   .csv     csv module, flushed per row
+#   .parquet pyarrow, written in row groups (needs the pyarrow package)
+#
+# A device with more MOD or MPA cards than --max-cards widens the layout: the
+# new card columns are added at the end while streaming, and when the file is
+# closed it is rewritten once with every card column next to its kind, so no
+# card is ever left out.
+
+import csv
+import logging
+import os
+
+from device_record import card_column, card_kinds, is_card_column
+
+
+# Template columns followed by the numbered MOD / MPA card columns
+def inventory_columns(template, max_cards=64):
+    columns = list(template)
+    columns += [card_column("MOD", counter) for counter in range(1, max_cards + 1)]
+    columns += [card_column("MPA", counter) for counter in range(1, max_cards + 1)]
+    return columns
+
+
+# Columns in layout order: everything but the cards as it came, then the MOD
+# cards and the MPA cards by number
+def layout_order(columns):
+    ordered = [column for column in columns if not is_card_column(column)]
+    for kind in card_kinds:
+        cards = [column for column in columns if column.startswith(f"{kind} ") and is_card_column(column)]
+        ordered += sorted(cards, key=lambda column: int(column.partition(" CARD0")[2]))
+    return ordered
+
+
+class InventoryWriter:
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.known = set(columns)
+        self.reported = set()
+        self.widened = False
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def row_values(self, device_data):
+        extra = [key for key in device_data if key not in self.known and key not in self.reported]
+        cards = [key for key in extra if is_card_column(key)]
+        for key in extra:
+            if key not in cards:
+                logging.error(f'Column "{key}" of {device_data.get("IP Address")} is not in the inventory layout and was left out')
+                self.reported.add(key)
+        if cards:
+            logging.info(f'{device_data.get("IP Address")} has more cards than the layout, adding {", ".join(cards)}')
+            self.widen(cards)
+        return [device_data.get(column) for column in self.columns]
+
+    def widen(self, columns):
+        self.columns = self.columns + columns
+        self.known.update(columns)
+        self.widened = True
+
+    # Row of the widened layout (earlier rows are shorter) in layout order
+    def reordered(self, row, order):
+        row = list(row) + [None] * (len(self.columns) - len(row))
+        return [row[index] for index in order]
+
+    def final_layout(self):
+        ordered = layout_order(self.columns)
+        position = {column: index for index, column in enumerate(self.columns)}
+        return ordered, [position[column] for column in ordered]
+
+    def write(self, device_data):
+        self.write_values(self.row_values(device_data))
+        self.rows += 1
+
+    def write_values(self, values):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class XlsxStreamWriter(InventoryWriter):
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        import openpyxl
+
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("Inventory")
+        self.sheet.append(columns)
+
+    def write_values(self, values):
+        self.sheet.append(values)
+
+    def close(self):
+        self.workbook.save(self.path)
+        if self.widened:
+            self.rewrite()
+
+    def rewrite(self):
+        import openpyxl
+
+        columns, order = self.final_layout()
+        source = openpyxl.load_workbook(self.path, read_only=True)
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet("Inventory")
+        sheet.append(columns)
+        rows = source["Inventory"].iter_rows(values_only=True)
+        next(rows)
+        for row in rows:
+            sheet.append(self.reordered(row, order))
+        source.close()
+        temporary = self.path + ".tmp"
+        workbook.save(temporary)
+        os.replace(temporary, self.path)
+
+
+class CsvStreamWriter(InventoryWriter):
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write_values(self, values):
+        self.writer.writerow(["" if value is None else value for value in values])
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+        if self.widened:
+            self.rewrite()
+
+    def rewrite(self):
+        columns, order = self.final_layout()
+        temporary = self.path + ".tmp"
+        with open(self.path, newline="", encoding="utf-8") as source, open(temporary, "w", newline="", encoding="utf-8") as target:
+            reader = csv.reader(source)
+            writer = csv.writer(target)
+            next(reader)
+            writer.writerow(columns)
+            for row in reader:
+                writer.writerow(["" if value is None else value for value in self.reordered(row, order)])
+        os.replace(temporary, self.path)
+
+
+class ParquetStreamWriter(InventoryWriter):
+    def __init__(self, path, columns, template, batch_size=500):
+        super().__init__(path, columns)
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.parquet = pyarrow.parquet
+        self.template = template
+        self.schema = self.schema_of(columns)
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        self.batch_size = batch_size
+        self.batch = []
+        # Files written before each widening of the layout, merged on close
+        self.parts = []
+
+    # Counters are integers, utilisation is a ratio, everything else is text
+    def schema_of(self, columns):
+        fields = []
+        for column in columns:
+            default = self.template.get(column)
+            if column.endswith("Utilization (%)"):
+                fields.append(self.pyarrow.field(column, self.pyarrow.float64()))
+            elif isinstance(default, int):
+                fields.append(self.pyarrow.field(column, self.pyarrow.int64()))
+            else:
+                fields.append(self.pyarrow.field(column, self.pyarrow.string()))
+        return self.pyarrow.schema(fields)
+
+    # The schema of a parquet file is fixed, so the rows so far are closed off
+    # in a part file and the rest goes on with the wider schema
+    def widen(self, columns):
+        self.flush()
+        self.writer.close()
+        part = f"{self.path}.part{len(self.parts)}"
+        os.replace(self.path, part)
+        self.parts.append(part)
+        super().widen(columns)
+        self.schema = self.schema_of(self.columns)
+        self.writer = self.parquet.ParquetWriter(self.path, self.schema)
+
+    def write_values(self, values):
+        self.batch.append(values)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        arrays = [self.pyarrow.array([row[index] for row in self.batch], type=field.type)
+                  for index, field in enumerate(self.schema)]
+        self.writer.write_table(self.pyarrow.Table.from_arrays(arrays, schema=self.schema))
+        self.batch = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+        if self.widened:
+            self.rewrite()
+
+    def rewrite(self):
+        columns, _ = self.final_layout()
+        schema = self.schema_of(columns)
+        last = f"{self.path}.part{len(self.parts)}"
+        os.replace(self.path, last)
+        with self.parquet.ParquetWriter(self.path, schema) as writer:
+            for part in self.parts + [last]:
+                for batch in self.parquet.ParquetFile(part).iter_batches():
+                    arrays = [batch.column(field.name) if field.name in batch.schema.names else self.pyarrow.nulls(batch.num_rows, field.type)
+                              for field in schema]
+                    writer.write_table(self.pyarrow.Table.from_arrays(arrays, schema=schema))
+                os.remove(part)
+
+
+# Picks the writer from the file extension
+def open_inventory_writer(path, template, max_cards=64):
+    columns = inventory_columns(template, max_cards)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".xlsx":
+        return XlsxStreamWriter(path, columns)
+    if extension == ".csv":
+        return CsvStreamWriter(path, columns)
+    if extension == ".parquet":
+        return ParquetStreamWriter(path, columns, template)
+    raise ValueError(f"Unsupported inventory format {extension}, use .xlsx, .csv or .parquet")
@@ -0,0 +1,58 @@
+# Parsing in worker processes, fed by the SSH sessions.
+#
+# The parsers are pure Python and regex heavy. On the threads backend a huge
+# XR output parsed in one worker holds the GIL the other sessions need, and on
+# the asyncio backend it stalls the event loop. With --parse-processes the
+# sessions only send commands; their outputs go to a ProcessPoolExecutor that
+# runs collect_device_data over a RecordedSession, exactly as replay does, on
+# every core of the collector box.
+#
+# At most max_pending captures are queued or parsing at once. A session with
+# output beyond that blocks until a slot frees up (backpressure), so memory stays
+# bounded when parsing falls behind the network. A command the plan missed comes
+# back as CommandNeeded; the session sends it and the capture is parsed again.
+#
+# The workers come from a forkserver (spawn where there is none), never a plain
+# fork: they start at the first capture, when SSH threads, the event loop and
+# the logging listener are already running, and a fork then could copy a lock
+# one of them holds.
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from inventory_logging import collect_records, restore_records
+from raw_store import RecordedSession
+
+
+def worker_context():
+    return multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+# Runs in a worker: (device_data, extra output, log records as dicts)
+def parse_capture(device, prompt, outputs, commands):
+    from consolidatedlistv05 import collect_device_data
+
+    extra_output = []
+    with collect_records() as entries:
+        device_data = collect_device_data(RecordedSession(prompt, outputs), device, commands, extra_output)
+    return device_data, extra_output, entries
+
+
+class ParsePool:
+    def __init__(self, processes=None, max_pending=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.processes
+        self.executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=worker_context())
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+
+    # Blocks while max_pending captures are already queued or parsing. Raises
+    # CommandNeeded when the parsers asked for a command outside outputs.
+    def parse(self, device, prompt, outputs, commands):
+        with self.slots:
+            device_data, extra_output, entries = self.executor.submit(parse_capture, device, prompt, outputs, commands).result()
+        return device_data, extra_output, restore_records(entries)
+
+    def close(self):
+        self.executor.shutdown()
@@ -0,0 +1,166 @@
+# Table-driven parsers for show version / inventory / platform / bundle output.
+#
+# Every pattern is compiled once at import time. Each OS family declares its
+# extraction rules as data, (field, pattern, group) in priority order, and a
+# FieldMatcher applies them the way the inline re.search chains did.
+
+import re
+
+
+# Compiled (field, pattern, group) rules. Every rule is its own search, so a
+# match of one rule never hides an overlapping match of another; when a field
+# has more than one rule the first rule that matches anywhere wins.
+class FieldMatcher:
+    def __init__(self, rules, flags=0):
+        self.rules = [(field, re.compile(pattern, flags), group) for field, pattern, group in rules]
+
+    def match(self, text):
+        found = {}
+        for field, pattern, group in self.rules:
+            if field in found:
+                continue
+            match = pattern.search(text)
+            if match:
+                found[field] = match.group(group)
+        return found
+
+
+# Hostname at the end of the CLI prompt
+hostname_pattern = re.compile(r"([\w\d_-]+)#$")
+
+# Decides between the IOS XR and IOS XE branches of show version
+ios_version_pattern = re.compile(r"Cisco IOS \s*(\S+) Software, Version (.+?)(\[|\n)")
+
+model_suffix_pattern = re.compile(r"\s*\(.*")
+
+# show version rules per OS family
+show_version_rules = {
+    "IOS-XE": FieldMatcher([
+        ("Serial Number", r"Processor board ID (\S+)", 1),
+        ("Model", r"cisco (.+?) processor", 1),
+    ]),
+    "7600/7300": FieldMatcher([
+        ("Version", r"Version (.+?),", 1),
+        ("Serial Number", r"Processor board ID (\S+)", 1),
+        ("Model", r"Cisco (.+?) processor", 1),
+        ("Model", r"cisco (.+?) processor", 1),
+    ]),
+    "NX-OS": FieldMatcher([
+        ("Version", r"kickstart: version\s*(\S+)", 1),
+        ("Serial Number", r"Processor Board ID (\S+)", 1),
+        ("Model", r"(?i:cisco\s+(\S+)\s+(?:Chassis\s+)?(?:\(\".*\"\)|supervisor|Slot))", 1),
+    ]),
+    "IOS": FieldMatcher([
+        ("Version", r"Version (.+?),", 1),
+        ("Serial Number", r"Processor board ID (\S+)", 1),
+        ("Model", r"(?i:cisco (.+?) with)", 1),
+    ]),
+    "IOS (Internetwork)": FieldMatcher([
+        ("Version", r"Version (.+?),", 1),
+        ("Serial Number", r"Processor board ID (\S+)", 1),
+        ("Model", r"cisco\s+(\d+/\S+)", 1),
+    ]),
+}
+
+# Banner keywords of the remaining show version outputs, checked in this order
+show_version_keywords = [
+    ("Nexus", "NX-OS"),
+    ("Cisco IOS-XE software", "IOS"),
+    ("Cisco IOS Software", "IOS"),
+    ("Cisco Internetwork", "IOS (Internetwork)"),
+]
+
+# Chassis serial and PID from show inventory / admin show inventory chassis.
+# "SN: X" at the end of a line is preferred over any other "SN:" field.
+chassis_inventory_rules = FieldMatcher([
+    ("Serial Number", r"SN: (\S+)[\n\r]", 1),
+    ("Serial Number", r"SN:\s*(\S+)", 1),
+    ("Model", r"PID: \s*(\S+)", 1),
+])
+
+nexus_inventory_serial_pattern = re.compile(r"Hw Serial#: (\S+)")
+
+# "uptime is 1 year, 2 weeks, 3 days, 4 hours, 5 minutes" (IOS / IOS-XE / IOS-XR)
+# and "Kernel uptime is 12 day(s), 3 hour(s), 4 minute(s), 5 second(s)" (NX-OS)
+uptime_pattern = re.compile(r"uptime is ([^\n]+)")
+uptime_unit_pattern = re.compile(r"(\d+)\s+(year|week|day|hour|minute|second)")
+uptime_unit_seconds = {"year": 365 * 86400, "week": 7 * 86400, "day": 86400, "hour": 3600, "minute": 60, "second": 1}
+
+# show etherchannel summary (IOS / IOS-XE) and show port-channel summary (NX-OS)
+bundle_line_pattern = re.compile(r"^\s*\d+\s+(Po\d+)\((\w+)\)(.*)$")
+bundle_member_pattern = re.compile(r"(\S+?)\((\w+)\)")
+
+# show platform
+platform_slot_pattern = re.compile(r"0/(RSP0|RSP1|RP0|RP1)/CPU0\s+(\S+)")
+mod_card_pattern = re.compile(r"(\S+-MOD\S+)")
+mpa_card_pattern = re.compile(r"(?i)(\s\S+\s*(X10GE|X1GE|FLEX|X100GE|LC))")
+mpa_card_keywords = ['X10GE', 'X1GE', 'FLEX', 'X100GE', 'x10GE']
+
+
+def clean_model(model):
+    return model_suffix_pattern.sub("", model)
+
+
+# Version / Serial Number / Model of a show version output, for one family
+def parse_show_version(family, output):
+    fields = show_version_rules[family].match(output)
+    if "Model" in fields:
+        fields["Model"] = clean_model(fields["Model"])
+    return fields
+
+
+def parse_chassis_inventory(output):
+    fields = chassis_inventory_rules.match(output)
+    if "Model" in fields:
+        fields["Model"] = fields["Model"].rstrip(",")
+    return fields
+
+
+# Uptime in seconds from show version, None when it has no uptime line
+def parse_uptime(output):
+    uptime_match = uptime_pattern.search(output)
+    if not uptime_match:
+        return None
+    return sum(int(count) * uptime_unit_seconds[unit] for count, unit in uptime_unit_pattern.findall(uptime_match.group(1)))
+
+
+# RSP/RP slots plus MOD and MPA cards of show platform, in the order they appear
+def parse_platform(output):
+    slots = {}
+    mod_cards = []
+    mpa_cards = []
+    for line in output.splitlines():
+        slot_match = platform_slot_pattern.search(line)
+        if slot_match:
+            slots[slot_match.group(1)] = slot_match.group(2)
+
+        if 'MOD' in line:
+            mod_card_match = mod_card_pattern.search(line)
+            if mod_card_match:
+                mod_cards.append(mod_card_match.group(1))
+
+        if 'LC' in line or any(keyword in line for keyword in mpa_card_keywords):
+            mpa_card_match = mpa_card_pattern.search(line)
+            if mpa_card_match:
+                mpa_cards.append(mpa_card_match.group(1))
+
+    return slots, mod_cards, mpa_cards
+
+
+# Port-channel -> {'flags': 'SU', 'members': ['Gi0/1', ...]} from a bundle summary.
+# Members wrapped onto continuation lines belong to the port-channel above them.
+def parse_bundle_summary(output):
+    bundles = {}
+    current = None
+    for line in output.splitlines():
+        bundle_match = bundle_line_pattern.match(line)
+        if bundle_match:
+            current = bundles[bundle_match.group(1)] = {'flags': bundle_match.group(2), 'members': []}
+            rest = bundle_match.group(3)
+        elif current is not None and line[:1].isspace():
+            rest = line
+        else:
+            current = None
+            continue
+        current['members'].extend(member for member, flags in bundle_member_pattern.findall(rest))
+    return bundles
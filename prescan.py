@@ -0,0 +1,130 @@
+# Device list expansion and the reachability pre-scan.
+#
+# The device list may hold, one per line, IPs, host names, CIDR ranges (every
+# host address of the range) and the names of further lists, e.g.
+#
+#   10.20.0.0/28
+#   kpe9906m.example.net
+#   regions/kzn.txt
+#   failed_devices_2024-05-01_08-00.csv
+#
+# Lines starting with # are comments, failure manifests contribute their ip
+# column, and every device is kept once, at its first position. --devices takes
+# a CIDR range or a single device directly as well; a list that does not exist
+# is an error, not a device.
+#
+# Before any SSH session is opened, every device gets a TCP connect to the SSH
+# port with a short timeout, hundreds at a time on one event loop. Devices that
+# refuse or time out go straight to the failure manifest as unreachable instead
+# of costing a worker a full SSHDetect connect timeout each.
+
+import ipaddress
+import os
+import re
+import time
+
+from retry_policy import load_device_list
+
+
+# Larger ranges are almost certainly a typo for a longer prefix
+max_range_hosts = 65536
+
+# Host names as netmiko accepts them; anything all digits and dots must be an IP
+host_name_pattern = re.compile(r"(?i)^[a-z0-9](?:[a-z0-9-]{0,62})(?:\.[a-z0-9-]{1,63})*$")
+address_like_pattern = re.compile(r"[\d.]+|[\da-fA-F:.]*:[\da-fA-F:.]*")
+
+
+# Names of device lists, as opposed to a device: a .txt or .csv name or a path
+list_suffixes = (".txt", ".csv")
+
+
+def looks_like_list(source):
+    return source.lower().endswith(list_suffixes) or "/" in source or os.sep in source
+
+
+# Every device of a list file, CIDR range or single entry, duplicates included.
+# Relative list names inside a file are relative to that file. A list name
+# that does not exist raises FileNotFoundError instead of becoming a device.
+def device_entries(source, directory="", seen_files=None):
+    seen_files = seen_files if seen_files is not None else set()
+    path = os.path.join(directory, source)
+    if os.path.isfile(path):
+        real_path = os.path.realpath(path)
+        if real_path in seen_files:
+            return
+        seen_files.add(real_path)
+        for line in load_device_list(path):
+            if not line.startswith("#"):
+                yield from device_entries(line, os.path.dirname(path), seen_files)
+    elif "/" in source and address_like_pattern.fullmatch(source.split("/", 1)[0]):
+        network = ipaddress.ip_network(source, strict=False)
+        if network.num_addresses > max_range_hosts:
+            raise ValueError(f"{source} has {network.num_addresses} addresses, split it into ranges of at most {max_range_hosts}")
+        # A /32 (or /128) is its own host
+        for address in (network.hosts() if network.num_addresses > 2 else network):
+            yield str(address)
+    elif looks_like_list(source):
+        raise FileNotFoundError(f"No device list {path}")
+    elif address_like_pattern.fullmatch(source):
+        try:
+            yield str(ipaddress.ip_address(source))
+        except ValueError:
+            yield source
+    else:
+        yield source
+
+
+# Devices of a list, each once, in the order they first appear
+def load_devices(source):
+    return list(dict.fromkeys(device_entries(source)))
+
+
+# Why an entry cannot be a device, or None when it looks fine
+def entry_problem(entry):
+    if address_like_pattern.fullmatch(entry):
+        try:
+            ipaddress.ip_address(entry)
+        except ValueError:
+            return "Not an IP address"
+        return None
+    if not host_name_pattern.match(entry):
+        return "Neither an IP address nor a host name"
+    return None
+
+
+async def probe(host, port, timeout):
+    import asyncio
+
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except asyncio.TimeoutError:
+        return f"No answer on TCP port {port} within {timeout:g}s"
+    except OSError as e:
+        return f"TCP port {port}: {e.strerror or e}"
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return None
+
+
+# Probes all hosts, at most concurrency at a time.
+# Returns (live hosts in list order, {host: error} of the others, seconds taken).
+def prescan(hosts, port=22, timeout=3, concurrency=512):
+    import asyncio
+
+    async def scan():
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def probe_one(host):
+            async with semaphore:
+                return await probe(host, port, timeout)
+
+        return await asyncio.gather(*(probe_one(host) for host in hosts))
+
+    started = time.perf_counter()
+    errors = asyncio.run(scan()) if hosts else []
+    live = [host for host, error in zip(hosts, errors) if error is None]
+    unreachable = {host: error for host, error in zip(hosts, errors) if error is not None}
+    return live, unreachable, time.perf_counter() - started
@@ -0,0 +1,110 @@
+# Raw CLI output store, so capture and parsing can run separately.
+#
+# In capture mode every command the parsers send is recorded with its output
+# and saved per device as a gzipped JSON file under raw_captures/. Replay mode
+# feeds those files back through the same parsers via RecordedSession, with no
+# SSH at all, so a regex fix can be checked against the whole network in seconds.
+
+import gzip
+import json
+import os
+import threading
+import time
+from urllib.parse import quote, unquote
+
+
+class CommandNeeded(Exception):
+    def __init__(self, command):
+        super().__init__(command)
+        self.command = command
+
+
+# Stands in for a netmiko connection and answers from outputs that were already
+# fetched or captured. Anything else raises CommandNeeded.
+class RecordedSession:
+    def __init__(self, prompt, outputs=None):
+        self.prompt = prompt
+        self.outputs = outputs if outputs is not None else {}
+
+    def find_prompt(self):
+        return self.prompt
+
+    def send_command(self, command, **kwargs):
+        if command not in self.outputs:
+            raise CommandNeeded(command)
+        return self.outputs[command]
+
+
+# Wraps a live session and keeps the prompt and every command output it returns
+class CaptureSession:
+    def __init__(self, ssh):
+        self.ssh = ssh
+        self.prompt = None
+        self.outputs = {}
+
+    def find_prompt(self, *args, **kwargs):
+        self.prompt = self.ssh.find_prompt(*args, **kwargs)
+        return self.prompt
+
+    def send_command(self, command, *args, **kwargs):
+        output = self.ssh.send_command(command, *args, **kwargs)
+        self.outputs[command] = output
+        return output
+
+    def __getattr__(self, name):
+        return getattr(self.ssh, name)
+
+
+class RawOutputStore:
+    def __init__(self, directory="raw_captures"):
+        self.directory = directory
+        self.lock = threading.Lock()
+
+    # IPv6 colons, slashes and percent signs are percent-encoded, so the name
+    # reverses exactly, underscores in host names included
+    def path_for(self, device):
+        return os.path.join(self.directory, f"{quote(device, safe='')}.json.gz")
+
+    # Captures written before the names were percent-encoded had ':' as '_'
+    def legacy_path_for(self, device):
+        return os.path.join(self.directory, f"{device.replace(':', '_')}.json.gz")
+
+    def save(self, device, prompt, outputs):
+        capture = {
+            "device": device,
+            "captured_at": time.time(),
+            "prompt": prompt,
+            "outputs": outputs,
+        }
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(device)
+        temp_path = f"{path}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as capture_file:
+            json.dump(capture, capture_file)
+        os.replace(temp_path, path)
+
+    def load(self, device):
+        for path in (self.path_for(device), self.legacy_path_for(device)):
+            if os.path.exists(path):
+                return self.read(path)
+        return None
+
+    def read(self, path):
+        with gzip.open(path, "rt", encoding="utf-8") as capture_file:
+            return json.load(capture_file)
+
+    # Devices with a capture on disk. A name with '_' may be an old capture
+    # whose ':' were replaced, so those take the device stored in the file.
+    def devices(self):
+        if not os.path.isdir(self.directory):
+            return []
+        devices = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json.gz"):
+                continue
+            device = unquote(name[:-len(".json.gz")])
+            if "_" in device:
+                device = self.read(os.path.join(self.directory, name)).get("device", device)
+            devices.append(device)
+        return devices
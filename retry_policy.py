@@ -0,0 +1,97 @@
+# Failure classification, retries and the failure manifest.
+#
+# A failed device is classified from how its DeviceTiming ended (status, the
+# phase that raised, the error) into one of:
+#   unreachable           no TCP / SSH session could be opened
+#   auth                  the credentials were refused, never retried (lockouts)
+#   prompt-detect         logged in, but SSHDetect or the prompt never settled
+#   mid-command timeout   a command stopped answering or the device budget ran out
+#   error                 anything else, e.g. a parser failure, not retried either
+# The retryable classes are tried again with full-jitter exponential backoff as
+# long as the run's retry budget lasts. Devices that still failed are written
+# to a CSV manifest (ip,failure_class,phase,attempts,error) that --devices
+# accepts as the device list of the next run.
+
+import csv
+import os
+import random
+import re
+import threading
+import time
+
+
+retryable_classes = ("unreachable", "prompt-detect", "mid-command timeout")
+
+manifest_fields = ["ip", "failure_class", "phase", "attempts", "error"]
+
+# Phases of DeviceTiming before a usable prompt exists
+connect_phases = ("detect", "login")
+
+prompt_errors = re.compile(r"(?i)pattern not detected|find_prompt|prompt|autodetect|unable to (?:detect|determine)")
+unreachable_errors = re.compile(r"(?i)connection (?:refused|reset|closed|lost)|no route to host|network is unreachable|protocol banner|tcp connection")
+
+
+def classify_failure(status, error=None, phase=None):
+    error = error or ""
+    if status == "auth":
+        return "auth"
+    if status == "timeout":
+        return "unreachable"
+    if status in ("read_timeout", "budget"):
+        return "prompt-detect" if phase in connect_phases else "mid-command timeout"
+    if phase == "detect" or prompt_errors.search(error):
+        return "prompt-detect"
+    if phase == "login" and unreachable_errors.search(error):
+        return "unreachable"
+    return "error"
+
+
+# First line of an error, netmiko adds paragraphs of common causes
+def short_error(error):
+    lines = str(error or "").strip().splitlines()
+    return lines[0] if lines else ""
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=3, base_delay=5, max_delay=120, budget=1800):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = time.monotonic() + budget if budget else None
+
+    # Seconds to wait before attempt + 1, or None when the device is given up on
+    def delay(self, failure_class, attempt):
+        if failure_class not in retryable_classes or attempt >= self.max_attempts:
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if self.deadline is not None and time.monotonic() + delay > self.deadline:
+            return None
+        return delay
+
+
+# Appends one row per device given up on; safe to share between workers
+class FailureManifest:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.failures = 0
+
+    def add(self, ip, failure_class, phase, attempts, error):
+        with self.lock:
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a", newline="", encoding="utf-8") as manifest_file:
+                writer = csv.writer(manifest_file)
+                if new_file:
+                    writer.writerow(manifest_fields)
+                writer.writerow([ip, failure_class, phase or "", attempts, short_error(error)])
+            self.failures += 1
+
+
+# Device list: one IP per line, or a failure manifest (its ip column)
+def load_device_list(path):
+    with open(path, newline="", encoding="utf-8") as device_file:
+        first_line = device_file.readline()
+        device_file.seek(0)
+        if first_line.strip().split(",")[0].lower() == "ip":
+            return [row["ip"].strip() for row in csv.DictReader(device_file) if row["ip"].strip()]
+        return [line.strip() for line in device_file if line.strip()]
@@ -0,0 +1,215 @@
+# Fair, rate limited scheduling of devices per region or subnet.
+#
+# Devices are grouped by the most specific subnet of a [scheduler <cidr>]
+# section, else by their region from the last run, else they share the default
+# group. Every group has its own concurrency cap and login rate, the groups are
+# served round robin so one big region cannot starve the others, and a group
+# whose logins start failing with authentication errors or connect timeouts
+# (a struggling TACACS server, a saturated regional link) is slowed down until
+# it recovers. Configured in config.ini:
+#
+#   [scheduler]
+#   concurrency = 20
+#   logins_per_minute = 60
+#
+#   [scheduler 172.30.0.0/15]
+#   concurrency = 4
+#   logins_per_minute = 20
+#
+#   [scheduler region KZN]
+#   concurrency = 5
+
+import configparser
+import heapq
+import ipaddress
+import logging
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from timing import DeviceTiming
+
+
+# Statuses of DeviceTiming that point at the TACACS servers or the link rather than the device
+backoff_statuses = ("auth", "timeout")
+
+# What work() returns to have its device started again after delay seconds
+Retry = namedtuple("Retry", "delay")
+
+
+class DeviceGroup:
+    def __init__(self, name, concurrency=20, logins_per_minute=60, window=20, min_samples=5, spike_threshold=0.3, cooldown=30, max_backoff=16):
+        self.name = name
+        self.concurrency = concurrency
+        self.login_interval = 60 / logins_per_minute if logins_per_minute else 0
+        self.outcomes = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.spike_threshold = spike_threshold
+        self.cooldown = cooldown
+        self.max_backoff = max_backoff
+        self.backoff = 1
+        self.devices = deque()
+        # (time it may start again, index, device, attempt) of devices waiting to be retried
+        self.retries = []
+        self.active = 0
+        self.next_login = 0.0
+
+    # Sessions allowed at once; halved every time the group backs off
+    def capacity(self):
+        return max(1, self.concurrency // self.backoff)
+
+    def pending(self):
+        return bool(self.devices or self.retries or self.active)
+
+    # Retries whose wait is over queue up behind the devices not started yet
+    def release_retries(self, now):
+        while self.retries and self.retries[0][0] <= now:
+            _, index, device, attempt = heapq.heappop(self.retries)
+            self.devices.append((index, device, attempt))
+
+    def retry(self, index, device, attempt, at):
+        heapq.heappush(self.retries, (at, index, device, attempt))
+
+    def ready(self, now):
+        return bool(self.devices) and self.active < self.capacity() and now >= self.next_login
+
+    def start(self, now):
+        self.active += 1
+        self.next_login = max(self.next_login, now) + self.login_interval * self.backoff
+        return self.devices.popleft()
+
+    def finish(self, status, now):
+        self.active -= 1
+        self.outcomes.append(status in backoff_statuses)
+        failure_rate = sum(self.outcomes) / len(self.outcomes)
+        if len(self.outcomes) >= self.min_samples and failure_rate > self.spike_threshold:
+            if self.backoff < self.max_backoff:
+                self.backoff *= 2
+            self.next_login = now + self.cooldown
+            self.outcomes.clear()
+            logging.error(f'{failure_rate:.0%} of logins in {self.name} failed, pausing {self.cooldown}s and slowing it down {self.backoff}x')
+        elif self.backoff > 1 and len(self.outcomes) == self.outcomes.maxlen and failure_rate <= self.spike_threshold / 2:
+            self.backoff //= 2
+            self.outcomes.clear()
+            logging.info(f'{self.name} recovered, speeding it up to 1/{self.backoff} of its limits')
+
+
+class DeviceScheduler:
+    def __init__(self, defaults=None, subnets=None, regions=None):
+        self.defaults = defaults or {}
+        # Most specific subnet first
+        self.subnets = sorted((subnets or {}).items(), key=lambda item: item[0].prefixlen, reverse=True)
+        self.regions = regions or {}
+        self.groups = {}
+
+    @classmethod
+    def load(cls, path="config.ini"):
+        config = configparser.ConfigParser()
+        config.read(path)
+        if not any(section == "scheduler" or section.startswith("scheduler ") for section in config.sections()):
+            return None
+
+        def limits(section):
+            options = {}
+            for option, convert in (("concurrency", int), ("logins_per_minute", float), ("spike_threshold", float), ("cooldown", float)):
+                if config.has_option(section, option):
+                    options[option] = convert(config.get(section, option))
+            return options
+
+        defaults = limits("scheduler") if config.has_section("scheduler") else {}
+        subnets = {}
+        regions = {}
+        for section in config.sections():
+            kind, _, name = section.partition(" ")
+            if kind != "scheduler" or not name:
+                continue
+            if name.startswith("region "):
+                regions[name[len("region "):].strip()] = {**defaults, **limits(section)}
+            else:
+                subnets[ipaddress.ip_network(name.strip(), strict=False)] = {**defaults, **limits(section)}
+        return cls(defaults, subnets, regions)
+
+    def group_for(self, device, region=None):
+        try:
+            address = ipaddress.ip_address(device)
+        except ValueError:
+            address = None
+        for network, options in self.subnets:
+            if address is not None and address.version == network.version and address in network:
+                return self.group(str(network), options)
+        if region and region != "Unknown":
+            return self.group(f"region {region}", self.regions.get(region, self.defaults))
+        return self.group("default", self.defaults)
+
+    def group(self, name, options):
+        if name not in self.groups:
+            self.groups[name] = DeviceGroup(name, **options)
+        return self.groups[name]
+
+    # Runs work(device, timing, attempt) for every device on at most workers
+    # threads and yields (index in ips, result) as each one finishes. regions
+    # maps an IP to its region from an earlier run. When work returns
+    # Retry(delay) the device goes back to its group and is started again after
+    # delay seconds, within the group's limits and counted by its backoff like
+    # any other login, without holding a slot while it waits.
+    def run(self, ips, work, workers=1, regions=None):
+        regions = regions or {}
+        workers = max(1, workers)
+        for index, device in enumerate(ips):
+            self.group_for(device, regions.get(device)).devices.append((index, device, 1))
+        groups = list(self.groups.values())
+        logging.info("Scheduling " + ", ".join(f"{group.name}: {len(group.devices)}" for group in groups if group.devices))
+
+        condition = threading.Condition()
+        finished = queue.Queue()
+
+        def run_one(group, index, device, attempt):
+            timing = DeviceTiming(device)
+            result = None
+            try:
+                result = work(device, timing, attempt)
+            except Exception as e:
+                logging.error(f'Scheduled work for {device} failed: {str(e)}')
+                timing.status = "error"
+            with condition:
+                now = time.monotonic()
+                group.finish(timing.status, now)
+                if isinstance(result, Retry):
+                    group.retry(index, device, attempt + 1, now + result.delay)
+                condition.notify_all()
+            if not isinstance(result, Retry):
+                finished.put((index, result))
+
+        # Round robin over the groups, skipping those at their cap or login rate
+        def dispatch(executor):
+            turn = 0
+            while True:
+                with condition:
+                    if not any(group.pending() for group in groups):
+                        return
+                    now = time.monotonic()
+                    for group in groups:
+                        group.release_retries(now)
+                    if sum(group.active for group in groups) >= workers:
+                        condition.wait()
+                        continue
+                    for offset in range(len(groups)):
+                        group = groups[(turn + offset) % len(groups)]
+                        if group.ready(now):
+                            turn = (turn + offset + 1) % len(groups)
+                            index, device, attempt = group.start(now)
+                            break
+                    else:
+                        waits = [group.next_login - now for group in groups if group.devices and group.active < group.capacity()]
+                        waits += [group.retries[0][0] - now for group in groups if group.retries]
+                        condition.wait(max(0.01, min(waits)) if waits else None)
+                        continue
+                executor.submit(run_one, group, index, device, attempt)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            dispatcher = threading.Thread(target=dispatch, args=(executor,), daemon=True)
+            dispatcher.start()
+            for _ in ips:
+                yield finished.get()
@@ -0,0 +1,197 @@
+# Per-device and per-command timing instrumentation.
+#
+# Every device gets a DeviceTiming with the wall-clock time of its phases
+# (detect, login, commands), and every send_command goes through a TimedSession
+# that records seconds, bytes received and how often the same command had to be
+# sent again. Finished devices are appended to a JSON-lines file, and the run ends
+# with a report of the slowest devices and commands plus p50/p95/p99 per command.
+#
+# Usage: python timing.py timings_<date>.jsonl [more files] to rebuild the report.
+
+import argparse
+import json
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from inventory_logging import current_phase, set_device_context
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = min(len(ordered), max(1, math.ceil(fraction * len(ordered))))
+    return ordered[rank - 1]
+
+
+class DeviceTiming:
+    def __init__(self, device):
+        self.device = device
+        self.started_at = time.time()
+        self.phases = {}
+        self.commands = []
+        self.sent = defaultdict(int)
+        self.attempts = 1
+        self.status = "ok"
+        self.error = None
+        self.failed_phase = None
+        self.platform = None
+        self.device_type = None
+        self.planned_commands = None
+        self.total = None
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        previous_phase = current_phase()
+        set_device_context(phase=name)
+        try:
+            yield
+        except BaseException:
+            # The innermost phase that raised is where the device failed
+            self.failed_phase = self.failed_phase or name
+            raise
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - started
+            set_device_context(phase=previous_phase)
+
+    def record_command(self, command, seconds, output, ok=True):
+        self.sent[command] += 1
+        self.commands.append({
+            "command": command,
+            "seconds": round(seconds, 4),
+            "bytes": len(output.encode("utf-8", "replace")) if output else 0,
+            "retries": self.sent[command] - 1,
+            "ok": ok,
+        })
+
+    def finish(self, status="ok", error=None):
+        self.total = time.time() - self.started_at
+        self.status = status
+        self.error = error
+
+    def as_record(self):
+        return {
+            "device": self.device,
+            "platform": self.platform,
+            "device_type": self.device_type,
+            "started_at": self.started_at,
+            "total_seconds": round(self.total or 0, 4),
+            "attempts": self.attempts,
+            "status": self.status,
+            "error": self.error,
+            "failed_phase": self.failed_phase,
+            "planned_commands": self.planned_commands,
+            "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            "commands": self.commands,
+        }
+
+
+# Wraps a session so every send_command is timed into a DeviceTiming
+class TimedSession:
+    def __init__(self, ssh, timing):
+        self.ssh = ssh
+        self.timing = timing
+
+    def find_prompt(self, *args, **kwargs):
+        return self.ssh.find_prompt(*args, **kwargs)
+
+    def send_command(self, command, *args, **kwargs):
+        started = time.perf_counter()
+        output = None
+        try:
+            output = self.ssh.send_command(command, *args, **kwargs)
+            return output
+        finally:
+            self.timing.record_command(command, time.perf_counter() - started, output, ok=output is not None)
+
+    def __getattr__(self, name):
+        return getattr(self.ssh, name)
+
+
+class TimingRecorder:
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.records = []
+
+    def start(self, device):
+        return DeviceTiming(device)
+
+    def finish(self, timing):
+        record = timing.as_record()
+        with self.lock:
+            self.records.append(record)
+            if self.path:
+                with open(self.path, "a") as timing_file:
+                    timing_file.write(json.dumps(record) + "\n")
+
+    def load(self, paths):
+        for path in paths:
+            with open(path) as timing_file:
+                self.records.extend(json.loads(line) for line in timing_file if line.strip())
+
+    def report(self, top=10):
+        lines = []
+        with self.lock:
+            records = list(self.records)
+        if not records:
+            return "No timings recorded"
+
+        per_command = defaultdict(list)
+        slow_commands = []
+        for record in records:
+            for command in record["commands"]:
+                per_command[command["command"]].append(command["seconds"])
+                slow_commands.append((command["seconds"], record["device"], command["command"]))
+
+        # A retried device has a record per attempt, its last one says how it ended
+        outcomes = {record["device"]: record["status"] for record in records}
+        failed = sum(1 for status in outcomes.values() if status not in ("ok", "unchanged"))
+        unchanged = sum(1 for status in outcomes.values() if status == "unchanged")
+        total = sum(record["total_seconds"] for record in records)
+        lines.append(f"Devices: {len(outcomes)} ({failed} failed, {unchanged} unchanged) in {len(records)} attempts, device time: {total:.1f}s")
+
+        phase_totals = defaultdict(float)
+        for record in records:
+            for name, seconds in record["phases"].items():
+                phase_totals[name] += seconds
+        if phase_totals:
+            lines.append("Time per phase: " + ", ".join(f"{name} {seconds:.1f}s" for name, seconds in phase_totals.items()))
+
+        planned = [record for record in records if record.get("planned_commands") is not None]
+        if planned:
+            # A batch counts as one round trip, however many commands it carried
+            round_trips = sum(len(record["commands"]) for record in planned)
+            lines.append(f"Commands planned: {sum(record['planned_commands'] for record in planned)}, round trips: {round_trips}")
+            over_plan = [record for record in planned if len(record["commands"]) > record["planned_commands"]]
+            for record in over_plan[:top]:
+                lines.append(f"  {record['device']}: {len(record['commands'])} round trips for {record['planned_commands']} planned commands")
+
+        lines.append("Slowest devices:")
+        for record in sorted(records, key=lambda record: record["total_seconds"], reverse=True)[:top]:
+            lines.append(f"  {record['total_seconds']:9.2f}s  {record['device']}  {record['status']}")
+
+        lines.append("Slowest commands:")
+        for seconds, device, command in sorted(slow_commands, reverse=True)[:top]:
+            lines.append(f"  {seconds:9.2f}s  {device}  {command}")
+
+        lines.append(f"Per command:\n  {'':40} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'total':>10}")
+        for command, durations in sorted(per_command.items(), key=lambda item: sum(item[1]), reverse=True):
+            lines.append(f"  {command[:40]:40} {len(durations):6} {percentile(durations, 0.5):8.2f} {percentile(durations, 0.95):8.2f} "
+                         f"{percentile(durations, 0.99):8.2f} {sum(durations):10.1f}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report on the per-device timings written by a collection run")
+    parser.add_argument("timings", nargs="+", help="timings JSON-lines files")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest devices and commands to list (default: 10)")
+    args = parser.parse_args()
+
+    recorder = TimingRecorder()
+    recorder.load(args.timings)
+    print(recorder.report(args.top))